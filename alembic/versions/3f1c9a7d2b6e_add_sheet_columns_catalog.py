@@ -0,0 +1,78 @@
+"""add sheet columns catalog
+
+Revision ID: 3f1c9a7d2b6e
+Revises: e78f05fb2c4d
+Create Date: 2026-10-19 09:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b6e'
+down_revision: Union[str, None] = 'e78f05fb2c4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sheet_columns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sheet_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('type_hint', sa.String(), nullable=True),
+    sa.Column('non_null_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['sheet_id'], ['sheets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sheet_columns_id'), 'sheet_columns', ['id'], unique=False)
+    op.create_index('ix_sheet_columns_sheet_name', 'sheet_columns', ['sheet_id', 'name'], unique=True)
+    # Backfill the catalog of existing sheets the way rebuild_column_catalog
+    # builds it: columns in order of first appearance by row_number, counts
+    # of non-empty values, and the JSON type ('mixed' when it varies)
+    op.execute("""
+        WITH cells AS (
+            SELECT r.sheet_id, e.key, r.row_number, e.ord,
+                CASE json_typeof(e.value)
+                    WHEN 'null' THEN NULL
+                    WHEN 'string' THEN CASE WHEN e.value::text = '""' THEN NULL ELSE 'string' END
+                    WHEN 'number' THEN CASE WHEN e.value::text ~ '^-?[0-9]+$' THEN 'integer' ELSE 'number' END
+                    ELSE json_typeof(e.value)
+                END AS type_hint
+            FROM rows r
+            CROSS JOIN LATERAL json_each(r.data) WITH ORDINALITY AS e(key, value, ord)
+            WHERE json_typeof(r.data) = 'object'
+              AND NOT EXISTS (SELECT 1 FROM sheet_columns c WHERE c.sheet_id = r.sheet_id)
+        ),
+        firsts AS (
+            SELECT DISTINCT ON (sheet_id, key) sheet_id, key, row_number AS first_row, ord AS first_ord
+            FROM cells
+            ORDER BY sheet_id, key, row_number, ord
+        ),
+        stats AS (
+            SELECT sheet_id, key, count(type_hint) AS non_null_count,
+                CASE WHEN count(DISTINCT type_hint) > 1 THEN 'mixed' ELSE max(type_hint) END AS type_hint
+            FROM cells
+            GROUP BY sheet_id, key
+        )
+        INSERT INTO sheet_columns (sheet_id, name, position, type_hint, non_null_count)
+        SELECT f.sheet_id, f.key,
+            row_number() OVER (PARTITION BY f.sheet_id ORDER BY f.first_row, f.first_ord) - 1,
+            s.type_hint, s.non_null_count
+        FROM firsts f
+        JOIN stats s USING (sheet_id, key)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sheet_columns_sheet_name', table_name='sheet_columns')
+    op.drop_index(op.f('ix_sheet_columns_id'), table_name='sheet_columns')
+    op.drop_table('sheet_columns')
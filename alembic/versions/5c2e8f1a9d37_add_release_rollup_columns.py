@@ -0,0 +1,73 @@
+"""add release rollup columns
+
+Revision ID: 5c2e8f1a9d37
+Revises: b7d41e9c0a52
+Create Date: 2026-10-19 15:40:08.217361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8f1a9d37'
+down_revision: Union[str, None] = 'b7d41e9c0a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_COLUMNS = ('estimated_hours', 'actual_hours', 'completed_hours')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('kits', 'release_plans'):
+        for column in ROLLUP_COLUMNS:
+            op.add_column(table, sa.Column(column, sa.Float(), server_default='0', nullable=False))
+    op.add_column('kits', sa.Column('progress_percentage', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill; from here on the application keeps the totals up to date
+    op.execute("""
+        UPDATE kits SET
+            estimated_hours = totals.estimated_hours,
+            actual_hours = totals.actual_hours,
+            completed_hours = totals.completed_hours
+        FROM (
+            SELECT kit_id,
+                   COALESCE(SUM(estimated_hours), 0) AS estimated_hours,
+                   COALESCE(SUM(actual_hours), 0) AS actual_hours,
+                   COALESCE(SUM(CASE WHEN status = 'Done' THEN estimated_hours END), 0) AS completed_hours
+            FROM subtasks GROUP BY kit_id
+        ) AS totals
+        WHERE kits.id = totals.kit_id
+    """)
+    op.execute("""
+        UPDATE release_plans SET
+            estimated_hours = totals.estimated_hours,
+            actual_hours = totals.actual_hours,
+            completed_hours = totals.completed_hours
+        FROM (
+            SELECT release_plan_id,
+                   SUM(estimated_hours) AS estimated_hours,
+                   SUM(actual_hours) AS actual_hours,
+                   SUM(completed_hours) AS completed_hours
+            FROM kits GROUP BY release_plan_id
+        ) AS totals
+        WHERE release_plans.id = totals.release_plan_id
+    """)
+    for table in ('kits', 'release_plans'):
+        op.execute(f"""
+            UPDATE {table} SET progress_percentage = CASE
+                WHEN estimated_hours > 0 THEN CAST(FLOOR(completed_hours * 100 / estimated_hours) AS INTEGER)
+                ELSE 0
+            END
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('kits', 'progress_percentage')
+    for table in ('release_plans', 'kits'):
+        for column in reversed(ROLLUP_COLUMNS):
+            op.drop_column(table, column)
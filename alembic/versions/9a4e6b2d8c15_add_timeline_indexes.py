@@ -0,0 +1,40 @@
+"""add timeline indexes
+
+Revision ID: 9a4e6b2d8c15
+Revises: 5c2e8f1a9d37
+Create Date: 2026-10-19 16:52:37.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e6b2d8c15'
+down_revision: Union[str, None] = '5c2e8f1a9d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_kits_plan_status_start', 'kits', ['release_plan_id', 'status', 'start_date']),
+    ('ix_kits_plan_owner_start', 'kits', ['release_plan_id', 'owner', 'start_date']),
+    ('ix_subtasks_kit_status_start', 'subtasks', ['kit_id', 'status', 'start_date']),
+    ('ix_subtasks_kit_owner_start', 'subtasks', ['kit_id', 'owner', 'start_date']),
+    ('ix_subtasks_kit_type_start', 'subtasks', ['kit_id', 'type', 'start_date']),
+    ('ix_task_dependencies_target_source', 'task_dependencies', ['target_task_id', 'source_task_id']),
+    ('ix_task_dependencies_source', 'task_dependencies', ['source_task_id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,207 @@
+"""add release planning tables
+
+Revision ID: b7d41e9c0a52
+Revises: 3f1c9a7d2b6e
+Create Date: 2026-10-19 11:02:17.384519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41e9c0a52'
+down_revision: Union[str, None] = '3f1c9a7d2b6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('release_plans',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('start_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('status', sa.Enum('DRAFT', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', name='releasestatus'), nullable=True),
+    sa.Column('priority', sa.Enum('HIGH', 'MEDIUM', 'LOW', name='priority'), nullable=True),
+    sa.Column('release_owner', sa.String(), nullable=True),
+    sa.Column('created_by', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('progress_percentage', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_release_plans_name'), 'release_plans', ['name'], unique=True)
+    op.create_table('release_plan_sheets',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('release_plan_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('gantt_config', sa.JSON(), nullable=True),
+    sa.Column('timeline_config', sa.JSON(), nullable=True),
+    sa.Column('visualization_settings', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['release_plan_id'], ['release_plans.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('release_plan_id')
+    )
+    op.create_table('release_plan_rows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sheet_id', sa.UUID(), nullable=True),
+    sa.Column('row_number', sa.Integer(), nullable=True),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['sheet_id'], ['release_plan_sheets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_release_plan_rows_id'), 'release_plan_rows', ['id'], unique=False)
+    op.create_index('ix_release_plan_rows_sheet_row_number', 'release_plan_rows', ['sheet_id', 'row_number'], unique=True)
+    op.create_table('release_plan_milestones',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('sheet_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('type', sa.String(), nullable=True),
+    sa.Column('color', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['sheet_id'], ['release_plan_sheets.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('kits',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('release_plan_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('owner', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('NOT_STARTED', 'IN_PROGRESS', 'DONE', 'BLOCKED', name='kitstatus'), nullable=True),
+    sa.Column('start_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('labels', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['release_plan_id'], ['release_plans.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_kits_name'), 'kits', ['name'], unique=False)
+    op.create_table('subtasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kit_id', sa.UUID(), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('type', sa.String(length=50), nullable=True),
+    sa.Column('owner', sa.String(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('priority', sa.String(length=50), nullable=True),
+    sa.Column('estimated_hours', sa.Float(), nullable=True),
+    sa.Column('actual_hours', sa.Float(), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=True),
+    sa.Column('end_date', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['kit_id'], ['kits.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_subtasks_id'), 'subtasks', ['id'], unique=False)
+    op.create_table('task_dependencies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source_task_id', sa.Integer(), nullable=True),
+    sa.Column('target_task_id', sa.Integer(), nullable=True),
+    sa.Column('dependency_type', sa.String(length=50), nullable=True),
+    sa.Column('lag_days', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['source_task_id'], ['subtasks.id'], ),
+    sa.ForeignKeyConstraint(['target_task_id'], ['subtasks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_task_dependencies_id'), 'task_dependencies', ['id'], unique=False)
+    op.create_table('resource_allocations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('subtask_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('allocation_percentage', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['subtask_id'], ['subtasks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('milestones',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('release_plan_id', sa.UUID(), nullable=True),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['release_plan_id'], ['release_plans.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('risks',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('release_plan_id', sa.UUID(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('impact', sa.String(), nullable=True),
+    sa.Column('probability', sa.String(), nullable=True),
+    sa.Column('mitigation', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['release_plan_id'], ['release_plans.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('comments',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('release_plan_id', sa.UUID(), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['release_plan_id'], ['release_plans.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('attachments',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('release_plan_id', sa.UUID(), nullable=True),
+    sa.Column('file_name', sa.String(), nullable=True),
+    sa.Column('file_path', sa.String(), nullable=True),
+    sa.Column('file_type', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['release_plan_id'], ['release_plans.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('attachments')
+    op.drop_table('comments')
+    op.drop_table('risks')
+    op.drop_table('milestones')
+    op.drop_table('resource_allocations')
+    op.drop_index(op.f('ix_task_dependencies_id'), table_name='task_dependencies')
+    op.drop_table('task_dependencies')
+    op.drop_index(op.f('ix_subtasks_id'), table_name='subtasks')
+    op.drop_table('subtasks')
+    op.drop_index(op.f('ix_kits_name'), table_name='kits')
+    op.drop_table('kits')
+    op.drop_table('release_plan_milestones')
+    op.drop_index('ix_release_plan_rows_sheet_row_number', table_name='release_plan_rows')
+    op.drop_index(op.f('ix_release_plan_rows_id'), table_name='release_plan_rows')
+    op.drop_table('release_plan_rows')
+    op.drop_table('release_plan_sheets')
+    op.drop_table('release_plans')
+    sa.Enum(name='kitstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='priority').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='releasestatus').drop(op.get_bind(), checkfirst=True)
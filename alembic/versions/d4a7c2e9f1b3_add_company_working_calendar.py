@@ -0,0 +1,28 @@
+"""add company working calendar
+
+Revision ID: d4a7c2e9f1b3
+Revises: 9a4e6b2d8c15
+Create Date: 2026-10-19 18:41:09.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c2e9f1b3'
+down_revision: Union[str, None] = '9a4e6b2d8c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('companies', sa.Column('working_calendar', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('companies', 'working_calendar')
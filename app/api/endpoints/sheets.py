@@ -1,15 +1,24 @@
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Request, HTTPException, Query, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from ...core.assets import asset_url
+from ...core.compression import prefers_media_type
 from ...services.sheets import SheetsService
+from ...services.grid_encoding import GRID_MEDIA_TYPE, encode_grid, window_rows
 from ...models.database import Sheet
 from ...db.session import get_db
-from typing import List
+from typing import AsyncIterator, Iterable, Iterator, List, Optional
 from pydantic import BaseModel
 import asyncio
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
+
+# Rows rendered into the streamed page; the rest is fetched in windows
+FIRST_SCREEN_ROWS = 100
+WINDOW_ROWS = 500
+STREAM_CHUNK_SIZE = 16 * 1024
 
 class CellUpdate(BaseModel):
     range: str
@@ -19,6 +28,79 @@ class NewSheet(BaseModel):
     title: str
     platform: str  # android, ios, web, api
 
+def _sheet_data_response(
+    request: Request,
+    sheet_data: dict,
+    fast: bool,
+    start: int = 0,
+    limit: Optional[int] = None
+):
+    """Return a window of the sheet grid.
+
+    Clients that prefer application/msgpack in Accept get the columnar binary grid.
+    Otherwise, with fast=True the JSON grid is encoded straight to bytes with
+    orjson instead of walking every cell through jsonable_encoder.
+    """
+    headers, rows, total_rows = window_rows(sheet_data["data"], start, limit)
+    if prefers_media_type(request.headers.get("accept", ""), GRID_MEDIA_TYPE):
+        return Response(encode_grid(headers, rows, start, total_rows), media_type=GRID_MEDIA_TYPE)
+    if start or limit is not None:
+        sheet_data = {**sheet_data, "data": [headers] + rows, "start": start, "total_rows": total_rows}
+    if fast:
+        return ORJSONResponse(sheet_data)
+    return sheet_data
+
+def _buffered(chunks: Iterable[str], size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """Group Jinja's many small output events into reasonably sized chunks"""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def _sheet_view_context(request: Request, platform: str, sheet_id: str, sheets: dict, sheet_data: dict, limit: Optional[int]) -> dict:
+    headers, rows, total_rows = window_rows(sheet_data["data"], 0, limit)
+    return {
+        "request": request,
+        "data": [dict(zip(headers, row)) for row in rows],
+        "sheets": sheets["sheets"],
+        "platform": platform,
+        "sheet_id": sheet_id,
+        "total_rows": total_rows,
+        "window_rows": WINDOW_ROWS
+    }
+
+async def _stream_sheet_view(request: Request, platform: str, sheet_id: str, sheets: dict) -> AsyncIterator[str]:
+    # The head block goes out before the sheet data is loaded, so the browser
+    # fetches the stylesheet while the rows are read
+    template = templates.get_template("sheet_view.html")
+    yield "".join(template.blocks["head"](template.new_context({"request": request})))
+    sheet_data = await SheetsService.get_sheet_data(sheet_id)
+    context = _sheet_view_context(request, platform, sheet_id, sheets, sheet_data, FIRST_SCREEN_ROWS)
+    for chunk in _buffered(template.blocks["content"](template.new_context(context))):
+        yield chunk
+
+async def _render_sheet_view(request: Request, platform: str, sheet_id: str, stream: bool):
+    """Render sheet_view.html.
+
+    In stream mode the response starts as soon as the sheet is known to
+    exist: the page head is sent first, then the sheet data is loaded and
+    only the first screen of rows is rendered, streamed as Jinja generates
+    it. The browser fetches the remaining rows through the windowed /data
+    endpoint while scrolling. A sheet that disappears once the head is sent
+    ends the stream instead of answering 404.
+    """
+    sheets = await SheetsService.get_all_sheets(sheet_id)
+    if stream:
+        return StreamingResponse(_stream_sheet_view(request, platform, sheet_id, sheets), media_type="text/html")
+    sheet_data = await SheetsService.get_sheet_data(sheet_id)
+    context = _sheet_view_context(request, platform, sheet_id, sheets, sheet_data, None)
+    return templates.TemplateResponse("sheet_view.html", context)
+
 @router.post("/create")
 async def create_sheet(sheet_info: NewSheet):
     """Create a new sheet with our own ID system"""
@@ -47,36 +129,42 @@ async def get_android_sheets(sheet_id: str):
     return await SheetsService.get_all_sheets(sheet_id)
 
 @router.get("/android/data/{sheet_id}")
-async def get_android_sheet_data(sheet_id: str, sheet_name: str = None):
+async def get_android_sheet_data(
+    request: Request,
+    sheet_id: str,
+    sheet_name: str = None,
+    fast: bool = False,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
     """Get data from Android sheet"""
-    return await SheetsService.get_sheet_data(sheet_id, sheet_name)
+    return _sheet_data_response(
+        request, await SheetsService.get_sheet_data(sheet_id, sheet_name), fast, start, limit
+    )
 
 @router.get("/android/view/{sheet_id}")
-async def view_android_sheet(request: Request, sheet_id: str):
+async def view_android_sheet(request: Request, sheet_id: str, stream: bool = True):
     """View Android sheet in HTML format"""
     try:
-        sheets = await SheetsService.get_all_sheets(sheet_id)
-        sheet_data = await SheetsService.get_sheet_data(sheet_id)
-        
-        return templates.TemplateResponse(
-            "sheet_view.html",
-            {
-                "request": request, 
-                "data": sheet_data["data"],
-                "sheets": sheets["sheets"],
-                "platform": "Android",
-                "sheet_id": sheet_id
-            }
-        )
+        return await _render_sheet_view(request, "Android", sheet_id, stream)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 # iOS Endpoints
 @router.get("/ios/data/{sheet_id}")
-async def get_ios_sheet_data(sheet_id: str, sheet_name: str = None):
+async def get_ios_sheet_data(
+    request: Request,
+    sheet_id: str,
+    sheet_name: str = None,
+    fast: bool = False,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
     """Get iOS sheet data"""
     try:
-        return await SheetsService.get_sheet_data(sheet_id, sheet_name)
+        return _sheet_data_response(
+            request, await SheetsService.get_sheet_data(sheet_id, sheet_name), fast, start, limit
+        )
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -166,9 +254,18 @@ async def format_ios_cell(sheet_id: str, format_data: dict):
 
 # API Testing Endpoints
 @router.get("/api/data/{sheet_id}")
-async def get_api_sheet_data(sheet_id: str, sheet_name: str = None):
+async def get_api_sheet_data(
+    request: Request,
+    sheet_id: str,
+    sheet_name: str = None,
+    fast: bool = False,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
     """Get API testing sheet data"""
-    return await SheetsService.get_sheet_data(sheet_id, sheet_name)
+    return _sheet_data_response(
+        request, await SheetsService.get_sheet_data(sheet_id, sheet_name), fast, start, limit
+    )
 
 @router.post("/api/{sheet_id}/cell")
 async def update_api_cell(sheet_id: str, cell_data: dict):
@@ -187,9 +284,18 @@ async def delete_api_sheet(sheet_id: str, sheet_name: str):
 
 # Web Testing Endpoints
 @router.get("/web/data/{sheet_id}")
-async def get_web_sheet_data(sheet_id: str, sheet_name: str = None):
+async def get_web_sheet_data(
+    request: Request,
+    sheet_id: str,
+    sheet_name: str = None,
+    fast: bool = False,
+    start: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
     """Get web testing sheet data"""
-    return await SheetsService.get_sheet_data(sheet_id, sheet_name)
+    return _sheet_data_response(
+        request, await SheetsService.get_sheet_data(sheet_id, sheet_name), fast, start, limit
+    )
 
 @router.post("/web/{sheet_id}/cell")
 async def update_web_cell(sheet_id: str, cell_data: dict):
@@ -291,21 +397,9 @@ async def sheet_home(request: Request):
     )
 
 @router.get("/{platform}/view/{sheet_id}")
-async def view_sheet(platform: str, sheet_id: str, request: Request):
+async def view_sheet(platform: str, sheet_id: str, request: Request, stream: bool = True):
     """View sheet based on platform"""
     try:
-        sheets = await SheetsService.get_all_sheets(sheet_id)
-        sheet_data = await SheetsService.get_sheet_data(sheet_id)
-        
-        return templates.TemplateResponse(
-            "sheet_view.html",
-            {
-                "request": request,
-                "data": sheet_data["data"],
-                "sheets": sheets["sheets"],
-                "platform": platform.capitalize(),
-                "sheet_id": sheet_id
-            }
-        )
+        return await _render_sheet_view(request, platform.capitalize(), sheet_id, stream)
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e)) 
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.schemas.export import ExportFile, ExportRun
+from app.services.export_service import (
+    EXPORT_DATASETS, list_export_files, parquet_to_arrow_stream,
+    resolve_export_file, run_export
+)
+
+router = APIRouter()
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+@router.post("/exports/run", response_model=ExportRun)
+def run_export_endpoint(full: bool = False, db: Session = Depends(get_db)):
+    """Export sheet rows, subtasks and allocations changed since the last run"""
+    return run_export(db, full=full)
+
+@router.get("/exports/files", response_model=List[ExportFile])
+def list_export_files_endpoint(dataset: Optional[str] = None):
+    if dataset is not None and dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return list_export_files(dataset=dataset)
+
+@router.get("/exports/files/{path:path}")
+def download_export_file(path: str, format: str = "parquet"):
+    """Download one exported part as Parquet, or as an Arrow IPC stream with ?format=arrow"""
+    full_path = resolve_export_file(path)
+    if full_path is None:
+        raise HTTPException(status_code=404, detail="Export file not found")
+    if format == "arrow":
+        return Response(parquet_to_arrow_stream(full_path), media_type=ARROW_STREAM_MEDIA_TYPE)
+    if format != "parquet":
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    return FileResponse(full_path, media_type="application/vnd.apache.parquet", filename=path.replace("/", "_"))
@@ -1,6 +1,11 @@
+import uuid
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from app.core.compression import prefers_media_type
+from app.core.config import settings
 from app.db.session import get_db
 from app.schemas.release import (
     ReleasePlan, ReleasePlanCreate, ReleasePlanUpdate,
@@ -9,22 +14,31 @@ from app.schemas.release import (
     ReleasePlanSheet, ReleasePlanMilestone, ReleasePlanMilestoneCreate,
     GanttConfig, TimelineConfig, VisualizationSettings,
     TaskDependency, TaskDependencyCreate,
-    ResourceAllocation, ResourceAllocationCreate
+    ResourceAllocation, ResourceAllocationCreate,
+    SandboxEdits, CalendarConfig
 )
 from app.services.release_service import (
-    create_release_plan, get_release_plan, get_release_plans,
+    create_release_plan, get_release_plan, get_release_plans, iter_release_plan_batches,
     update_release_plan, delete_release_plan,
     create_kit, get_kit, get_kits,
     update_kit, delete_kit,
     create_subtask, get_subtask, get_subtasks,
     update_subtask, delete_subtask,
-    calculate_release_progress,
+    calculate_release_progress, calculate_portfolio_progress,
     update_sheet_config, create_milestone, get_milestones,
     update_milestone, delete_milestone,
-    create_task_dependency, get_task_dependencies,
+    create_task_dependency, get_task_dependencies, get_dependency_closure,
     create_resource_allocation, get_resource_allocations,
-    calculate_critical_path, calculate_resource_load
+    calculate_critical_path, forecast_release, get_gantt, get_timeline, calculate_resource_load, calculate_resource_heatmap,
+    level_resources,
+    create_sandbox, get_sandbox, edit_sandbox, delete_sandbox, commit_sandbox,
+    get_company_calendar, update_company_calendar,
+    release_plan_loading_profile
 )
+from app.services.sandbox import SandboxConflict
+from app.services.resource_load import HEATMAP_MEDIA_TYPE, encode_heatmap, heatmap_document
+from app.utils.loading import NDJSON_MEDIA_TYPE
+from app.utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter()
 
@@ -35,34 +49,72 @@ def create_release_plan_endpoint(
     db: Session = Depends(get_db)
 ):
     """
-    Create a new release plan
+    Create a new release plan, with any nested kits, subtasks, dependencies
+    and allocations, in one transaction
     """
-    return create_release_plan(db=db, release_plan=release_plan)
+    try:
+        return create_release_plan(db=db, release_plan=release_plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/release-plans", response_model=List[ReleasePlan])
+@router.get("/release-plans", response_model=None, responses={200: {"model": List[ReleasePlan]}})
 def get_all_release_plans(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    company_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     status: Optional[str] = None,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    depth: Optional[str] = Query(None, pattern="^(plan|kits|full)$"),
     db: Session = Depends(get_db)
 ):
     """
-    Get all release plans with optional filtering
+    Get all release plans with optional filtering, one keyset page at a time.
+    ?depth= is plan, kits or full (the default); ?include= accepts kits,
+    kits.subtasks and sheet for finer control; ?fields= limits plan columns.
     """
-    return get_release_plans(db, skip=skip, limit=limit, status=status)
+    profile = release_plan_loading_profile(include, fields, depth)
+    release_plans = get_release_plans(
+        db, company_id=company_id, after=decode_cursor(cursor, uuid.UUID), limit=limit, status=status,
+        options=profile.options
+    )
+    return profile.dump_all(set_next_cursor(response, release_plans, limit, "id"))
+
+@router.get("/release-plans/export", response_class=StreamingResponse)
+def export_release_plans(
+    company_id: Optional[int] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = None,
+    depth: str = Query("full", pattern="^(plan|kits|full)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream every matching release plan as NDJSON, one plan per line
+    """
+    profile = release_plan_loading_profile(fields=fields, depth=depth)
+    batches = iter_release_plan_batches(
+        db, company_id=company_id, status=status, options=profile.options,
+        batch_size=settings.RELEASE_PLAN_EXPORT_BATCH_SIZE
+    )
+    return StreamingResponse(profile.ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
 
-@router.get("/release-plans/{release_plan_id}", response_model=ReleasePlan)
+@router.get("/release-plans/{release_plan_id}", response_model=None, responses={200: {"model": ReleasePlan}})
 def get_release_plan_endpoint(
     release_plan_id: str,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    depth: Optional[str] = Query(None, pattern="^(plan|kits|full)$"),
     db: Session = Depends(get_db)
 ):
     """
     Get a specific release plan by ID
     """
-    db_release_plan = get_release_plan(db, release_plan_id=release_plan_id)
+    profile = release_plan_loading_profile(include, fields, depth)
+    db_release_plan = get_release_plan(db, release_plan_id=release_plan_id, options=profile.options)
     if db_release_plan is None:
         raise HTTPException(status_code=404, detail="Release plan not found")
-    return db_release_plan
+    return profile.dump(db_release_plan)
 
 @router.put("/release-plans/{release_plan_id}", response_model=ReleasePlan)
 def update_release_plan_endpoint(
@@ -97,15 +149,25 @@ def create_new_kit(
     kit: KitCreate,
     db: Session = Depends(get_db)
 ):
-    return create_kit(db=db, kit=kit, release_plan_id=release_plan_id)
+    try:
+        return create_kit(db=db, kit=kit, release_plan_id=release_plan_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/release-plans/{release_plan_id}/kits", response_model=List[Kit])
 def read_kits(
     release_plan_id: str,
+    response: Response,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     db: Session = Depends(get_db)
 ):
-    return get_kits(db, release_plan_id=release_plan_id, status=status)
+    kits = get_kits(
+        db, release_plan_id=release_plan_id, status=status,
+        after=decode_cursor(cursor, uuid.UUID), limit=limit
+    )
+    return set_next_cursor(response, kits, limit, "id")
 
 @router.get("/kits/{kit_id}", response_model=Kit)
 def read_kit(kit_id: str, db: Session = Depends(get_db)):
@@ -138,7 +200,10 @@ def create_new_subtask(
     subtask: SubtaskCreate,
     db: Session = Depends(get_db)
 ):
-    return create_subtask(db=db, subtask=subtask, kit_id=kit_id)
+    try:
+        return create_subtask(db=db, subtask=subtask, kit_id=kit_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/kits/{kit_id}/subtasks", response_model=List[Subtask])
 def read_subtasks(
@@ -221,8 +286,39 @@ def delete_milestone_endpoint(milestone_id: str, db: Session = Depends(get_db)):
 
 # Enhanced progress endpoint
 @router.get("/release-plans/{release_plan_id}/progress")
-def get_release_progress(release_plan_id: str, db: Session = Depends(get_db)):
-    return calculate_release_progress(db, release_plan_id)
+def get_release_progress(
+    release_plan_id: str,
+    weighting: str = Query("kits", pattern="^(kits|hours)$"),
+    db: Session = Depends(get_db)
+):
+    return calculate_release_progress(db, release_plan_id, weighting)
+
+@router.get("/companies/{company_id}/release-progress")
+def get_portfolio_progress(
+    company_id: int,
+    weighting: str = Query("kits", pattern="^(kits|hours)$"),
+    db: Session = Depends(get_db)
+):
+    """Progress of every release plan of a company"""
+    return calculate_portfolio_progress(db, company_id, weighting)
+
+@router.get("/companies/{company_id}/calendar")
+def read_company_calendar(company_id: int, db: Session = Depends(get_db)):
+    """Weekend days, holidays and working hours per day used for the company's schedules and loads"""
+    calendar = get_company_calendar(db, company_id)
+    if calendar is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return calendar
+
+@router.put("/companies/{company_id}/calendar")
+def replace_company_calendar(company_id: int, calendar: CalendarConfig, db: Session = Depends(get_db)):
+    try:
+        result = update_company_calendar(db, company_id, calendar)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return result
 
 # Dependency endpoints
 @router.post("/subtasks/{subtask_id}/dependencies", response_model=TaskDependency)
@@ -231,7 +327,13 @@ def create_new_dependency(
     dependency: TaskDependencyCreate,
     db: Session = Depends(get_db)
 ):
-    return create_task_dependency(db, dependency, subtask_id)
+    try:
+        db_dependency = create_task_dependency(db, dependency, subtask_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if db_dependency is None:
+        raise HTTPException(status_code=404, detail="Subtask not found")
+    return db_dependency
 
 @router.get("/subtasks/{subtask_id}/dependencies", response_model=List[TaskDependency])
 def read_dependencies(
@@ -241,6 +343,17 @@ def read_dependencies(
 ):
     return get_task_dependencies(db, subtask_id, direction)
 
+@router.get("/subtasks/{subtask_id}/dependency-closure")
+def read_dependency_closure(
+    subtask_id: str,
+    direction: str = Query("both", pattern="^(upstream|downstream|both)$"),
+    db: Session = Depends(get_db)
+):
+    closure = get_dependency_closure(db, subtask_id, direction)
+    if closure is None:
+        raise HTTPException(status_code=404, detail="Subtask not found")
+    return closure
+
 # Resource allocation endpoints
 @router.post("/subtasks/{subtask_id}/allocations", response_model=ResourceAllocation)
 def create_new_allocation(
@@ -273,16 +386,171 @@ def read_user_allocations(
 # Analysis endpoints
 @router.get("/release-plans/{release_plan_id}/critical-path")
 def get_critical_path(release_plan_id: str, db: Session = Depends(get_db)):
-    return calculate_critical_path(db, release_plan_id)
+    try:
+        return calculate_critical_path(db, release_plan_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/release-plans/{release_plan_id}/forecast")
+def read_forecast(
+    release_plan_id: str,
+    trials: int = Query(settings.FORECAST_TRIALS, ge=100, le=settings.FORECAST_MAX_TRIALS),
+    seed: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """P50/P80/P95 completion dates for the plan, its kits and milestones; pass ?seed= for repeatable runs"""
+    try:
+        result = forecast_release(db, release_plan_id, trials, seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Release plan not found")
+    return result
+
+@router.get("/release-plans/{release_plan_id}/gantt")
+def read_gantt(release_plan_id: str, db: Session = Depends(get_db)):
+    """Kit and subtask bars, dependencies and milestones laid out for the sheet's GanttConfig"""
+    try:
+        gantt = get_gantt(db, release_plan_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if gantt is None:
+        raise HTTPException(status_code=404, detail="Release plan not found")
+    return gantt
+
+@router.get("/release-plans/{release_plan_id}/timeline")
+def read_timeline(
+    release_plan_id: str,
+    level: str = Query("subtasks", pattern="^(kits|subtasks)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Kits or subtasks grouped and sorted by the sheet's timeline config.
+    Each group has a next_cursor; pass it as ?cursor= for the rest of that group.
+    """
+    try:
+        timeline = get_timeline(db, release_plan_id, level, after=decode_cursor(cursor), limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Release plan not found")
+    return timeline
+
+@router.get("/release-plans/{release_plan_id}/leveling")
+def preview_leveling(release_plan_id: str, db: Session = Depends(get_db)):
+    """Start date shifts that would keep every allocated user within capacity"""
+    return _leveling(db, release_plan_id, apply=False)
+
+@router.post("/release-plans/{release_plan_id}/leveling")
+def apply_leveling(release_plan_id: str, db: Session = Depends(get_db)):
+    """Level the plan and write the shifted dates in one transaction"""
+    return _leveling(db, release_plan_id, apply=True)
+
+def _leveling(db: Session, release_plan_id: str, apply: bool) -> Dict[str, Any]:
+    try:
+        result = level_resources(db, release_plan_id, apply=apply)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Release plan not found")
+    return result
+
+# What-if sandbox endpoints
+@router.post("/release-plans/{release_plan_id}/sandboxes")
+def open_sandbox(release_plan_id: str, db: Session = Depends(get_db)):
+    """Snapshot the plan into a sandbox that edits can be tried on without touching the plan"""
+    try:
+        sandbox = create_sandbox(db, release_plan_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if sandbox is None:
+        raise HTTPException(status_code=404, detail="Release plan not found")
+    return sandbox
+
+@router.get("/sandboxes/{sandbox_id}")
+def read_sandbox(sandbox_id: str):
+    sandbox = get_sandbox(sandbox_id)
+    if sandbox is None:
+        raise HTTPException(status_code=404, detail="Sandbox not found")
+    return sandbox
+
+@router.post("/sandboxes/{sandbox_id}/edits")
+def edit_sandbox_plan(sandbox_id: str, edits: SandboxEdits):
+    """Apply edits in order and return the new critical path and resource load; an invalid edit rejects the whole batch"""
+    try:
+        sandbox = edit_sandbox(sandbox_id, edits.edits)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if sandbox is None:
+        raise HTTPException(status_code=404, detail="Sandbox not found")
+    return sandbox
+
+@router.post("/sandboxes/{sandbox_id}/commit")
+def commit_sandbox_plan(sandbox_id: str, db: Session = Depends(get_db)):
+    """Write the sandbox's changes to the plan in one transaction"""
+    try:
+        result = commit_sandbox(db, sandbox_id)
+    except SandboxConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Sandbox not found")
+    return result
+
+@router.delete("/sandboxes/{sandbox_id}")
+def discard_sandbox(sandbox_id: str):
+    if not delete_sandbox(sandbox_id):
+        raise HTTPException(status_code=404, detail="Sandbox not found")
+    return {"message": "Sandbox discarded"}
 
 @router.get("/users/{user_id}/resource-load")
 def get_resource_load(
     user_id: str,
     start_date: datetime,
     end_date: datetime,
+    granularity: str = Query("daily", pattern="^(daily|weekly|monthly)$"),
+    db: Session = Depends(get_db)
+):
+    try:
+        return calculate_resource_load(db, user_id, start_date, end_date, granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _heatmap_response(request: Request, heatmap: Dict[str, Any]):
+    if prefers_media_type(request.headers.get("accept", ""), HEATMAP_MEDIA_TYPE):
+        return Response(encode_heatmap(heatmap), media_type=HEATMAP_MEDIA_TYPE)
+    return heatmap_document(heatmap)
+
+@router.get("/companies/{company_id}/resource-heatmap")
+def get_company_resource_heatmap(
+    company_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Daily load of every allocated user in a company, as a users x dates matrix"""
+    try:
+        heatmap = calculate_resource_heatmap(db, start_date, end_date, company_id=company_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _heatmap_response(request, heatmap)
+
+@router.get("/release-plans/{release_plan_id}/resource-heatmap")
+def get_release_resource_heatmap(
+    release_plan_id: str,
+    start_date: datetime,
+    end_date: datetime,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    return calculate_resource_load(db, user_id, start_date, end_date)
+    """Daily load of every user allocated to a release plan, as a users x dates matrix"""
+    try:
+        heatmap = calculate_resource_heatmap(db, start_date, end_date, release_plan_id=release_plan_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _heatmap_response(request, heatmap)
 
 # Visualization settings endpoint
 @router.put("/sheets/{sheet_id}/visualization", response_model=ReleasePlanSheet)
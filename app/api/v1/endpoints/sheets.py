@@ -1,18 +1,25 @@
+import uuid
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
 from sqlalchemy.orm import Session
+from app.core.compression import etag_response
+from app.core.config import settings
 from app.db.session import get_db
 from app.schemas.sheet import (
     Company, CompanyCreate, Platform, PlatformCreate,
-    Sheet, SheetCreate, SheetUpdate, Row, RowCreate, RowUpdate
+    Sheet, SheetCreate, SheetUpdate, Row, RowCreate, RowUpdate,
+    SheetSchema, SheetInstantiate, InstantiatedSheet
 )
 from app.services.sheet_service import (
     create_company, get_company, get_companies,
     create_platform, get_platform, get_platforms,
     create_sheet, get_sheet, get_sheets, update_sheet, delete_sheet,
     create_row, get_row, get_rows, update_row, delete_row,
-    get_company_sheets
+    get_company_sheets, get_sheet_columns, sheet_loading_profile,
+    get_row_data, instantiate_template
 )
+from app.utils.pagination import decode_cursor, set_next_cursor
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -26,7 +33,8 @@ class DetailedSheet(BaseModel):
     description: Optional[str]
     is_template: bool
     created_at: str
-    updated_at: str
+    updated_at: Optional[str] = None
+    columns: List[str] = []
     rows: List[Dict[str, Any]]
 
 class CompleteSheet(BaseModel):
@@ -38,7 +46,7 @@ class CompleteSheet(BaseModel):
     description: Optional[str]
     is_template: bool
     created_at: str
-    updated_at: str
+    updated_at: Optional[str] = None
     columns: List[str]
     headers: List[str]
     rows: List[Dict[str, Any]]
@@ -49,8 +57,14 @@ def create_new_company(company: CompanyCreate, db: Session = Depends(get_db)):
     return create_company(db=db, company=company)
 
 @router.get("/companies", response_model=List[Company])
-def read_companies(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_companies(db, skip=skip, limit=limit)
+def read_companies(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    companies = get_companies(db, after=decode_cursor(cursor, int), limit=limit)
+    return set_next_cursor(response, companies, limit, "id")
 
 @router.get("/companies/{company_id}", response_model=Company)
 def read_company(company_id: int, db: Session = Depends(get_db)):
@@ -65,8 +79,14 @@ def create_new_platform(platform: PlatformCreate, db: Session = Depends(get_db))
     return create_platform(db=db, platform=platform)
 
 @router.get("/platforms", response_model=List[Platform])
-def read_platforms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_platforms(db, skip=skip, limit=limit)
+def read_platforms(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    platforms = get_platforms(db, after=decode_cursor(cursor, int), limit=limit)
+    return set_next_cursor(response, platforms, limit, "id")
 
 @router.get("/platforms/{platform_id}", response_model=Platform)
 def read_platform(platform_id: int, db: Session = Depends(get_db)):
@@ -80,22 +100,50 @@ def read_platform(platform_id: int, db: Session = Depends(get_db)):
 def create_new_sheet(sheet: SheetCreate, db: Session = Depends(get_db)):
     return create_sheet(db=db, sheet=sheet)
 
-@router.get("/sheets", response_model=List[Sheet])
+@router.post("/sheets/{sheet_id}/instantiate", response_model=InstantiatedSheet)
+def instantiate_sheet_template(
+    sheet_id: str,
+    params: SheetInstantiate = SheetInstantiate(),
+    db: Session = Depends(get_db)
+):
+    """Create a new sheet from a template sheet, copying its rows inside the database"""
+    new_id = instantiate_template(db, template_id=sheet_id, params=params)
+    if new_id is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return {"id": new_id, "template_id": sheet_id}
+
+# ?include= picks nested relations (default company,platform,rows) and
+# ?fields= picks sheet columns; both map to eager-loading options.
+@router.get("/sheets", response_model=None, responses={200: {"model": List[Sheet]}})
 def read_sheets(
+    response: Response,
     company_id: Optional[int] = None,
     platform_id: Optional[int] = None,
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return get_sheets(db, company_id=company_id, platform_id=platform_id, skip=skip, limit=limit)
+    profile = sheet_loading_profile(include, fields)
+    sheets = get_sheets(
+        db, company_id=company_id, platform_id=platform_id,
+        after=decode_cursor(cursor, uuid.UUID), limit=limit, options=profile.options
+    )
+    return profile.dump_all(set_next_cursor(response, sheets, limit, "id"))
 
-@router.get("/sheets/{sheet_id}", response_model=Sheet)
-def read_sheet(sheet_id: int, db: Session = Depends(get_db)):
-    db_sheet = get_sheet(db, sheet_id=sheet_id)
+@router.get("/sheets/{sheet_id}", response_model=None, responses={200: {"model": Sheet}})
+def read_sheet(
+    sheet_id: str,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    profile = sheet_loading_profile(include, fields)
+    db_sheet = get_sheet(db, sheet_id=sheet_id, options=profile.options)
     if db_sheet is None:
         raise HTTPException(status_code=404, detail="Sheet not found")
-    return db_sheet
+    return profile.dump(db_sheet)
 
 @router.put("/sheets/{sheet_id}", response_model=Sheet)
 def update_sheet_endpoint(sheet_id: int, sheet: SheetUpdate, db: Session = Depends(get_db)):
@@ -116,8 +164,15 @@ def create_new_row(sheet_id: int, row: RowCreate, db: Session = Depends(get_db))
     return create_row(db=db, sheet_id=sheet_id, row=row)
 
 @router.get("/sheets/{sheet_id}/rows", response_model=List[Row])
-def read_rows(sheet_id: int, db: Session = Depends(get_db)):
-    return get_rows(db, sheet_id=sheet_id)
+def read_rows(
+    sheet_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    rows = get_rows(db, sheet_id=sheet_id, after=decode_cursor(cursor, int), limit=limit)
+    return set_next_cursor(response, rows, limit, "row_number")
 
 @router.get("/rows/{row_id}", response_model=Row)
 def read_row(row_id: int, db: Session = Depends(get_db)):
@@ -140,22 +195,25 @@ def delete_row_endpoint(row_id: int, db: Session = Depends(get_db)):
     return {"message": "Row deleted successfully"}
 
 # Company sheets endpoint
-@router.get("/companies/{company_id}/sheets", response_model=List[Sheet])
+@router.get("/companies/{company_id}/sheets", response_model=None, responses={200: {"model": List[Sheet]}})
 def read_company_sheets(
     company_id: int,
+    response: Response,
     platform_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return get_company_sheets(db, company_id=company_id, platform_id=platform_id)
+    profile = sheet_loading_profile(include, fields)
+    sheets = get_company_sheets(
+        db, company_id=company_id, platform_id=platform_id,
+        after=decode_cursor(cursor, uuid.UUID), limit=limit, options=profile.options
+    )
+    return profile.dump_all(set_next_cursor(response, sheets, limit, "id"))
 
-@router.get("/sheets/{sheet_id}/detailed", response_model=DetailedSheet)
-def get_detailed_sheet(sheet_id: str, db: Session = Depends(get_db)):
-    db_sheet = get_sheet(db, sheet_id=sheet_id)
-    if db_sheet is None:
-        raise HTTPException(status_code=404, detail="Sheet not found")
-    
-    rows = get_rows(db, sheet_id=sheet_id)
-    
+def _sheet_payload(db_sheet, columns: List[str], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
     return {
         "id": str(db_sheet.id),
         "name": db_sheet.name,
@@ -166,40 +224,55 @@ def get_detailed_sheet(sheet_id: str, db: Session = Depends(get_db)):
         "is_template": db_sheet.is_template,
         "created_at": db_sheet.created_at.isoformat(),
         "updated_at": db_sheet.updated_at.isoformat() if db_sheet.updated_at else None,
-        "rows": [{"row_number": row.row_number, "data": row.data} for row in rows]
+        "columns": columns,
+        "rows": rows
     }
 
+def _sheet_etag(db_sheet, view: str, fast: bool) -> str:
+    # Row writes bump the sheet's updated_at, so it versions the whole sheet
+    version = (db_sheet.updated_at or db_sheet.created_at).timestamp()
+    return f'W/"{db_sheet.id}-{view}-{int(fast)}-{version}"'
+
+# With ?fast=true the payload, which is built from trusted database values,
+# skips response_model validation and is encoded straight to bytes by orjson.
+# Unchanged sheets are answered with 304 or from the compressed response cache.
+@router.get("/sheets/{sheet_id}/detailed", response_model=DetailedSheet)
+def get_detailed_sheet(request: Request, sheet_id: str, fast: bool = False, db: Session = Depends(get_db)):
+    db_sheet = get_sheet(db, sheet_id=sheet_id)
+    if db_sheet is None:
+        raise HTTPException(status_code=404, detail="Sheet not found")
+
+    def render() -> Response:
+        columns = [column.name for column in get_sheet_columns(db, sheet_id=sheet_id)]
+        payload = _sheet_payload(db_sheet, columns, get_row_data(db, sheet_id=sheet_id))
+        if fast:
+            return ORJSONResponse(payload)
+        return JSONResponse(DetailedSheet(**payload).model_dump(mode="json"))
+
+    return etag_response(request, _sheet_etag(db_sheet, "detailed", fast), render)
+
 @router.get("/sheets/{sheet_id}/complete", response_model=CompleteSheet)
-def get_complete_sheet(sheet_id: str, db: Session = Depends(get_db)):
+def get_complete_sheet(request: Request, sheet_id: str, fast: bool = False, db: Session = Depends(get_db)):
     db_sheet = get_sheet(db, sheet_id=sheet_id)
     if db_sheet is None:
         raise HTTPException(status_code=404, detail="Sheet not found")
-    
-    rows = get_rows(db, sheet_id=sheet_id)
-    
-    # Get all unique column names from the data
-    columns = set()
-    for row in rows:
-        if row.data:
-            columns.update(row.data.keys())
-    
-    # Convert columns to list and sort them
-    columns_list = sorted(list(columns))
-    
-    # Use the same columns as headers for now
-    headers = columns_list
-    
-    return {
-        "id": str(db_sheet.id),
-        "name": db_sheet.name,
-        "company_id": db_sheet.company_id,
-        "platform_id": db_sheet.platform_id,
-        "sheet_type": db_sheet.sheet_type,
-        "description": db_sheet.description,
-        "is_template": db_sheet.is_template,
-        "created_at": db_sheet.created_at.isoformat(),
-        "updated_at": db_sheet.updated_at.isoformat() if db_sheet.updated_at else None,
-        "columns": columns_list,
-        "headers": headers,
-        "rows": [{"row_number": row.row_number, "data": row.data} for row in rows]
-    } 
\ No newline at end of file
+
+    def render() -> Response:
+        # Column names come from the maintained catalog, in first-seen order
+        columns_list = [column.name for column in get_sheet_columns(db, sheet_id=sheet_id)]
+        payload = _sheet_payload(db_sheet, columns_list, get_row_data(db, sheet_id=sheet_id))
+
+        # Use the same columns as headers for now
+        payload["headers"] = columns_list
+        if fast:
+            return ORJSONResponse(payload)
+        return JSONResponse(CompleteSheet(**payload).model_dump(mode="json"))
+
+    return etag_response(request, _sheet_etag(db_sheet, "complete", fast), render)
+
+@router.get("/sheets/{sheet_id}/schema", response_model=SheetSchema)
+def get_sheet_schema(sheet_id: str, db: Session = Depends(get_db)):
+    db_sheet = get_sheet(db, sheet_id=sheet_id)
+    if db_sheet is None:
+        raise HTTPException(status_code=404, detail="Sheet not found")
+    return {"sheet_id": str(db_sheet.id), "columns": get_sheet_columns(db, sheet_id=sheet_id)}
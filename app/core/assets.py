@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import json
+import os
+from functools import lru_cache
+from mimetypes import guess_type
+from typing import Dict
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Scope
+from app.core.compression import negotiate_encoding
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # without brotli only the .gz siblings are written
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Precompressed sibling suffix per content coding, in server preference order
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+def _hashed_name(name: str, content: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+def _write(path: str, content: bytes) -> None:
+    # Several workers may build at startup; never expose a half-written file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+def build_assets(source_dir: str = settings.STATIC_DIR, build_dir: str = settings.STATIC_BUILD_DIR) -> Dict[str, str]:
+    """Write content-hashed copies of the static assets with .gz/.br siblings.
+
+    Returns the manifest mapping each source name to its hashed file name,
+    which is also written to build_dir/manifest.json.
+    """
+    os.makedirs(build_dir, exist_ok=True)
+    manifest = {}
+    for name in sorted(os.listdir(source_dir)):
+        source = os.path.join(source_dir, name)
+        if not os.path.isfile(source):
+            continue
+        with open(source, "rb") as f:
+            content = f.read()
+        hashed = _hashed_name(name, content)
+        target = os.path.join(build_dir, hashed)
+        # A hashed name always holds the same bytes, so existing files are reused
+        if not os.path.exists(target):
+            _write(target, content)
+        if not os.path.exists(target + ".gz"):
+            _write(target + ".gz", gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None and not os.path.exists(target + ".br"):
+            _write(target + ".br", brotli.compress(content, quality=11))
+        manifest[name] = hashed
+    _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+def _media_type(path: str) -> str:
+    media_type = guess_type(path)[0] or "application/octet-stream"
+    return f"{media_type}; charset=utf-8" if media_type.startswith("text/") else media_type
+
+@lru_cache(maxsize=1)
+def load_manifest() -> Dict[str, str]:
+    return build_assets()
+
+def asset_url(name: str) -> str:
+    """URL of the hashed build of a static asset, for use in templates"""
+    try:
+        hashed = load_manifest()[name]
+    except KeyError:
+        raise ValueError(f"Unknown static asset: {name}")
+    return f"{settings.STATIC_URL}/{hashed}"
+
+class ImmutableStaticFiles(StaticFiles):
+    """Serve hashed assets with a one year immutable Cache-Control.
+
+    When the client accepts br or gzip the precompressed sibling is sent
+    as is, so assets are never compressed per request.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), tuple(PRECOMPRESSED_SUFFIXES))
+        if encoding is not None:
+            try:
+                response = await super().get_response(path + PRECOMPRESSED_SUFFIXES[encoding], scope)
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Content-Type"] = _media_type(path)
+            except HTTPException:
+                response = None
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers.add_vary_header("Accept-Encoding")
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+if __name__ == "__main__":
+    for source, hashed in build_assets().items():
+        print(f"{source} -> {hashed}")
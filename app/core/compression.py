@@ -0,0 +1,236 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+# Server preference when the client weights several encodings equally
+SUPPORTED_ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/msgpack",
+    "application/vnd.apache.arrow.stream",
+)
+
+def _quality_values(header: str) -> Dict[str, float]:
+    """q-value per item of an Accept or Accept-Encoding header, keyed in lower case"""
+    weights = {}
+    for part in header.split(","):
+        item, _, params = part.strip().partition(";")
+        item = item.strip().lower()
+        if not item:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[item] = q
+    return weights
+
+def negotiate_encoding(accept_encoding: str, supported: Sequence[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Pick the best supported content coding from an Accept-Encoding header"""
+    weights = _quality_values(accept_encoding)
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def prefers_media_type(accept: str, media_type: str, default: str = "application/json") -> bool:
+    """Whether an Accept header asks for media_type over the default representation.
+
+    media_type has to be named explicitly with a q-value above 0 and at
+    least the default's, which may also match through type/* or */*. A
+    wildcard alone, as browsers send, keeps the default.
+    """
+    weights = _quality_values(accept)
+    q = weights.get(media_type, 0.0)
+    if q <= 0:
+        return False
+    main_type = default.split("/", 1)[0]
+    default_q = weights.get(default, weights.get(f"{main_type}/*", weights.get("*/*", 0.0)))
+    return q >= default_q
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+class StreamCompressor:
+    """Incremental compressor that flushes after every chunk so streamed exports stay streamed"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=settings.ZSTD_LEVEL).compressobj()
+        else:
+            self._compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class CompressionMiddleware:
+    """Compress responses with zstd or gzip, as negotiated through Accept-Encoding.
+
+    Bodies below minimum_size and responses that already carry a
+    Content-Encoding (such as cached sheet responses) pass through untouched.
+    Streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[StreamCompressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start_message is not None:
+            await self._start(message)
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        body = self.compressor.compress(message.get("body", b""))
+        more_body = message.get("more_body", False)
+        if not more_body:
+            body += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _start(self, message: Message) -> None:
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+            self.passthrough = True
+        else:
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+
+        if self.passthrough:
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        if more_body:
+            del headers["Content-Length"]
+            self.compressor = StreamCompressor(self.encoding)
+            body = self.compressor.compress(body)
+        else:
+            body = compress(body, self.encoding)
+            headers["Content-Length"] = str(len(body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+class CompressedResponseCache:
+    """Byte-bounded LRU of compressed response bodies keyed by (ETag, encoding)"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, encoding: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get((etag, encoding))
+            if entry is not None:
+                self._entries.move_to_end((etag, encoding))
+            return entry
+
+    def put(self, etag: str, encoding: str, body: bytes, media_type: str) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop((etag, encoding), None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._entries[(etag, encoding)] = (body, media_type)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+compressed_cache = CompressedResponseCache(settings.COMPRESSED_CACHE_MAX_BYTES)
+
+def etag_response(request: Request, etag: str, render: Callable[[], Response]) -> Response:
+    """Serve a representation identified by etag, reusing cached compressed bytes.
+
+    Answers 304 when the client already has it. Otherwise render() is only
+    called when no compressed copy for the negotiated encoding is cached.
+    """
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is not None:
+        cached = compressed_cache.get(etag, encoding)
+        if cached is not None:
+            body, media_type = cached
+            return Response(body, media_type=media_type, headers={**headers, "Content-Encoding": encoding})
+
+    response = render()
+    response.headers.update(headers)
+    if encoding is None or len(response.body) < settings.COMPRESSION_MINIMUM_SIZE:
+        return response
+    body = compress(response.body, encoding)
+    compressed_cache.put(etag, encoding, body, response.media_type)
+    return Response(body, media_type=response.media_type, headers={**headers, "Content-Encoding": encoding})
@@ -17,6 +17,57 @@ class Settings(BaseSettings):
     # JWT settings
     SECRET_KEY: str = "your-secret-key"  # Change this to a secure secret key
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Keyset pagination settings
+    DEFAULT_PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+
+    # Response compression settings
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    ZSTD_LEVEL: int = 3
+    COMPRESSED_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Static asset settings (sources in STATIC_DIR, hashed builds in STATIC_BUILD_DIR)
+    STATIC_DIR: str = "static"
+    STATIC_BUILD_DIR: str = "static/dist"
+    STATIC_URL: str = "/static"
+
+    # Analytics export settings
+    EXPORT_DIR: str = "exports"
+    EXPORT_BATCH_SIZE: int = 5000
+    # How far before the stored watermark each incremental export starts reading,
+    # to pick up transactions that committed late with an earlier timestamp
+    EXPORT_OVERLAP_SECONDS: int = 600
+    # Release plans per batch of a streamed NDJSON export
+    RELEASE_PLAN_EXPORT_BATCH_SIZE: int = 100
+
+    # Release plan analysis cache (critical path, progress), in plans
+    PLAN_ANALYSIS_CACHE_SIZE: int = 256
+
+    # Working calendar of companies that have not set their own
+    # (weekdays numbered from Monday = 0)
+    WEEKEND_DAYS: List[int] = [5, 6]
+    WORKING_HOURS_PER_DAY: float = 8
+
+    # Allocated percentage above which a person counts as over-allocated
+    RESOURCE_CAPACITY_PERCENTAGE: int = 100
+    # Longest window a team heatmap may cover, in days
+    RESOURCE_HEATMAP_MAX_DAYS: int = 732
+
+    # Monte Carlo release forecasts
+    FORECAST_TRIALS: int = 10000
+    FORECAST_MAX_TRIALS: int = 100000
+    # Finished subtasks used to calibrate actual / estimated hours, and the
+    # fewest that count; with fewer, estimates are taken as unbiased with
+    # FORECAST_DEFAULT_SIGMA spread (log scale)
+    FORECAST_HISTORY_SIZE: int = 1000
+    FORECAST_MIN_HISTORY: int = 20
+    FORECAST_DEFAULT_SIGMA: float = 0.3
+
+    # What-if sandboxes, dropped after SANDBOX_TTL_SECONDS without use
+    SANDBOX_TTL_SECONDS: int = 1800
+    SANDBOX_MAX_COUNT: int = 64
     
     # User roles
     USER_ROLES: ClassVar[Dict[str, List[str]]] = {
@@ -67,6 +67,8 @@ class Company(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
+    # CalendarConfig: weekend days, holidays and hours per working day
+    working_calendar = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -99,7 +101,27 @@ class Sheet(Base):
 
     company = relationship("Company", back_populates="sheets")
     platform = relationship("Platform", back_populates="sheets")
-    rows = relationship("Row", back_populates="sheet", cascade="all, delete-orphan")
+    rows = relationship("Row", back_populates="sheet", cascade="all, delete-orphan", order_by="Row.row_number")
+    columns = relationship("SheetColumn", back_populates="sheet", cascade="all, delete-orphan", order_by="SheetColumn.position")
+
+class SheetColumn(Base):
+    __tablename__ = "sheet_columns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sheet_id = Column(UUID(as_uuid=True), ForeignKey("sheets.id"))
+    name = Column(String)
+    position = Column(Integer)
+    type_hint = Column(String, nullable=True)  # string, integer, number, boolean, object, array, mixed
+    non_null_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    sheet = relationship("Sheet", back_populates="columns")
+
+    __table_args__ = (
+        # One catalog entry per column name within a sheet
+        Index('ix_sheet_columns_sheet_name', 'sheet_id', 'name', unique=True),
+    )
 
 class Row(Base):
     __tablename__ = "rows"
@@ -134,6 +156,10 @@ class ReleasePlan(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     progress_percentage = Column(Integer, default=0)
+    # Rolled up from subtasks by app.services.rollup
+    estimated_hours = Column(Float, default=0)
+    actual_hours = Column(Float, default=0)
+    completed_hours = Column(Float, default=0)
     
     company = relationship("Company", back_populates="release_plans")
     kits = relationship("Kit", back_populates="release_plan", cascade="all, delete-orphan")
@@ -203,12 +229,23 @@ class Kit(Base):
     start_date = Column(DateTime(timezone=True), nullable=True)
     end_date = Column(DateTime(timezone=True), nullable=True)
     labels = Column(JSON, nullable=True)
+    # Rolled up from subtasks by app.services.rollup
+    estimated_hours = Column(Float, default=0)
+    actual_hours = Column(Float, default=0)
+    completed_hours = Column(Float, default=0)
+    progress_percentage = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     release_plan = relationship("ReleasePlan", back_populates="kits")
     subtasks = relationship("Subtask", back_populates="kit", cascade="all, delete-orphan")
 
+    # Timeline groups of a plan, each in date order
+    __table_args__ = (
+        Index('ix_kits_plan_status_start', 'release_plan_id', 'status', 'start_date'),
+        Index('ix_kits_plan_owner_start', 'release_plan_id', 'owner', 'start_date'),
+    )
+
 class TaskDependency(Base):
     __tablename__ = "task_dependencies"
 
@@ -223,14 +260,20 @@ class TaskDependency(Base):
     source_task = relationship("Subtask", foreign_keys=[source_task_id], back_populates="outgoing_dependencies")
     target_task = relationship("Subtask", foreign_keys=[target_task_id], back_populates="incoming_dependencies")
 
+    __table_args__ = (
+        Index('ix_task_dependencies_target_source', 'target_task_id', 'source_task_id'),
+        Index('ix_task_dependencies_source', 'source_task_id'),
+    )
+
 class Subtask(Base):
     __tablename__ = "subtasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    kit_id = Column(Integer, ForeignKey("kits.id"))
+    kit_id = Column(UUID(as_uuid=True), ForeignKey("kits.id"))
     title = Column(String(255))
     description = Column(Text)
     type = Column(String(50))  # Development, Testing, Documentation, etc.
+    owner = Column(String, nullable=True)
     status = Column(String(50), default="not_started")
     priority = Column(String(50), default="medium")
     estimated_hours = Column(Float)
@@ -242,8 +285,15 @@ class Subtask(Base):
 
     kit = relationship("Kit", back_populates="subtasks")
     resource_allocations = relationship("ResourceAllocation", back_populates="subtask")
-    outgoing_dependencies = relationship("TaskDependency", foreign_keys=[TaskDependency.source_task_id], back_populates="source_task")
-    incoming_dependencies = relationship("TaskDependency", foreign_keys=[TaskDependency.target_task_id], back_populates="target_task")
+    outgoing_dependencies = relationship("TaskDependency", foreign_keys=[TaskDependency.source_task_id], back_populates="source_task", cascade="all, delete-orphan")
+    incoming_dependencies = relationship("TaskDependency", foreign_keys=[TaskDependency.target_task_id], back_populates="target_task", cascade="all, delete-orphan")
+
+    # Timeline groups within each kit, each in date order
+    __table_args__ = (
+        Index('ix_subtasks_kit_status_start', 'kit_id', 'status', 'start_date'),
+        Index('ix_subtasks_kit_owner_start', 'kit_id', 'owner', 'start_date'),
+        Index('ix_subtasks_kit_type_start', 'kit_id', 'type', 'start_date'),
+    )
 
 class Milestone(Base):
     __tablename__ = "milestones"
@@ -301,7 +351,7 @@ class ResourceAllocation(Base):
     __tablename__ = "resource_allocations"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    subtask_id = Column(UUID(as_uuid=True), ForeignKey("subtasks.id"))
+    subtask_id = Column(Integer, ForeignKey("subtasks.id"))
     user_id = Column(String)
     allocation_percentage = Column(Integer)  # 0-100
     start_date = Column(DateTime(timezone=True))
@@ -0,0 +1,14 @@
+from typing import Dict
+from datetime import datetime
+from pydantic import BaseModel
+
+class ExportRun(BaseModel):
+    run_id: str
+    counts: Dict[str, int]
+    watermarks: Dict[str, str]
+
+class ExportFile(BaseModel):
+    dataset: str
+    path: str
+    size: int
+    modified_at: datetime
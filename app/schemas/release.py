@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import Annotated, List, Optional, Dict, Any
+from datetime import date, datetime
 from uuid import UUID
 from enum import Enum
 
@@ -119,8 +119,49 @@ class ReleasePlanRowBase(BaseModel):
     row_number: int
     data: dict
 
+class TaskDependencyBase(BaseModel):
+    source_task_id: int
+    target_task_id: int
+    dependency_type: DependencyType
+    lag_days: int = 0
+
+class TaskDependencyCreate(TaskDependencyBase):
+    # The source is the subtask the dependency is created on. Inside a nested
+    # release plan payload the target may instead be given as the ref of a
+    # sibling subtask from the same payload.
+    source_task_id: Optional[int] = None
+    target_task_id: Optional[int] = None
+    target_ref: Optional[str] = None
+
+class TaskDependency(TaskDependencyBase):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ResourceAllocationBase(BaseModel):
+    user_id: str
+    allocation_percentage: int = Field(..., ge=0, le=100)
+    start_date: datetime
+    end_date: datetime
+
+class ResourceAllocationCreate(ResourceAllocationBase):
+    pass
+
+class ResourceAllocation(ResourceAllocationBase):
+    id: UUID
+    subtask_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # Create schemas
 class SubtaskCreate(SubtaskBase):
+    ref: Optional[str] = None  # payload-local name that dependencies can target
     dependencies: Optional[List[TaskDependencyCreate]] = None
     resource_allocations: Optional[List[ResourceAllocationCreate]] = None
 
@@ -138,7 +179,7 @@ class ReleasePlanRowCreate(ReleasePlanRowBase):
 
 # Response schemas
 class Subtask(SubtaskBase):
-    id: UUID
+    id: int
     kit_id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -149,23 +190,25 @@ class Subtask(SubtaskBase):
     class Config:
         from_attributes = True
 
-class Kit(KitBase):
+class KitSummary(KitBase):
     id: UUID
     release_plan_id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
-    subtasks: List[Subtask] = []
 
     class Config:
         from_attributes = True
 
-class ReleasePlanSheet(ReleasePlanSheetBase):
+class Kit(KitBase):
     id: UUID
     release_plan_id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
-    rows: List[ReleasePlanRow] = []
-    milestones: List[ReleasePlanMilestone] = []
+    estimated_hours: float = 0
+    actual_hours: float = 0
+    completed_hours: float = 0
+    progress_percentage: int = 0
+    subtasks: List[Subtask] = []
 
     class Config:
         from_attributes = True
@@ -179,25 +222,39 @@ class ReleasePlanRow(ReleasePlanRowBase):
     class Config:
         from_attributes = True
 
-class ReleasePlan(ReleasePlanBase):
+class ReleasePlanMilestoneCreate(ReleasePlanMilestoneBase):
+    pass
+
+class ReleasePlanMilestone(ReleasePlanMilestoneBase):
     id: UUID
+    sheet_id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
-    progress_percentage: int = 0
-    kits: List[Kit] = []
-    sheet: Optional[ReleasePlanSheet] = None
 
     class Config:
         from_attributes = True
 
-class ReleasePlanMilestoneCreate(ReleasePlanMilestoneBase):
-    pass
+class ReleasePlanSheet(ReleasePlanSheetBase):
+    id: UUID
+    release_plan_id: UUID
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    rows: List[ReleasePlanRow] = []
+    milestones: List[ReleasePlanMilestone] = []
 
-class ReleasePlanMilestone(ReleasePlanMilestoneBase):
+    class Config:
+        from_attributes = True
+
+class ReleasePlan(ReleasePlanBase):
     id: UUID
-    sheet_id: UUID
     created_at: datetime
     updated_at: Optional[datetime] = None
+    progress_percentage: int = 0
+    estimated_hours: float = 0
+    actual_hours: float = 0
+    completed_hours: float = 0
+    kits: List[Kit] = []
+    sheet: Optional[ReleasePlanSheet] = None
 
     class Config:
         from_attributes = True
@@ -231,39 +288,35 @@ class ReleasePlanUpdate(BaseModel):
     status: Optional[ReleaseStatus] = None
     priority: Optional[Priority] = None
     release_owner: Optional[str] = None
-    progress_percentage: Optional[int] = None
 
-class TaskDependencyBase(BaseModel):
-    source_task_id: UUID
-    target_task_id: UUID
-    dependency_type: DependencyType
+# What-if sandbox schemas
+class SandboxOperation(str, Enum):
+    SHIFT_KIT = "shift_kit"
+    SHIFT_SUBTASK = "shift_subtask"
+    UPDATE_SUBTASK = "update_subtask"
+    REMOVE_SUBTASK = "remove_subtask"
+    ADD_DEPENDENCY = "add_dependency"
+    REMOVE_DEPENDENCY = "remove_dependency"
+
+class SandboxEdit(BaseModel):
+    op: SandboxOperation
+    kit_id: Optional[UUID] = None
+    # The subtask edited, or the source (predecessor) of a dependency
+    subtask_id: Optional[int] = None
+    target_task_id: Optional[int] = None
+    days: Optional[int] = None
+    estimated_hours: Optional[float] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    dependency_type: DependencyType = DependencyType.FINISH_TO_START
     lag_days: int = 0
 
-class TaskDependencyCreate(TaskDependencyBase):
-    pass
-
-class TaskDependency(TaskDependencyBase):
-    id: UUID
-    created_at: datetime
-    updated_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True
-
-class ResourceAllocationBase(BaseModel):
-    user_id: str
-    allocation_percentage: int = Field(..., ge=0, le=100)
-    start_date: datetime
-    end_date: datetime
-
-class ResourceAllocationCreate(ResourceAllocationBase):
-    pass
-
-class ResourceAllocation(ResourceAllocationBase):
-    id: UUID
-    subtask_id: UUID
-    created_at: datetime
-    updated_at: Optional[datetime] = None
+class SandboxEdits(BaseModel):
+    edits: List[SandboxEdit]
 
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+# Company working calendar; unset fields fall back to the server defaults
+class CalendarConfig(BaseModel):
+    # Weekdays off, Monday = 0
+    weekend_days: Optional[List[Annotated[int, Field(ge=0, le=6)]]] = Field(None, max_length=6)
+    holidays: List[date] = []
+    hours_per_day: Optional[float] = Field(None, gt=0, le=24)
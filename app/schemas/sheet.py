@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from uuid import UUID
 
 class CompanyBase(BaseModel):
     name: str
@@ -42,13 +43,26 @@ class RowUpdate(BaseModel):
 
 class Row(RowBase):
     id: int
-    sheet_id: int
+    sheet_id: UUID
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SheetColumn(BaseModel):
+    name: str
+    position: int
+    type_hint: Optional[str] = None
+    non_null_count: int = 0
 
     class Config:
         from_attributes = True
 
+class SheetSchema(BaseModel):
+    sheet_id: str
+    columns: List[SheetColumn]
+
 class SheetBase(BaseModel):
     name: str
     company_id: int
@@ -66,10 +80,19 @@ class SheetUpdate(BaseModel):
     sheet_type: Optional[str] = None
     is_template: Optional[bool] = None
 
+class SheetInstantiate(BaseModel):
+    name: Optional[str] = None
+    company_id: Optional[int] = None
+    platform_id: Optional[int] = None
+
+class InstantiatedSheet(BaseModel):
+    id: UUID
+    template_id: UUID
+
 class Sheet(SheetBase):
-    id: int
+    id: UUID
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
     company: Company
     platform: Platform
     rows: List[Row] = []
@@ -0,0 +1,378 @@
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, aliased
+from app.models.database import Kit, ReleasePlan, Subtask, TaskDependency
+from app.services.working_calendar import CONTINUOUS, WorkingCalendar, load_plan_calendar
+
+# Dependency types as stored (FS, SS, FF, SF) or as sent by the API schema
+DEPENDENCY_TYPES = {
+    "FS": "FS", "finish_to_start": "FS",
+    "SS": "SS", "start_to_start": "SS",
+    "FF": "FF", "finish_to_finish": "FF",
+    "SF": "SF", "start_to_finish": "SF",
+}
+
+EPSILON = 1e-9
+
+class ScheduleTask:
+    """One activity in the network; times are working hours from the schedule origin"""
+
+    __slots__ = (
+        "id", "title", "duration", "not_before",
+        "earliest_start", "earliest_finish", "latest_start", "latest_finish",
+        "total_float", "free_float",
+    )
+
+    def __init__(self, id: Any, title: Optional[str], duration: float, not_before: float = 0.0):
+        self.id = id
+        self.title = title
+        self.duration = duration
+        self.not_before = not_before
+        self.earliest_start = self.earliest_finish = 0.0
+        self.latest_start = self.latest_finish = 0.0
+        self.total_float = self.free_float = 0.0
+
+    @property
+    def is_critical(self) -> bool:
+        return self.total_float <= EPSILON
+
+class Dependency(NamedTuple):
+    source: Any  # predecessor
+    target: Any  # successor
+    type: str  # FS, SS, FF or SF
+    lag: float  # working hours
+
+def _order(task_ids: Iterable[Any], incoming: Dict[Any, List[Dependency]]) -> List[Any]:
+    """Kahn's algorithm over the given tasks, counting only dependencies among them.
+
+    Raises ValueError if those dependencies contain a cycle.
+    """
+    task_ids = list(task_ids)
+    members = set(task_ids)
+    indegree = dict.fromkeys(task_ids, 0)
+    successors: Dict[Any, List[Any]] = {task_id: [] for task_id in task_ids}
+    for task_id in task_ids:
+        for dependency in incoming[task_id]:
+            if dependency.source in members:
+                successors[dependency.source].append(task_id)
+                indegree[task_id] += 1
+
+    ready = deque(task_id for task_id in task_ids if indegree[task_id] == 0)
+    order = []
+    while ready:
+        task_id = ready.popleft()
+        order.append(task_id)
+        for successor in successors[task_id]:
+            indegree[successor] -= 1
+            if indegree[successor] == 0:
+                ready.append(successor)
+    if len(order) != len(task_ids):
+        raise ValueError("Task dependencies contain a cycle")
+    return order
+
+def topological_order(task_ids: Iterable[Any], dependencies: List[Dependency]) -> List[Any]:
+    """Kahn's algorithm; raises ValueError if the dependencies contain a cycle"""
+    task_ids = list(task_ids)
+    incoming: Dict[Any, List[Dependency]] = {task_id: [] for task_id in task_ids}
+    for dependency in dependencies:
+        incoming[dependency.target].append(dependency)
+    return _order(task_ids, incoming)
+
+def _closure(start: Iterable[Any], neighbours: Dict[Any, List[Dependency]], attribute: str) -> Set[Any]:
+    seen = set(start)
+    stack = list(seen)
+    while stack:
+        for dependency in neighbours[stack.pop()]:
+            task_id = getattr(dependency, attribute)
+            if task_id not in seen:
+                seen.add(task_id)
+                stack.append(task_id)
+    return seen
+
+class ScheduleNetwork:
+    """A plan's dependency network with its CPM schedule.
+
+    compute() runs both passes over every task; apply_changes() patches a few
+    tasks and only recomputes what can be affected by them. Times are
+    working hours of the calendar, so durations and lags skip weekends
+    and holidays; the default calendar is plain wall-clock time.
+    """
+
+    def __init__(
+        self,
+        origin: datetime,
+        tasks: Dict[Any, ScheduleTask],
+        dependencies: List[Dependency],
+        calendar: WorkingCalendar = CONTINUOUS
+    ):
+        self.origin = origin
+        self.calendar = calendar
+        self.tasks = tasks
+        self.incoming: Dict[Any, List[Dependency]] = {task_id: [] for task_id in tasks}
+        self.outgoing: Dict[Any, List[Dependency]] = {task_id: [] for task_id in tasks}
+        for dependency in dependencies:
+            self._link(dependency)
+        self.project_finish = 0.0
+
+    def _link(self, dependency: Dependency) -> None:
+        self.outgoing[dependency.source].append(dependency)
+        self.incoming[dependency.target].append(dependency)
+
+    def _forward(self, order: List[Any]) -> None:
+        # Each dependency type bounds the successor's start
+        for task_id in order:
+            task = self.tasks[task_id]
+            start = task.not_before
+            for dependency in self.incoming[task_id]:
+                predecessor = self.tasks[dependency.source]
+                if dependency.type == "SS":
+                    bound = predecessor.earliest_start + dependency.lag
+                elif dependency.type == "FF":
+                    bound = predecessor.earliest_finish + dependency.lag - task.duration
+                elif dependency.type == "SF":
+                    bound = predecessor.earliest_start + dependency.lag - task.duration
+                else:
+                    bound = predecessor.earliest_finish + dependency.lag
+                if bound > start:
+                    start = bound
+            task.earliest_start = start
+            task.earliest_finish = start + task.duration
+
+    def _backward(self, reverse_order: Iterable[Any]) -> None:
+        # Each dependency type bounds the predecessor's finish
+        project_finish = self.project_finish
+        for task_id in reverse_order:
+            task = self.tasks[task_id]
+            finish = project_finish
+            free_float = project_finish - task.earliest_finish
+            for dependency in self.outgoing[task_id]:
+                successor = self.tasks[dependency.target]
+                if dependency.type == "SS":
+                    bound = successor.latest_start - dependency.lag + task.duration
+                    slack = successor.earliest_start - dependency.lag - task.earliest_start
+                elif dependency.type == "FF":
+                    bound = successor.latest_finish - dependency.lag
+                    slack = successor.earliest_finish - dependency.lag - task.earliest_finish
+                elif dependency.type == "SF":
+                    bound = successor.latest_finish - dependency.lag + task.duration
+                    slack = successor.earliest_finish - dependency.lag - task.earliest_start
+                else:
+                    bound = successor.latest_start - dependency.lag
+                    slack = successor.earliest_start - dependency.lag - task.earliest_finish
+                if bound < finish:
+                    finish = bound
+                if slack < free_float:
+                    free_float = slack
+            task.latest_finish = finish
+            task.latest_start = finish - task.duration
+            task.total_float = task.latest_start - task.earliest_start
+            task.free_float = max(free_float, 0.0)
+
+    def _finish(self) -> float:
+        return max((task.earliest_finish for task in self.tasks.values()), default=0.0)
+
+    def order(self) -> List[Any]:
+        return _order(self.tasks, self.incoming)
+
+    def compute(self) -> List[Any]:
+        """Schedule every task; returns the topological order. Runs in O(tasks + dependencies)."""
+        order = self.order()
+        self._forward(order)
+        self.project_finish = self._finish()
+        self._backward(reversed(order))
+        return order
+
+    def apply_changes(self, changed: Iterable[Any], tasks: Dict[Any, ScheduleTask], dependencies: List[Dependency]) -> int:
+        """Replace the changed tasks and their dependencies, then reschedule.
+
+        tasks holds the current version of every changed task that still
+        exists and dependencies every dependency touching a changed task.
+        The forward pass is rerun only downstream of the changes and the
+        backward pass only upstream of those, unless the project finish
+        moved. Returns the number of tasks rescheduled.
+        """
+        changed = set(changed)
+        # Neighbours of the old versions are affected too, e.g. successors of a removed task
+        seeds = set(changed)
+        for task_id in changed & self.tasks.keys():
+            seeds.update(dependency.target for dependency in self.outgoing[task_id])
+            seeds.update(dependency.source for dependency in self.incoming[task_id])
+
+        for task_id in changed & self.tasks.keys():
+            for dependency in self.outgoing.pop(task_id) + self.incoming.pop(task_id):
+                if dependency.target in self.incoming and dependency.target not in changed:
+                    self.incoming[dependency.target].remove(dependency)
+                if dependency.source in self.outgoing and dependency.source not in changed:
+                    self.outgoing[dependency.source].remove(dependency)
+            del self.tasks[task_id]
+        for task_id, task in tasks.items():
+            self.tasks[task_id] = task
+            self.incoming[task_id] = []
+            self.outgoing[task_id] = []
+        for dependency in dependencies:
+            if dependency.source in self.tasks and dependency.target in self.tasks:
+                self._link(dependency)
+
+        seeds &= self.tasks.keys()
+        forward = _closure(seeds, self.outgoing, "target")
+        self._forward(_order(forward, self.incoming))
+
+        project_finish = self._finish()
+        if project_finish != self.project_finish:
+            self.project_finish = project_finish
+            self._backward(reversed(self.order()))
+            return len(self.tasks)
+        backward = _closure(forward | seeds, self.incoming, "source")
+        self._backward(reversed(_order(backward, self.incoming)))
+        return len(backward)
+
+    def at(self, hours: float, finish: bool = False) -> datetime:
+        """Timestamp of a time in the network"""
+        return self.calendar.add_working_hours(self.origin, hours, finish)
+
+    def report(self) -> Dict[str, Any]:
+        tasks = self.tasks
+        at = self.at
+
+        # The id breaks ties, so the order does not depend on how the network was built
+        ordered = sorted(tasks.values(), key=lambda task: (task.earliest_start, task.earliest_finish, task.id))
+        project_start = ordered[0].earliest_start if ordered else 0.0
+        return {
+            "critical_path": [
+                {
+                    "subtask_id": str(task.id),
+                    "title": task.title,
+                    "start_date": at(task.earliest_start),
+                    "end_date": at(task.earliest_finish, finish=True),
+                    "duration_hours": task.duration,
+                }
+                for task in ordered if task.is_critical
+            ],
+            "total_duration": self.project_finish - project_start,
+            "project_start": at(project_start) if tasks else None,
+            "project_finish": at(self.project_finish, finish=True) if tasks else None,
+            "tasks": [
+                {
+                    "subtask_id": str(task.id),
+                    "title": task.title,
+                    "duration_hours": task.duration,
+                    "earliest_start": at(task.earliest_start),
+                    "earliest_finish": at(task.earliest_finish, finish=True),
+                    "latest_start": at(task.latest_start),
+                    "latest_finish": at(task.latest_finish, finish=True),
+                    "total_float_hours": task.total_float,
+                    "free_float_hours": task.free_float,
+                    "is_critical": task.is_critical,
+                }
+                for task in ordered
+            ],
+        }
+
+def compute_schedule(tasks: Dict[Any, ScheduleTask], dependencies: List[Dependency]) -> Tuple[List[Any], float]:
+    """Forward and backward CPM passes over the dependency network.
+
+    Fills in earliest/latest start and finish, total float and free float on
+    every task and returns the topological order and the project finish.
+    Runs in O(tasks + dependencies).
+    """
+    network = ScheduleNetwork(datetime.min, tasks, dependencies)
+    order = network.compute()
+    return order, network.project_finish
+
+def schedule_task_from_row(
+    task_id: Any,
+    title: Optional[str],
+    hours: Optional[float],
+    start_date: Optional[datetime],
+    origin: datetime,
+    calendar: WorkingCalendar = CONTINUOUS
+) -> ScheduleTask:
+    """A subtask row as a task of a ScheduleNetwork starting at origin"""
+    not_before = calendar.working_hours(origin, start_date) if start_date is not None else 0.0
+    return ScheduleTask(task_id, title, float(hours or 0), not_before)
+
+def dependency_from_row(
+    source: Any,
+    target: Any,
+    dependency_type: Optional[str],
+    lag_days: Optional[int],
+    calendar: WorkingCalendar = CONTINUOUS
+) -> Dependency:
+    """A task_dependencies row as a ScheduleNetwork dependency; lag_days are working days"""
+    return Dependency(source, target, DEPENDENCY_TYPES.get(dependency_type or "FS", "FS"), (lag_days or 0) * calendar.hours_per_day)
+
+def dependency_query(db: Session, release_plan_id: str):
+    """(source, target, type, lag_days) of the dependencies with both ends in the plan.
+
+    Dependencies that leave the plan do not constrain it.
+    """
+    source_task, target_task = aliased(Subtask), aliased(Subtask)
+    source_kit, target_kit = aliased(Kit), aliased(Kit)
+    return db.query(
+        TaskDependency.source_task_id, TaskDependency.target_task_id,
+        TaskDependency.dependency_type, TaskDependency.lag_days
+    ).join(source_task, source_task.id == TaskDependency.source_task_id).join(
+        source_kit, source_kit.id == source_task.kit_id
+    ).join(target_task, target_task.id == TaskDependency.target_task_id).join(
+        target_kit, target_kit.id == target_task.kit_id
+    ).filter(source_kit.release_plan_id == release_plan_id, target_kit.release_plan_id == release_plan_id)
+
+def plan_origin(plan_start: Optional[datetime], subtask_starts: Iterable[Optional[datetime]]) -> datetime:
+    """Schedule origin: the plan's start date, else its earliest subtask start, else now"""
+    if plan_start is not None:
+        return _naive(plan_start)
+    starts = [_naive(start) for start in subtask_starts if start is not None]
+    return min(starts) if starts else datetime.utcnow()
+
+def load_plan_network(db: Session, release_plan_id: str) -> ScheduleNetwork:
+    """Load every subtask and dependency of a plan with one query each.
+
+    Times are working hours of the company's calendar from the plan's start
+    date (or the earliest subtask start when the plan has none); subtask
+    start dates become "not before" constraints and subtasks without one
+    may start at the origin.
+    """
+    rows = db.query(
+        Subtask.id, Subtask.title, Subtask.estimated_hours, Subtask.start_date, ReleasePlan.start_date
+    ).join(Kit, Kit.id == Subtask.kit_id).join(ReleasePlan, ReleasePlan.id == Kit.release_plan_id).filter(
+        Kit.release_plan_id == release_plan_id
+    ).all()
+    dependency_rows = dependency_query(db, release_plan_id).all()
+    calendar = load_plan_calendar(db, release_plan_id)
+
+    origin = plan_origin(rows[0][4] if rows else None, [row[3] for row in rows])
+    tasks = {
+        task_id: schedule_task_from_row(task_id, title, hours, start_date, origin, calendar)
+        for task_id, title, hours, start_date, _ in rows
+    }
+    dependencies = [dependency_from_row(*row, calendar) for row in dependency_rows]
+    return ScheduleNetwork(origin, tasks, dependencies, calendar)
+
+def load_task_changes(
+    db: Session,
+    release_plan_id: str,
+    task_ids: Set[Any],
+    origin: datetime,
+    calendar: WorkingCalendar = CONTINUOUS
+) -> Tuple[Dict[Any, ScheduleTask], List[Dependency]]:
+    """Current versions of a few subtasks of a plan and every dependency touching them"""
+    if not task_ids:
+        return {}, []
+    rows = db.query(
+        Subtask.id, Subtask.title, Subtask.estimated_hours, Subtask.start_date
+    ).join(Kit, Kit.id == Subtask.kit_id).filter(
+        Kit.release_plan_id == release_plan_id, Subtask.id.in_(task_ids)
+    ).all()
+    dependency_rows = dependency_query(db, release_plan_id).filter(
+        or_(TaskDependency.source_task_id.in_(task_ids), TaskDependency.target_task_id.in_(task_ids))
+    ).all()
+    tasks = {row[0]: schedule_task_from_row(*row, origin, calendar) for row in rows}
+    return tasks, [dependency_from_row(*row, calendar) for row in dependency_rows]
+
+def _naive(value: datetime) -> datetime:
+    # Subtask dates are naive UTC while plan dates are timezone-aware
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
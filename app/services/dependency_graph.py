@@ -0,0 +1,92 @@
+from typing import Any, Dict, Hashable, Iterable, List, Set, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models.database import TaskDependency
+from app.services.critical_path import dependency_query
+
+class DependencyGraph:
+    """Adjacency index of a plan's dependencies; a source precedes its targets.
+
+    Edges are kept in both directions so upstream and downstream closures
+    are a plain graph walk, and a new edge is checked for cycles before it
+    is stored.
+    """
+
+    def __init__(self, edges: Iterable[Tuple[Hashable, Hashable]] = ()):
+        self.successors: Dict[Hashable, Set[Hashable]] = {}
+        self.predecessors: Dict[Hashable, Set[Hashable]] = {}
+        for source, target in edges:
+            self.add(source, target)
+
+    def add(self, source: Hashable, target: Hashable) -> None:
+        self.successors.setdefault(source, set()).add(target)
+        self.predecessors.setdefault(target, set()).add(source)
+
+    def remove(self, source: Hashable, target: Hashable) -> None:
+        self.successors.get(source, set()).discard(target)
+        self.predecessors.get(target, set()).discard(source)
+
+    def _discard(self, task_id: Hashable) -> None:
+        for target in self.successors.pop(task_id, ()):
+            self.predecessors[target].discard(task_id)
+        for source in self.predecessors.pop(task_id, ()):
+            self.successors[source].discard(task_id)
+
+    def replace_tasks(self, task_ids: Iterable[Hashable], edges: Iterable[Tuple[Hashable, Hashable]]) -> None:
+        """Drop every edge touching task_ids and add their current edges"""
+        for task_id in task_ids:
+            self._discard(task_id)
+        for source, target in edges:
+            self.add(source, target)
+
+    def _walk(self, start: Hashable, neighbours: Dict[Hashable, Set[Hashable]]) -> Set[Hashable]:
+        seen: Set[Hashable] = set()
+        stack = [start]
+        while stack:
+            for task_id in neighbours.get(stack.pop(), ()):
+                if task_id not in seen:
+                    seen.add(task_id)
+                    stack.append(task_id)
+        return seen
+
+    def upstream(self, task_id: Hashable) -> Set[Hashable]:
+        """Every task task_id transitively depends on"""
+        return self._walk(task_id, self.predecessors)
+
+    def downstream(self, task_id: Hashable) -> Set[Hashable]:
+        """Every task that transitively depends on task_id"""
+        return self._walk(task_id, self.successors)
+
+    def reaches(self, start: Hashable, goal: Hashable) -> bool:
+        """Depth-first search from start; O(V + E) at worst, usually far less"""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for task_id in self.successors.get(stack.pop(), ()):
+                if task_id == goal:
+                    return True
+                if task_id not in seen:
+                    seen.add(task_id)
+                    stack.append(task_id)
+        return False
+
+    def check_edge(self, source: Hashable, target: Hashable) -> None:
+        """Raise ValueError if adding source -> target would close a cycle"""
+        if source == target:
+            raise ValueError("A subtask cannot depend on itself")
+        if self.reaches(target, source):
+            raise ValueError(f"Dependency {source} -> {target} would create a cycle")
+
+def load_dependency_graph(db: Session, release_plan_id: str) -> DependencyGraph:
+    """Index every dependency of a plan with one query"""
+    rows = dependency_query(db, release_plan_id).all()
+    return DependencyGraph((row[0], row[1]) for row in rows)
+
+def load_dependency_edges(db: Session, release_plan_id: str, task_ids: Set[Any]) -> List[Tuple[Any, Any]]:
+    """Current edges of a plan touching any of task_ids"""
+    if not task_ids:
+        return []
+    rows = dependency_query(db, release_plan_id).filter(
+        or_(TaskDependency.source_task_id.in_(task_ids), TaskDependency.target_task_id.in_(task_ids))
+    ).all()
+    return [(row[0], row[1]) for row in rows]
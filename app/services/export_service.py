@@ -0,0 +1,313 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.models.database import Kit, ReleasePlan, ResourceAllocation, Row, Sheet, SheetColumn, Subtask
+from app.services.sheet_service import infer_type
+
+EXPORT_DATASETS = ("sheet_rows", "subtasks", "allocations")
+STATE_FILE = "_state.json"
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+SUBTASK_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("kit_id", pa.string()),
+    ("release_plan_id", pa.string()),
+    ("title", pa.string()),
+    ("type", pa.string()),
+    ("status", pa.string()),
+    ("priority", pa.string()),
+    ("estimated_hours", pa.float64()),
+    ("actual_hours", pa.float64()),
+    ("start_date", TIMESTAMP),
+    ("end_date", TIMESTAMP),
+    ("created_at", TIMESTAMP),
+    ("updated_at", TIMESTAMP),
+])
+
+ALLOCATION_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("subtask_id", pa.string()),
+    ("release_plan_id", pa.string()),
+    ("user_id", pa.string()),
+    ("allocation_percentage", pa.int32()),
+    ("start_date", TIMESTAMP),
+    ("end_date", TIMESTAMP),
+    ("created_at", TIMESTAMP),
+    ("updated_at", TIMESTAMP),
+])
+
+# Low-cardinality text columns that get Parquet dictionary encoding
+DICTIONARY_COLUMNS = {
+    "subtasks": ["kit_id", "release_plan_id", "type", "status", "priority"],
+    "allocations": ["subtask_id", "release_plan_id", "user_id"],
+}
+
+# Arrow type per column catalog type hint; objects, arrays and mixed columns are kept as JSON text
+_ROW_TYPES = {"string": pa.string(), "integer": pa.int64(), "number": pa.float64(), "boolean": pa.bool_()}
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Naive timestamps in this schema are written with utcnow()
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+def _load_state(export_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(export_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _save_state(export_dir: str, state: Dict[str, str]) -> None:
+    path = os.path.join(export_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def _since(state: Dict[str, str], dataset: str) -> Optional[datetime]:
+    """Start of the dataset's next incremental read: its watermark less the overlap window"""
+    value = state.get(dataset)
+    if not value:
+        return None
+    return datetime.fromisoformat(value) - timedelta(seconds=settings.EXPORT_OVERLAP_SECONDS)
+
+def _write_part(table: pa.Table, directory: str, run_id: str, dictionary_columns: List[str]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{run_id}.parquet")
+    pq.write_table(table, path + ".tmp", compression="zstd", use_dictionary=dictionary_columns)
+    os.replace(path + ".tmp", path)
+
+def _sheet_rows_table(rows: List[Tuple[Any, ...]], catalog: Dict[str, Optional[str]]) -> Tuple[pa.Table, List[str]]:
+    """Typed table for one sheet: bookkeeping columns plus one column per catalog column.
+
+    Columns are typed from the sheet's column catalog (name -> type hint, in
+    position order) rather than from the rows in this part, so the parts of a
+    sheet share one schema until a column's type hint widens (to 'mixed').
+    Empty values are written as null.
+    """
+    names = dict(catalog)
+    for _, _, _, _, data, _ in rows:
+        for name, value in (data or {}).items():
+            if name in catalog:
+                continue
+            # Keys the catalog does not know yet are typed from this part
+            value_type = infer_type(value)
+            previous = names.get(name)
+            if previous is None:
+                names[name] = value_type
+            elif value_type is not None and value_type != previous:
+                names[name] = "mixed"
+
+    columns = {
+        "_row_id": pa.array([row[2] for row in rows], pa.int64()),
+        "_row_number": pa.array([row[3] for row in rows], pa.int32()),
+        "_updated_at": pa.array([_utc(row[5]) for row in rows], TIMESTAMP),
+    }
+    dictionary_columns = []
+    for name, type_hint in names.items():
+        values = [(data or {}).get(name) for _, _, _, _, data, _ in rows]
+        values = [None if value == "" else value for value in values]
+        arrow_type = _ROW_TYPES.get(type_hint)
+        if arrow_type is None:
+            # Columns that are still empty are text, like the ones kept as JSON
+            if type_hint is not None:
+                values = [None if value is None else json.dumps(value) for value in values]
+            arrow_type = pa.string()
+        if arrow_type == pa.string():
+            dictionary_columns.append(name)
+        columns[name] = pa.array(values, arrow_type)
+    return pa.table(columns), dictionary_columns
+
+def _export_sheet_rows(db: Session, export_dir: str, run_id: str, since: Optional[datetime]) -> Tuple[int, Optional[datetime]]:
+    changed_at = func.coalesce(Row.updated_at, Row.created_at)
+    query = db.query(
+        Sheet.company_id, Row.sheet_id, Row.id, Row.row_number, Row.data, changed_at
+    ).join(Sheet, Sheet.id == Row.sheet_id)
+    if since is not None:
+        query = query.filter(changed_at >= since)
+    query = query.order_by(Sheet.company_id, Row.sheet_id, Row.row_number)
+
+    count, watermark = 0, None
+    # One sheet is materialised at a time; every sheet gets its own typed file
+    for (company_id, sheet_id), group in groupby(
+        query.yield_per(settings.EXPORT_BATCH_SIZE), key=lambda row: (row[0], row[1])
+    ):
+        rows = list(group)
+        catalog = dict(db.query(SheetColumn.name, SheetColumn.type_hint).filter(
+            SheetColumn.sheet_id == sheet_id
+        ).order_by(SheetColumn.position).all())
+        table, dictionary_columns = _sheet_rows_table(rows, catalog)
+        directory = os.path.join(export_dir, "sheet_rows", f"company_id={company_id}", f"sheet_id={sheet_id}")
+        _write_part(table, directory, run_id, dictionary_columns)
+        count += len(rows)
+        latest = max(row[5] for row in rows)
+        watermark = latest if watermark is None else max(watermark, latest)
+    return count, watermark
+
+def _export_table(
+    dataset: str,
+    records: Iterable[Tuple[Any, Dict[str, Any]]],
+    schema: pa.Schema,
+    export_dir: str,
+    run_id: str
+) -> int:
+    """Write (company_id, record) pairs, already ordered by company, one part file per company"""
+    count = 0
+    for company_id, group in groupby(records, key=lambda item: item[0]):
+        batch = [record for _, record in group]
+        table = pa.Table.from_pylist(batch, schema=schema)
+        _write_part(
+            table, os.path.join(export_dir, dataset, f"company_id={company_id}"), run_id,
+            DICTIONARY_COLUMNS[dataset]
+        )
+        count += len(batch)
+    return count
+
+def _export_subtasks(db: Session, export_dir: str, run_id: str, since: Optional[datetime]) -> Tuple[int, Optional[datetime]]:
+    query = db.query(Subtask, Kit.release_plan_id, ReleasePlan.company_id).join(
+        Kit, Kit.id == Subtask.kit_id
+    ).join(ReleasePlan, ReleasePlan.id == Kit.release_plan_id)
+    if since is not None:
+        query = query.filter(Subtask.updated_at >= since)
+    query = query.order_by(ReleasePlan.company_id, Subtask.id)
+
+    watermark = None
+
+    def records():
+        nonlocal watermark
+        for subtask, release_plan_id, company_id in query.yield_per(settings.EXPORT_BATCH_SIZE):
+            if subtask.updated_at is not None and (watermark is None or subtask.updated_at > watermark):
+                watermark = subtask.updated_at
+            yield company_id, {
+                "id": subtask.id,
+                "kit_id": _text(subtask.kit_id),
+                "release_plan_id": _text(release_plan_id),
+                "title": subtask.title,
+                "type": subtask.type,
+                "status": subtask.status,
+                "priority": subtask.priority,
+                "estimated_hours": subtask.estimated_hours,
+                "actual_hours": subtask.actual_hours,
+                "start_date": _utc(subtask.start_date),
+                "end_date": _utc(subtask.end_date),
+                "created_at": _utc(subtask.created_at),
+                "updated_at": _utc(subtask.updated_at),
+            }
+
+    count = _export_table("subtasks", records(), SUBTASK_SCHEMA, export_dir, run_id)
+    return count, watermark
+
+def _export_allocations(db: Session, export_dir: str, run_id: str, since: Optional[datetime]) -> Tuple[int, Optional[datetime]]:
+    changed_at = func.coalesce(ResourceAllocation.updated_at, ResourceAllocation.created_at)
+    query = db.query(ResourceAllocation, Kit.release_plan_id, ReleasePlan.company_id, changed_at).join(
+        Subtask, Subtask.id == ResourceAllocation.subtask_id
+    ).join(Kit, Kit.id == Subtask.kit_id).join(ReleasePlan, ReleasePlan.id == Kit.release_plan_id)
+    if since is not None:
+        query = query.filter(changed_at >= since)
+    query = query.order_by(ReleasePlan.company_id, ResourceAllocation.id)
+
+    watermark = None
+
+    def records():
+        nonlocal watermark
+        for allocation, release_plan_id, company_id, changed in query.yield_per(settings.EXPORT_BATCH_SIZE):
+            if changed is not None and (watermark is None or changed > watermark):
+                watermark = changed
+            yield company_id, {
+                "id": _text(allocation.id),
+                "subtask_id": _text(allocation.subtask_id),
+                "release_plan_id": _text(release_plan_id),
+                "user_id": allocation.user_id,
+                "allocation_percentage": allocation.allocation_percentage,
+                "start_date": _utc(allocation.start_date),
+                "end_date": _utc(allocation.end_date),
+                "created_at": _utc(allocation.created_at),
+                "updated_at": _utc(allocation.updated_at),
+            }
+
+    count = _export_table("allocations", records(), ALLOCATION_SCHEMA, export_dir, run_id)
+    return count, watermark
+
+def run_export(db: Session, export_dir: str = settings.EXPORT_DIR, full: bool = False) -> Dict[str, Any]:
+    """Export rows changed since the previous run to Parquet, partitioned by company.
+
+    Each run adds a part-<run id>.parquet file per partition, so a record that
+    changed several times appears in several parts; readers keep the copy with
+    the latest updated_at. Runs also re-read the EXPORT_OVERLAP_SECONDS before
+    the stored watermark, so a transaction that committed after the previous
+    run with an earlier timestamp, or a record sharing the watermark's
+    timestamp, is not lost; such records are exported again with the same
+    updated_at and readers keep any one copy. Deletes are not exported.
+    full=True ignores the stored watermarks and exports everything again.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    state = {} if full else _load_state(export_dir)
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    exporters = {
+        "sheet_rows": _export_sheet_rows,
+        "subtasks": _export_subtasks,
+        "allocations": _export_allocations,
+    }
+
+    counts = {}
+    for dataset, exporter in exporters.items():
+        previous = state.get(dataset)
+        counts[dataset], watermark = exporter(db, export_dir, run_id, _since(state, dataset))
+        # The overlap re-reads records below the stored watermark; it never moves back
+        if watermark is not None and (previous is None or watermark > datetime.fromisoformat(previous)):
+            state[dataset] = watermark.isoformat()
+    _save_state(export_dir, state)
+    return {"run_id": run_id, "counts": counts, "watermarks": state}
+
+def list_export_files(export_dir: str = settings.EXPORT_DIR, dataset: Optional[str] = None) -> List[Dict[str, Any]]:
+    files = []
+    for name in ([dataset] if dataset else EXPORT_DATASETS):
+        root = os.path.join(export_dir, name)
+        for directory, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if not filename.endswith(".parquet"):
+                    continue
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                files.append({
+                    "dataset": name,
+                    "path": os.path.relpath(path, export_dir),
+                    "size": stat.st_size,
+                    "modified_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                })
+    return sorted(files, key=lambda item: item["path"])
+
+def resolve_export_file(path: str, export_dir: str = settings.EXPORT_DIR) -> Optional[str]:
+    """Absolute path of an exported Parquet file, or None if path escapes the export directory"""
+    root = os.path.realpath(export_dir)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep) or not full_path.endswith(".parquet"):
+        return None
+    return full_path if os.path.isfile(full_path) else None
+
+def parquet_to_arrow_stream(path: str) -> bytes:
+    table = pq.read_table(path)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(json.dumps(run_export(session), indent=2))
+    finally:
+        session.close()
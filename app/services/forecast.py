@@ -0,0 +1,270 @@
+from datetime import datetime
+from functools import lru_cache
+from statistics import NormalDist
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.database import Kit, ReleasePlan, ReleasePlanMilestone, ReleasePlanSheet, Subtask, SubtaskStatus
+from app.services.critical_path import ScheduleNetwork
+from app.services.working_calendar import CONTINUOUS, WorkingCalendar
+
+PERCENTILES = (50, 80, 95)
+# Duration ratios are drawn from this many quantiles, indexed by uint16
+QUANTILES = 65536
+# Float32 start/finish matrix budget per chunk of trials
+CHUNK_BYTES = 32 * 1024 * 1024
+
+class Calibration(NamedTuple):
+    """Lognormal model of actual_hours / estimated_hours"""
+    mu: float
+    sigma: float
+    samples: int
+
+    @property
+    def median_ratio(self) -> float:
+        return float(np.exp(self.mu))
+
+    def quantiles(self) -> np.ndarray:
+        """QUANTILES evenly spaced quantiles of the ratio; uniform picks from them are lognormal draws"""
+        return np.exp(self.mu + self.sigma * _normal_quantiles()).astype(np.float32)
+
+@lru_cache(maxsize=1)
+def _normal_quantiles() -> np.ndarray:
+    normal = NormalDist()
+    return np.array([normal.inv_cdf((i + 0.5) / QUANTILES) for i in range(QUANTILES)], dtype=np.float64)
+
+def calibrate(ratios: Sequence[float], min_samples: int, default_sigma: float) -> Calibration:
+    """Fit log(actual / estimated) of finished work; too little history means unbiased estimates with default_sigma"""
+    logs = np.log(np.asarray([ratio for ratio in ratios if ratio and ratio > 0], dtype=np.float64))
+    if logs.size < max(min_samples, 2):
+        return Calibration(0.0, default_sigma, int(logs.size))
+    return Calibration(float(logs.mean()), float(logs.std(ddof=1)), int(logs.size))
+
+class ForecastNetwork:
+    """A plan's dependency network compiled into arrays for simulation.
+
+    Tasks are renumbered level by level (a task's level is one more than
+    its deepest predecessor's), so every level is a contiguous slice whose
+    predecessors are all in earlier ones. A batch of trials then takes a
+    handful of NumPy operations per level and dependency round instead of
+    per task, each over every trial at once.
+    """
+
+    def __init__(self, network: ScheduleNetwork, fixed_hours: Dict[Any, float]):
+        order = network.order()
+        level: Dict[Any, int] = {}
+        for task_id in order:
+            level[task_id] = 1 + max((level[dependency.source] for dependency in network.incoming[task_id]), default=-1)
+        self.task_ids = sorted(order, key=level.__getitem__)
+        index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        n = len(self.task_ids)
+        self.origin = network.origin
+        self.calendar = network.calendar
+        self.not_before = np.array([network.tasks[task_id].not_before for task_id in self.task_ids], dtype=np.float32)
+        self.estimate = np.array([network.tasks[task_id].duration for task_id in self.task_ids], dtype=np.float32)
+        # Finished work takes what it took; everything else is sampled
+        self.fixed = np.array([task_id in fixed_hours for task_id in self.task_ids], dtype=bool)
+        self.estimate[self.fixed] = [fixed_hours[task_id] for task_id in self.task_ids if task_id in fixed_hours]
+
+        levels = [level[task_id] for task_id in self.task_ids]
+        self.level_bounds = np.searchsorted(levels, np.arange(max(levels, default=-1) + 2)) if n else np.zeros(1, dtype=np.int64)
+
+        # Incoming dependencies of each level in rounds: round k holds the
+        # k-th dependency of every task that has one, so targets within a
+        # round are distinct and a plain gather / maximum / scatter applies
+        self.rounds: List[List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]]] = []
+        for lo, hi in zip(self.level_bounds[:-1], self.level_bounds[1:]):
+            rounds: List[List[Tuple[int, int, float, bool]]] = []
+            for target in range(lo, hi):
+                for k, dependency in enumerate(network.incoming[self.task_ids[target]]):
+                    if k == len(rounds):
+                        rounds.append([])
+                    # Predecessor row in the times matrix: its start (SS, SF) or finish (FS, FF);
+                    # FF and SF bound the successor's finish, so its duration is taken off
+                    row = index[dependency.source] + (n if dependency.type in ("FS", "FF") else 0)
+                    rounds[k].append((target, row, dependency.lag, dependency.type in ("FF", "SF")))
+            self.rounds.append([self._round(edges) for edges in rounds])
+
+    @staticmethod
+    def _round(edges: List[Tuple[int, int, float, bool]]) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        targets = np.array([edge[0] for edge in edges], dtype=np.int64)
+        rows = np.array([edge[1] for edge in edges], dtype=np.int64)
+        lags = np.array([edge[2] for edge in edges], dtype=np.float32)
+        minus = np.array([edge[3] for edge in edges], dtype=np.float32)
+        # Most dependencies are plain finish-to-start without lag; skip what does not apply
+        return targets, rows, lags[:, None] if lags.any() else None, minus[:, None] if minus.any() else None
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def durations(self, ratios: np.ndarray, trials: int, rng: np.random.Generator) -> np.ndarray:
+        """Tasks x trials sampled durations in hours, drawing from a table of ratio quantiles"""
+        durations = ratios[rng.integers(0, len(ratios), size=(len(self), trials), dtype=np.uint16)]
+        durations[self.fixed] = 1.0
+        durations *= self.estimate[:, None]
+        return durations
+
+    def finish_times(self, durations: np.ndarray) -> np.ndarray:
+        """Earliest finish of every task in every trial (hours from origin), one forward pass"""
+        n, trials = durations.shape
+        times = np.empty((2 * n, trials), dtype=np.float32)
+        start, finish = times[:n], times[n:]
+        for (lo, hi), rounds in zip(zip(self.level_bounds[:-1], self.level_bounds[1:]), self.rounds):
+            start[lo:hi] = self.not_before[lo:hi, None]
+            for targets, rows, lags, minus in rounds:
+                bounds = times[rows]
+                if lags is not None:
+                    bounds += lags
+                if minus is not None:
+                    bounds -= durations[targets] * minus
+                np.maximum(bounds, start[targets], out=bounds)
+                start[targets] = bounds
+            np.add(start[lo:hi], durations[lo:hi], out=finish[lo:hi])
+        return finish
+
+def simulate(
+    network: ForecastNetwork,
+    groups: Dict[Any, np.ndarray],
+    calibration: Calibration,
+    trials: int,
+    seed: Optional[int] = None
+) -> Dict[Any, np.ndarray]:
+    """Completion time per trial of each group of task indexes.
+
+    Trials run in chunks that keep the times matrix within CHUNK_BYTES.
+    """
+    rng = np.random.default_rng(seed)
+    ratios = calibration.quantiles()
+    results: Dict[Any, List[np.ndarray]] = {key: [] for key in groups}
+    chunk = max(1, CHUNK_BYTES // max(1, 3 * len(network) * 4))
+    for done in range(0, trials, chunk):
+        size = min(chunk, trials - done)
+        finish = network.finish_times(network.durations(ratios, size, rng))
+        for key, members in groups.items():
+            if not members.size:
+                results[key].append(np.zeros(size, dtype=np.float32))
+            else:
+                # Members are distinct, so a group of every task needs no gather
+                results[key].append((finish if members.size == len(network) else finish[members]).max(axis=0))
+    return {key: np.concatenate(parts) for key, parts in results.items()}
+
+def summarize(
+    completion: np.ndarray,
+    origin: datetime,
+    percentiles: Sequence[int],
+    deadline: Optional[datetime] = None,
+    calendar: WorkingCalendar = CONTINUOUS
+) -> Dict[str, Any]:
+    """Completion dates at the given percentiles, and the chance of meeting a deadline.
+
+    completion is in working hours of calendar from origin.
+    """
+    values = np.percentile(completion, percentiles)
+    summary: Dict[str, Any] = {
+        f"p{percentile}": calendar.add_working_hours(origin, float(value), finish=True)
+        for percentile, value in zip(percentiles, values)
+    }
+    if deadline is not None:
+        hours = calendar.working_hours(origin, deadline)
+        summary["on_time_probability"] = float((completion <= hours).mean())
+    return summary
+
+def load_duration_ratios(db: Session, company_id: Optional[int], limit: int) -> List[float]:
+    """actual / estimated hours of the company's most recently finished subtasks"""
+    query = db.query(Subtask.actual_hours, Subtask.estimated_hours).join(Kit, Kit.id == Subtask.kit_id).join(
+        ReleasePlan, ReleasePlan.id == Kit.release_plan_id
+    ).filter(
+        Subtask.status == SubtaskStatus.DONE.value,
+        Subtask.estimated_hours > 0,
+        Subtask.actual_hours > 0
+    )
+    if company_id is not None:
+        query = query.filter(ReleasePlan.company_id == company_id)
+    rows = query.order_by(Subtask.updated_at.desc()).limit(limit).all()
+    return [actual / estimated for actual, estimated in rows]
+
+class ForecastInputs(NamedTuple):
+    network: ForecastNetwork
+    # Task indexes whose last finish completes the plan, each kit and each milestone
+    groups: Dict[Any, np.ndarray]
+    kits: List[Any]
+    milestones: List[Any]
+    plan_end: Optional[datetime]
+    company_id: Optional[int]
+
+def load_forecast_inputs(db: Session, release_plan_id: str, network: ScheduleNetwork) -> ForecastInputs:
+    """Compile a scheduled network and load what the forecast reports on.
+
+    A milestone covers the subtasks planned to finish by its date: by their
+    end date, or by their scheduled earliest finish when they have none.
+    """
+    plan = db.query(ReleasePlan.company_id, ReleasePlan.end_date).filter(ReleasePlan.id == release_plan_id).first()
+    subtasks = db.query(
+        Subtask.id, Subtask.kit_id, Subtask.status, Subtask.estimated_hours, Subtask.actual_hours, Subtask.end_date
+    ).join(Kit, Kit.id == Subtask.kit_id).filter(Kit.release_plan_id == release_plan_id).all()
+    kits = db.query(Kit.id, Kit.name, Kit.end_date).filter(Kit.release_plan_id == release_plan_id).order_by(Kit.name).all()
+    milestones = db.query(
+        ReleasePlanMilestone.id, ReleasePlanMilestone.name, ReleasePlanMilestone.date
+    ).join(ReleasePlanSheet, ReleasePlanSheet.id == ReleasePlanMilestone.sheet_id).filter(
+        ReleasePlanSheet.release_plan_id == release_plan_id, ReleasePlanMilestone.date.isnot(None)
+    ).order_by(ReleasePlanMilestone.date).all()
+
+    fixed = {
+        task_id: float(actual if actual is not None else estimated or 0)
+        for task_id, _, status, estimated, actual, _ in subtasks
+        if status == SubtaskStatus.DONE.value and task_id in network.tasks
+    }
+    compiled = ForecastNetwork(network, fixed)
+    index = {task_id: i for i, task_id in enumerate(compiled.task_ids)}
+    members: Dict[Any, List[int]] = {kit_id: [] for kit_id, _, _ in kits}
+    planned = np.empty(len(compiled), dtype=np.float64)
+    for task_id, kit_id, _, _, _, end_date in subtasks:
+        if task_id not in index:
+            continue
+        members.setdefault(kit_id, []).append(index[task_id])
+        task = network.tasks[task_id]
+        planned[index[task_id]] = (
+            network.calendar.working_hours(network.origin, end_date) if end_date is not None else task.earliest_finish
+        )
+
+    groups: Dict[Any, np.ndarray] = {"plan": np.arange(len(compiled))}
+    for kit_id, _, _ in kits:
+        groups[("kit", kit_id)] = np.array(members[kit_id], dtype=np.int64)
+    for milestone_id, _, when in milestones:
+        hours = network.calendar.working_hours(network.origin, when)
+        groups[("milestone", milestone_id)] = np.flatnonzero(planned <= hours)
+    return ForecastInputs(compiled, groups, kits, milestones, plan[1] if plan else None, plan[0] if plan else None)
+
+def forecast(
+    inputs: ForecastInputs,
+    calibration: Calibration,
+    trials: int,
+    seed: Optional[int] = None,
+    percentiles: Sequence[int] = PERCENTILES
+) -> Dict[str, Any]:
+    """Completion date percentiles of the plan, its kits and its milestones"""
+    network = inputs.network
+    completion = simulate(network, inputs.groups, calibration, trials, seed)
+
+    def summary(key: Any, deadline: Optional[datetime]) -> Optional[Dict[str, Any]]:
+        if not inputs.groups[key].size:
+            return None
+        return summarize(completion[key], network.origin, percentiles, deadline, network.calendar)
+
+    return {
+        "trials": trials,
+        "calibration": {
+            "samples": calibration.samples,
+            "median_ratio": calibration.median_ratio,
+            "sigma": calibration.sigma,
+        },
+        "plan": summary("plan", inputs.plan_end),
+        "kits": [
+            {"kit_id": kit_id, "name": name, "forecast": summary(("kit", kit_id), end_date)}
+            for kit_id, name, end_date in inputs.kits
+        ],
+        "milestones": [
+            {"milestone_id": milestone_id, "name": name, "date": when, "forecast": summary(("milestone", milestone_id), when)}
+            for milestone_id, name, when in inputs.milestones
+        ],
+    }
@@ -0,0 +1,203 @@
+from bisect import bisect_right
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.database import Kit, ReleasePlan, ReleasePlanMilestone, ReleasePlanSheet, Subtask, SubtaskStatus
+from app.services.critical_path import dependency_query
+from app.services.resource_load import period_bounds
+
+# GanttConfig.view_mode -> period granularity
+VIEW_MODES = {"day": "daily", "week": "weekly", "month": "monthly", "quarter": "quarterly", "year": "yearly"}
+
+def _day_number(value: Any) -> float:
+    """Date ordinal with the time of day as a fraction, in UTC"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        midnight = datetime(value.year, value.month, value.day)
+        return value.toordinal() + (value - midnight).total_seconds() / 86400
+    return float(value.toordinal())
+
+def _label(day: date, view_mode: str) -> str:
+    if view_mode == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if view_mode == "month":
+        return f"{day.year}-{day.month:02d}"
+    if view_mode == "quarter":
+        return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+    if view_mode == "year":
+        return str(day.year)
+    return day.isoformat()
+
+class GanttScale:
+    """Maps timestamps to x positions measured in columns of the view mode.
+
+    Column i spans [i, i + 1); a time inside it lands at i plus the fraction
+    of the column that has passed, so partial first and last columns and
+    months of different lengths are all drawn to scale.
+    """
+
+    def __init__(self, start: date, end: date, view_mode: str):
+        self.periods = period_bounds(start, end, VIEW_MODES[view_mode])
+        self.starts = [since for since, _ in self.periods]
+        self.columns = [
+            {"start": date.fromordinal(since), "end": date.fromordinal(until - 1), "label": _label(date.fromordinal(since), view_mode)}
+            for since, until in self.periods
+        ]
+
+    def x(self, value: Any) -> float:
+        day = _day_number(value)
+        if not self.periods or day <= self.periods[0][0]:
+            return 0.0
+        if day >= self.periods[-1][1]:
+            return float(len(self.periods))
+        index = bisect_right(self.starts, day) - 1
+        since, until = self.periods[index]
+        return index + (day - since) / (until - since)
+
+    def bar(self, start: Any, end: Any) -> Optional[Tuple[float, float]]:
+        """Clipped (x0, x1) of a bar, or None if it lies outside the chart"""
+        if start is None or end is None:
+            return None
+        x0, x1 = self.x(start), self.x(end)
+        if x1 <= 0 or x0 >= len(self.periods) or x1 < x0:
+            return None
+        return x0, x1
+
+def load_gantt_data(db: Session, release_plan_id: str) -> Optional[Dict[str, Any]]:
+    """Everything a plan's Gantt chart needs, one query per table"""
+    plan = db.query(ReleasePlan.start_date, ReleasePlan.end_date).filter(ReleasePlan.id == release_plan_id).first()
+    if plan is None:
+        return None
+    sheet = db.query(
+        ReleasePlanSheet.id, ReleasePlanSheet.gantt_config, ReleasePlanSheet.visualization_settings
+    ).filter(ReleasePlanSheet.release_plan_id == release_plan_id).first()
+    kits = db.query(
+        Kit.id, Kit.name, Kit.owner, Kit.status, Kit.start_date, Kit.end_date, Kit.progress_percentage
+    ).filter(Kit.release_plan_id == release_plan_id).order_by(Kit.start_date, Kit.name).all()
+    subtasks = db.query(
+        Subtask.id, Subtask.kit_id, Subtask.title, Subtask.owner, Subtask.type, Subtask.status,
+        Subtask.start_date, Subtask.end_date, Subtask.estimated_hours, Subtask.actual_hours
+    ).join(Kit, Kit.id == Subtask.kit_id).filter(Kit.release_plan_id == release_plan_id).order_by(
+        Subtask.start_date, Subtask.id
+    ).all()
+    milestones = db.query(
+        ReleasePlanMilestone.id, ReleasePlanMilestone.name, ReleasePlanMilestone.date,
+        ReleasePlanMilestone.type, ReleasePlanMilestone.color
+    ).filter(ReleasePlanMilestone.sheet_id == sheet[0]).order_by(ReleasePlanMilestone.date).all() if sheet else []
+    dependencies = dependency_query(db, release_plan_id).all()
+    return {
+        "plan": plan,
+        "gantt_config": (sheet[1] if sheet else None) or {},
+        "visualization_settings": (sheet[2] if sheet else None) or {},
+        "kits": kits,
+        "subtasks": subtasks,
+        "milestones": milestones,
+        "dependencies": dependencies,
+    }
+
+def _subtask_progress(status: Any, estimated: Optional[float], actual: Optional[float]) -> int:
+    if status == SubtaskStatus.DONE.value:
+        return 100
+    if not estimated:
+        return 0
+    # Not done yet, so never shown as complete
+    return min(int((actual or 0) * 100 / estimated), 99)
+
+def _value(status: Any) -> Any:
+    return getattr(status, "value", status)
+
+def build_gantt(data: Dict[str, Any], critical_path: Dict[str, Any]) -> Dict[str, Any]:
+    """Ready-to-draw bars for every kit and subtask in one pass over the loaded rows.
+
+    Subtasks without dates are drawn at their scheduled (CPM) earliest
+    start and finish; kits without dates span their subtasks.
+    """
+    config, visualization = data["gantt_config"], data["visualization_settings"]
+    plan_start, plan_end = data["plan"]
+    view_mode = config.get("view_mode") or "month"
+    if view_mode not in VIEW_MODES:
+        raise ValueError(f"Unknown Gantt view mode: {view_mode}")
+    start = datetime.fromisoformat(config["start_date"]) if config.get("start_date") else plan_start
+    end = datetime.fromisoformat(config["end_date"]) if config.get("end_date") else plan_end
+    if start is None or end is None:
+        raise ValueError("The Gantt chart needs a start and end date")
+    start_day, end_day = date.fromordinal(int(_day_number(start))), date.fromordinal(int(_day_number(end)))
+    scale = GanttScale(start_day, end_day, view_mode)
+    colors = config.get("custom_colors") or visualization.get("custom_colors") or {}
+    show_progress = config.get("show_progress", True)
+    show_critical = visualization.get("show_critical_path", True)
+    scheduled = {task["subtask_id"]: task for task in critical_path.get("tasks", [])}
+
+    bars_by_kit: Dict[Any, List[Dict[str, Any]]] = {}
+    spans: Dict[Any, List[Any]] = {}
+    for task_id, kit_id, title, owner, task_type, status, task_start, task_end, estimated, actual in data["subtasks"]:
+        schedule = scheduled.get(str(task_id))
+        if (task_start is None or task_end is None) and schedule is not None:
+            task_start = task_start or schedule["earliest_start"]
+            task_end = task_end or schedule["earliest_finish"]
+        if task_start is not None and task_end is not None:
+            span = spans.setdefault(kit_id, [task_start, task_end])
+            span[0] = min(span[0], task_start, key=_day_number)
+            span[1] = max(span[1], task_end, key=_day_number)
+        bar = scale.bar(task_start, task_end)
+        status = _value(status)
+        bars_by_kit.setdefault(kit_id, []).append({
+            "id": task_id,
+            "title": title,
+            "owner": owner,
+            "type": task_type,
+            "status": status,
+            "start": task_start,
+            "end": task_end,
+            "x0": bar[0] if bar else None,
+            "x1": bar[1] if bar else None,
+            "progress": _subtask_progress(status, estimated, actual) if show_progress else None,
+            "critical": bool(show_critical and schedule is not None and schedule["is_critical"]),
+            "color": colors.get(status) or colors.get(task_type),
+        })
+
+    kits = []
+    for kit_id, name, owner, status, kit_start, kit_end, progress in data["kits"]:
+        subtasks = bars_by_kit.get(kit_id, [])
+        span = spans.get(kit_id, [None, None])
+        kit_start, kit_end = kit_start or span[0], kit_end or span[1]
+        bar = scale.bar(kit_start, kit_end)
+        status = _value(status)
+        kits.append({
+            "id": kit_id,
+            "name": name,
+            "owner": owner,
+            "status": status,
+            "start": kit_start,
+            "end": kit_end,
+            "x0": bar[0] if bar else None,
+            "x1": bar[1] if bar else None,
+            "progress": (progress or 0) if show_progress else None,
+            "critical": any(subtask["critical"] for subtask in subtasks),
+            "color": colors.get(status),
+            "subtasks": subtasks,
+        })
+
+    gantt = {
+        "view_mode": view_mode,
+        "start": start_day,
+        "end": end_day,
+        "columns": scale.columns,
+        "kits": kits,
+        "dependencies": [],
+        "milestones": [],
+    }
+    if config.get("show_dependencies", True) and visualization.get("show_task_dependencies", True):
+        gantt["dependencies"] = [
+            {"source": source, "target": target, "type": dependency_type, "lag_days": lag_days or 0}
+            for source, target, dependency_type, lag_days in data["dependencies"]
+        ]
+    if config.get("show_milestones", True) and visualization.get("show_milestones", True):
+        gantt["milestones"] = [
+            {"id": milestone_id, "name": name, "date": when, "type": milestone_type, "color": color, "x": scale.x(when)}
+            for milestone_id, name, when, milestone_type, color in data["milestones"]
+            if when is not None
+        ]
+    return gantt
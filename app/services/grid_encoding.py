@@ -0,0 +1,49 @@
+import array
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+import msgpack
+
+GRID_MEDIA_TYPE = "application/msgpack"
+GRID_FORMAT_VERSION = 1
+
+def window_rows(data: List[List[Any]], start: int = 0, limit: Optional[int] = None) -> Tuple[List[Any], List[List[Any]], int]:
+    """Split a sheet grid into its header row and the requested window of data rows"""
+    headers = data[0] if data else []
+    body = data[1:]
+    end = None if limit is None else start + limit
+    return headers, body[start:end], len(body)
+
+def _encode_column(values: List[Any]) -> Dict[str, Any]:
+    # Low-cardinality columns (Status, Priority, ...) become a dictionary plus
+    # one uint8/uint16 code per row; everything else is sent as plain values.
+    dictionary: Dict[Any, int] = {}
+    try:
+        codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    except TypeError:
+        return {"values": values}
+    if len(dictionary) * 2 > len(values) or len(dictionary) > 0xFFFF:
+        return {"values": values}
+
+    packed = array.array("B" if len(dictionary) <= 0x100 else "H", codes)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return {"dictionary": list(dictionary), "codes": packed.tobytes(), "width": packed.itemsize}
+
+def encode_grid(headers: List[Any], rows: List[List[Any]], start: int, total_rows: int) -> bytes:
+    """Encode a window of sheet rows as a columnar MessagePack document.
+
+    Codes are little-endian so the browser can view them as a typed array directly.
+    """
+    width = len(headers)
+    columns = [
+        _encode_column([row[index] if index < len(row) else "" for row in rows])
+        for index in range(width)
+    ]
+    return msgpack.packb({
+        "version": GRID_FORMAT_VERSION,
+        "headers": headers,
+        "start": start,
+        "count": len(rows),
+        "total_rows": total_rows,
+        "columns": columns,
+    }, use_bin_type=True)
@@ -0,0 +1,274 @@
+import heapq
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.database import Kit, ResourceAllocation, Subtask
+from app.services.critical_path import DEPENDENCY_TYPES, dependency_query
+from app.services.resource_load import utc_day
+from app.services.working_calendar import WorkingCalendar
+PRIORITY_RANKS = {"high": 0, "medium": 1, "low": 2}
+# Work that has started or finished keeps its dates
+PINNED_STATUSES = {"in progress", "in_progress", "done"}
+
+class LevelAllocation(NamedTuple):
+    user_id: str
+    offset: int  # days from the task start
+    length: int  # days
+    percentage: int
+
+class LevelDependency(NamedTuple):
+    source: Any  # predecessor
+    target: Any  # successor
+    type: str  # FS, SS, FF or SF
+    lag: int  # working days
+
+class LevelTask:
+    """A subtask as working days; start is a WorkingCalendar.day_index"""
+
+    __slots__ = ("id", "title", "start", "duration", "rank", "pinned", "allocations", "new_start")
+
+    def __init__(self, id: Any, title: Optional[str], start: int, duration: int, rank: int = 1, pinned: bool = False):
+        self.id = id
+        self.title = title
+        self.start = start
+        self.duration = duration
+        self.rank = rank
+        self.pinned = pinned
+        self.allocations: List[LevelAllocation] = []
+        self.new_start = start
+
+class _Profile:
+    """Booked percentage per user and day, grown on demand"""
+
+    def __init__(self, origin: int):
+        self.origin = origin
+        self.days: Dict[str, np.ndarray] = {}
+
+    def view(self, user_id: str, since: int, until: int) -> np.ndarray:
+        since, until = since - self.origin, until - self.origin
+        days = self.days.get(user_id)
+        if days is None or until > len(days):
+            grown = np.zeros(max(until, 2 * len(days) if days is not None else 64), dtype=np.int32)
+            if days is not None:
+                grown[:len(days)] = days
+            days = self.days[user_id] = grown
+        return days[since:until]
+
+    def book(self, user_id: str, since: int, until: int, percentage: int) -> None:
+        self.view(user_id, since, until)[:] += percentage
+
+    def over(self, capacity: int) -> int:
+        return int(sum((days > capacity).sum() for days in self.days.values()))
+
+def _start_bound(dependency: LevelDependency, predecessor: LevelTask, task: LevelTask) -> int:
+    # A task occupies days [start, start + duration); each dependency type bounds the successor's start
+    if dependency.type == "SS":
+        return predecessor.new_start + dependency.lag
+    if dependency.type == "FF":
+        return predecessor.new_start + predecessor.duration + dependency.lag - task.duration
+    if dependency.type == "SF":
+        return predecessor.new_start + dependency.lag - task.duration
+    return predecessor.new_start + predecessor.duration + dependency.lag
+
+def _demand(task: LevelTask) -> Dict[str, Tuple[int, np.ndarray, bool]]:
+    """The task's own load per user: (first offset, percentage per day from there, whether it is constant)"""
+    spans: Dict[str, List[LevelAllocation]] = defaultdict(list)
+    for allocation in task.allocations:
+        spans[allocation.user_id].append(allocation)
+    demand = {}
+    for user_id, allocations in spans.items():
+        first = min(allocation.offset for allocation in allocations)
+        days = np.zeros(max(allocation.offset + allocation.length for allocation in allocations) - first, dtype=np.int32)
+        for allocation in allocations:
+            days[allocation.offset - first:allocation.offset - first + allocation.length] += allocation.percentage
+        demand[user_id] = (first, days, len(allocations) == 1 or bool((days == days[0]).all()))
+    return demand
+
+def _first_fit(task: LevelTask, earliest: int, profile: _Profile, capacity: int) -> int:
+    """First start from earliest on at which every allocation of the task fits.
+
+    Allocations of one user on the task are summed per day before the test.
+    A day is full when the task's load would push it above capacity; a day
+    with nothing booked always fits, so a task alone above capacity does not
+    block forever. On a conflict the search skips the starts that would
+    still put too much of the task's load on a full day, instead of trying
+    every start in between.
+    """
+    demand = _demand(task)
+    start = earliest
+    while True:
+        next_start = start
+        for user_id, (offset, days, uniform) in demand.items():
+            since = start + offset
+            booked = profile.view(user_id, since, since + len(days))
+            full = np.flatnonzero((booked + days > capacity) & (booked > 0) & (days > 0))
+            if not full.size:
+                continue
+            if uniform:
+                # The same load every day: only moving past the last full day helps
+                next_start = max(next_start, start + int(full[-1]) + 1)
+                continue
+            for day in reversed(full.tolist()):
+                if start + day + 1 <= next_start:
+                    # Neither this day nor an earlier one can ask for a larger shift
+                    break
+                # Moving the task by shift puts days[day - shift] on this day; the
+                # smallest shift that fits is the one to the last earlier day that fits
+                earlier = days[:day]
+                fits = np.flatnonzero((earlier <= capacity - booked[day]) | (earlier == 0))
+                next_start = max(next_start, start + (day - int(fits[-1]) if fits.size else day + 1))
+        if next_start == start:
+            return start
+        start = next_start
+
+def level(
+    tasks: Dict[Any, LevelTask],
+    dependencies: List[LevelDependency],
+    background: List[Tuple[str, int, int, int]] = (),
+    capacity: int = 100
+) -> Tuple[int, int]:
+    """Serial list scheduling: delay tasks until every user fits within capacity.
+
+    Tasks become ready once all their predecessors are placed and are taken
+    from a priority queue by (earliest start allowed by dependencies and
+    lag, priority, id). Each is placed at the first start from there on
+    where all its allocations fit next to the load booked so far plus the
+    fixed background (user, first day, day after last, percentage) from
+    other plans. Tasks only ever move later; pinned tasks do not move.
+    Sets new_start on every task and returns the number of over-allocated
+    user-days before and after. Raises ValueError on a dependency cycle.
+    """
+    starts = [task.start + allocation.offset for task in tasks.values() for allocation in task.allocations]
+    origin = min(starts, default=0)
+    before, after = _Profile(origin), _Profile(origin)
+    for user_id, since, until, percentage in background:
+        since = max(since, origin)
+        if since < until:
+            before.book(user_id, since, until, percentage)
+            after.book(user_id, since, until, percentage)
+    for task in tasks.values():
+        for allocation in task.allocations:
+            since = task.start + allocation.offset
+            before.book(allocation.user_id, since, since + allocation.length, allocation.percentage)
+            # Pinned work is booked up front so nothing is placed on top of it
+            if task.pinned:
+                after.book(allocation.user_id, since, since + allocation.length, allocation.percentage)
+
+    successors: Dict[Any, List[LevelDependency]] = defaultdict(list)
+    indegree = dict.fromkeys(tasks, 0)
+    for dependency in dependencies:
+        successors[dependency.source].append(dependency)
+        indegree[dependency.target] += 1
+    earliest = {task_id: task.start for task_id, task in tasks.items()}
+    ready = [(task.start, task.rank, task_id) for task_id, task in tasks.items() if indegree[task_id] == 0]
+    heapq.heapify(ready)
+
+    placed = 0
+    while ready:
+        start, _, task_id = heapq.heappop(ready)
+        task = tasks[task_id]
+        if not task.pinned:
+            task.new_start = _first_fit(task, start, after, capacity)
+            for allocation in task.allocations:
+                since = task.new_start + allocation.offset
+                after.book(allocation.user_id, since, since + allocation.length, allocation.percentage)
+        placed += 1
+        for dependency in successors[task_id]:
+            successor = tasks[dependency.target]
+            earliest[dependency.target] = max(earliest[dependency.target], _start_bound(dependency, task, successor))
+            indegree[dependency.target] -= 1
+            if indegree[dependency.target] == 0:
+                heapq.heappush(ready, (earliest[dependency.target], successor.rank, dependency.target))
+    if placed != len(tasks):
+        raise ValueError("Task dependencies contain a cycle")
+    return before.over(capacity), after.over(capacity)
+
+def _working_span(calendar: WorkingCalendar, start_date: datetime, end_date: datetime) -> Tuple[int, int]:
+    """Working-day positions [from, until) covering the days start_date..end_date"""
+    return calendar.day_index(utc_day(start_date)), calendar.day_index(utc_day(end_date) + timedelta(days=1))
+
+def load_leveling_problem(
+    db: Session,
+    release_plan_id: str,
+    calendar: WorkingCalendar
+) -> Tuple[Dict[Any, LevelTask], List[LevelDependency], List[Tuple[str, int, int, int]], List[Any]]:
+    """Tasks, dependencies and other plans' load for leveling a plan, in four queries.
+
+    Days are positions in the calendar's working days, so weekends and
+    holidays neither take load nor count towards durations and lags. A
+    task spans its start and end dates, falling back to its allocations
+    and then to estimated_hours at the calendar's hours per day. Subtasks
+    with no dates and no allocations cannot be placed; their ids are
+    returned last and dependencies through them are ignored.
+    """
+    subtasks = db.query(
+        Subtask.id, Subtask.title, Subtask.status, Subtask.priority,
+        Subtask.start_date, Subtask.end_date, Subtask.estimated_hours
+    ).join(Kit, Kit.id == Subtask.kit_id).filter(Kit.release_plan_id == release_plan_id).all()
+    allocations = db.query(
+        ResourceAllocation.subtask_id, ResourceAllocation.user_id, ResourceAllocation.allocation_percentage,
+        ResourceAllocation.start_date, ResourceAllocation.end_date
+    ).join(Subtask, Subtask.id == ResourceAllocation.subtask_id).join(Kit, Kit.id == Subtask.kit_id).filter(
+        Kit.release_plan_id == release_plan_id,
+        ResourceAllocation.start_date.isnot(None),
+        ResourceAllocation.end_date.isnot(None)
+    ).all()
+
+    by_task: Dict[Any, List[Tuple[str, int, int, int]]] = defaultdict(list)
+    for subtask_id, user_id, percentage, start_date, end_date in allocations:
+        by_task[subtask_id].append((user_id, *_working_span(calendar, start_date, end_date), percentage or 0))
+
+    tasks: Dict[Any, LevelTask] = {}
+    unscheduled = []
+    for task_id, title, status, priority, start_date, end_date, hours in subtasks:
+        booked = by_task.get(task_id, [])
+        if start_date is not None:
+            start = calendar.day_index(utc_day(start_date))
+        elif booked:
+            start = min(since for _, since, _, _ in booked)
+        else:
+            unscheduled.append(task_id)
+            continue
+        if end_date is not None:
+            finish = _working_span(calendar, end_date, end_date)[1]
+        elif booked:
+            finish = max(until for _, _, until, _ in booked)
+        else:
+            finish = start + max(1, math.ceil((hours or 0) / calendar.hours_per_day))
+        task = LevelTask(
+            task_id, title, start, max(finish - start, 1),
+            PRIORITY_RANKS.get((priority or "medium").lower(), 1),
+            (status or "").lower() in PINNED_STATUSES
+        )
+        task.allocations = [
+            LevelAllocation(user_id, since - start, until - since, percentage)
+            for user_id, since, until, percentage in booked if until > since
+        ]
+        tasks[task_id] = task
+
+    dependencies = [
+        LevelDependency(source, target, DEPENDENCY_TYPES.get(dependency_type or "FS", "FS"), lag_days or 0)
+        for source, target, dependency_type, lag_days in dependency_query(db, release_plan_id)
+        if source in tasks and target in tasks
+    ]
+
+    background = []
+    users = {user_id for user_id, _, _, _, _ in allocations}
+    if users:
+        rows = db.query(
+            ResourceAllocation.user_id, ResourceAllocation.allocation_percentage,
+            ResourceAllocation.start_date, ResourceAllocation.end_date
+        ).outerjoin(Subtask, Subtask.id == ResourceAllocation.subtask_id).outerjoin(Kit, Kit.id == Subtask.kit_id).filter(
+            ResourceAllocation.user_id.in_(users),
+            ResourceAllocation.start_date.isnot(None),
+            ResourceAllocation.end_date.isnot(None),
+            (Kit.release_plan_id != release_plan_id) | Kit.release_plan_id.is_(None)
+        ).all()
+        background = [
+            (user_id, *_working_span(calendar, start_date, end_date), percentage or 0)
+            for user_id, percentage, start_date, end_date in rows
+        ]
+    return tasks, dependencies, background, unscheduled
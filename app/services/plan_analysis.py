@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.database import ReleasePlan
+from app.services.critical_path import ScheduleNetwork
+from app.services.dependency_graph import DependencyGraph
+
+PENDING_CHANGES_KEY = "pending_plan_changes"
+
+def plan_version(updated_at: Optional[datetime]) -> Optional[float]:
+    """A release plan's version is its updated_at, compared as a UTC timestamp"""
+    if updated_at is None:
+        return None
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return updated_at.timestamp()
+
+class PlanAnalysis:
+    """Cached analysis of one plan version; parts are computed when first asked for"""
+
+    def __init__(self, version: Optional[float]):
+        self.version = version
+        self.network: Optional[ScheduleNetwork] = None
+        self.critical_path: Optional[Dict[str, Any]] = None
+        # Progress per weighting
+        self.progress: Dict[str, Dict[str, Any]] = {}
+        self.gantt: Optional[Dict[str, Any]] = None
+        self.graph: Optional[DependencyGraph] = None
+        # Subtasks changed since the network was scheduled / the graph was patched
+        self.dirty: Set[Any] = set()
+        self.graph_dirty: Set[Any] = set()
+        self.lock = threading.Lock()
+
+class PlanAnalysisCache:
+    """LRU of plan analyses keyed by release plan id.
+
+    Writes in this process move an entry to the new plan version and mark
+    the subtasks they touched, so the next read only reschedules around
+    them. A version written anywhere else is a miss.
+    """
+
+    def __init__(self, max_plans: int):
+        self.max_plans = max_plans
+        self._entries: "OrderedDict[str, PlanAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, release_plan_id: str, version: Optional[float]) -> PlanAnalysis:
+        """The entry for this version of the plan, replacing an outdated one"""
+        with self._lock:
+            entry = self._entries.get(release_plan_id)
+            if entry is None or entry.version != version:
+                entry = PlanAnalysis(version)
+                self._entries[release_plan_id] = entry
+                while len(self._entries) > self.max_plans:
+                    self._entries.popitem(last=False)
+            self._entries.move_to_end(release_plan_id)
+            return entry
+
+    def invalidate(self, release_plan_id: str) -> None:
+        with self._lock:
+            self._entries.pop(release_plan_id, None)
+
+    def record_change(self, release_plan_id: str, before: Optional[float], after: Optional[float], task_ids: Set[Any]) -> None:
+        with self._lock:
+            entry = self._entries.get(release_plan_id)
+            if entry is None:
+                return
+            if entry.version != before:
+                # Some change was made elsewhere; start over on the next read
+                del self._entries[release_plan_id]
+                return
+            with entry.lock:
+                entry.version = after
+                entry.dirty.update(task_ids)
+                entry.graph_dirty.update(task_ids)
+                entry.critical_path = None
+                entry.progress = {}
+                entry.gantt = None
+
+analysis_cache = PlanAnalysisCache(settings.PLAN_ANALYSIS_CACHE_SIZE)
+
+def plan_changed(db: Session, release_plan_id: Any, task_ids: Iterable[Any] = ()) -> None:
+    """Bump the plan's version inside the current transaction.
+
+    Once the transaction commits, the cached analysis follows the plan to
+    the new version with task_ids marked for rescheduling.
+    """
+    before = db.query(ReleasePlan.updated_at).filter(
+        ReleasePlan.id == release_plan_id
+    ).with_for_update().scalar()
+    after = datetime.now(timezone.utc)
+    if before is not None and plan_version(after) <= plan_version(before):
+        after = datetime.fromtimestamp(plan_version(before), timezone.utc) + timedelta(microseconds=1)
+    db.query(ReleasePlan).filter(ReleasePlan.id == release_plan_id).update(
+        {ReleasePlan.updated_at: after}, synchronize_session=False
+    )
+    db.info.setdefault(PENDING_CHANGES_KEY, []).append(
+        (str(release_plan_id), plan_version(before), plan_version(after), set(task_ids))
+    )
+
+@event.listens_for(Session, "after_commit")
+def _apply_plan_changes(session: Session) -> None:
+    for change in session.info.pop(PENDING_CHANGES_KEY, []):
+        analysis_cache.record_change(*change)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_plan_changes(session: Session) -> None:
+    session.info.pop(PENDING_CHANGES_KEY, None)
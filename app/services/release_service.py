@@ -1,5 +1,7 @@
-from sqlalchemy.orm import Session
-from app.models.database import ReleasePlan, Kit, Subtask, ReleasePlanSheet, ReleasePlanRow, ReleasePlanMilestone, TaskDependency, ResourceAllocation
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.models.database import Company, KitStatus, SubtaskStatus, ReleasePlan, Kit, Subtask, ReleasePlanSheet, ReleasePlanRow, ReleasePlanMilestone, TaskDependency, ResourceAllocation
 from app.schemas.release import (
     ReleasePlanCreate, ReleasePlanUpdate,
     KitCreate, KitUpdate,
@@ -9,15 +11,86 @@ from app.schemas.release import (
     TaskDependencyCreate, ResourceAllocationCreate,
     VisualizationSettings
 )
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from app.schemas import release as schemas
+from app.services.critical_path import load_plan_network, load_task_changes
+from app.services.dependency_graph import DependencyGraph, load_dependency_edges, load_dependency_graph
+from app.services.forecast import calibrate, forecast, load_duration_ratios, load_forecast_inputs
+from app.services.gantt import build_gantt, load_gantt_data
+from app.services.leveling import level, load_leveling_problem
+from app.services.plan_analysis import PlanAnalysis, analysis_cache, plan_changed, plan_version
+from app.services import rollup  # noqa: F401  (registers the hours/progress rollup listener)
+from app.services.resource_load import load_matrix, resource_load, utc_day, window_bounds
+from app.services.sandbox import SandboxConflict, SandboxStore, load_snapshot
+from app.services.timeline import Timeline
+from app.services.working_calendar import compile_calendar, load_company_calendar, load_plan_calendar
+from app.utils.loading import LoadingProfile, Relation, build_loading_profile
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+from datetime import date, datetime
+import enum
+import uuid
 
-# Release Plan operations
-def create_release_plan_sheet(db: Session, release_plan_id: str) -> ReleasePlanSheet:
-    # Create default Gantt and Timeline configs
+_subtasks = selectinload(ReleasePlan.kits).selectinload(Kit.subtasks)
+_sheet = joinedload(ReleasePlan.sheet)
+
+# Relationships of a release plan that clients can request with ?include=
+RELEASE_PLAN_RELATIONS = {
+    "kits": Relation(List[schemas.KitSummary], [selectinload(ReleasePlan.kits)]),
+    "kits.subtasks": Relation(List[schemas.Kit], [
+        _subtasks.selectinload(Subtask.outgoing_dependencies),
+        _subtasks.selectinload(Subtask.incoming_dependencies),
+        _subtasks.selectinload(Subtask.resource_allocations),
+    ]),
+    "sheet": Relation(Optional[schemas.ReleasePlanSheet], [
+        _sheet.selectinload(ReleasePlanSheet.rows),
+        _sheet.selectinload(ReleasePlanSheet.milestones),
+    ]),
+}
+
+# ?depth= presets: the plan alone, with its kits, or the full tree
+RELEASE_PLAN_DEPTHS = {
+    "plan": (),
+    "kits": ("kits",),
+    "full": ("kits.subtasks", "sheet"),
+}
+
+def release_plan_loading_profile(
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    depth: Optional[str] = None
+) -> LoadingProfile:
+    """Loader options and response model; an explicit ?include= wins over ?depth="""
+    return build_loading_profile(
+        ReleasePlan, schemas.ReleasePlan, RELEASE_PLAN_RELATIONS, include, fields,
+        default_include=RELEASE_PLAN_DEPTHS[depth or "full"]
+    )
+
+# Building nested plans in memory, so a whole tree is written in one flush
+def _column_values(model: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a create payload onto the model's columns.
+
+    Schema enums become the model's enums for Enum columns (persisted by
+    name) and plain values for String columns such as Subtask.status.
+    """
+    columns = model.__table__.columns
+    values = {}
+    for key, value in data.items():
+        enum_class = getattr(columns[key].type, "enum_class", None)
+        if enum_class is not None and value is not None:
+            value = enum_class(getattr(value, "value", value))
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        values[key] = value
+    return values
+
+def _build_release_plan_sheet(
+    release_plan_id: uuid.UUID,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> ReleasePlanSheet:
+    # Create default Gantt and Timeline configs; the chart spans the plan
     gantt_config = GanttConfig(
-        start_date=datetime.now(),
-        end_date=datetime.now(),
+        start_date=start_date or datetime.now(),
+        end_date=end_date or start_date or datetime.now(),
         view_mode="month"
     )
     
@@ -33,44 +106,184 @@ def create_release_plan_sheet(db: Session, release_plan_id: str) -> ReleasePlanS
         gantt_config=gantt_config,
         timeline_config=timeline_config
     )
-    
-    db_sheet = ReleasePlanSheet(**sheet_data.dict(), release_plan_id=release_plan_id)
+    # JSON columns need the configs' datetimes as strings
+    return ReleasePlanSheet(**sheet_data.model_dump(mode="json"), release_plan_id=release_plan_id)
+
+def _build_subtask(subtask: SubtaskCreate, pending: List[Tuple[Subtask, SubtaskCreate]]) -> Subtask:
+    db_subtask = Subtask(**_column_values(
+        Subtask, subtask.dict(exclude={"ref", "dependencies", "resource_allocations"})
+    ))
+    db_subtask.resource_allocations = [
+        ResourceAllocation(**allocation.dict()) for allocation in subtask.resource_allocations or []
+    ]
+    pending.append((db_subtask, subtask))
+    return db_subtask
+
+def _build_kit(kit: KitCreate, pending: List[Tuple[Subtask, SubtaskCreate]]) -> Kit:
+    db_kit = Kit(**_column_values(Kit, kit.dict(exclude={"subtasks"})))
+    db_kit.subtasks = [_build_subtask(subtask, pending) for subtask in kit.subtasks or []]
+    return db_kit
+
+def _link_dependencies(
+    db: Session,
+    pending: List[Tuple[Subtask, SubtaskCreate]],
+    release_plan_id: Optional[Any] = None
+) -> None:
+    """Attach each pending subtask's dependencies, resolving target_ref against the other pending subtasks.
+
+    A target_task_id must be an existing subtask of release_plan_id (a new
+    plan has none), as create_task_dependency requires.
+    """
+    target_ids = {
+        dependency.target_task_id
+        for _, subtask in pending for dependency in subtask.dependencies or []
+        if dependency.target_ref is None and dependency.target_task_id is not None
+    }
+    target_plans = dict(
+        db.query(Subtask.id, Kit.release_plan_id).join(Kit, Kit.id == Subtask.kit_id).filter(
+            Subtask.id.in_(target_ids)
+        ).all()
+    ) if target_ids else {}
+    for target_id in target_ids:
+        if target_id not in target_plans:
+            raise ValueError(f"Unknown target subtask: {target_id}")
+        if release_plan_id is None or target_plans[target_id] != uuid.UUID(str(release_plan_id)):
+            raise ValueError("A dependency must stay within one release plan")
+
+    refs: Dict[str, Subtask] = {}
+    # Existing subtasks never depend on new ones, so only refs can close a cycle
+    ref_graph = DependencyGraph()
+    for db_subtask, subtask in pending:
+        if subtask.ref is None:
+            continue
+        if subtask.ref in refs:
+            raise ValueError(f"Duplicate subtask ref: {subtask.ref}")
+        refs[subtask.ref] = db_subtask
+
+    for db_subtask, subtask in pending:
+        for dependency in subtask.dependencies or []:
+            values = dependency.dict(include={"dependency_type", "lag_days"})
+            if dependency.target_ref is not None:
+                target = refs.get(dependency.target_ref)
+                if target is None:
+                    raise ValueError(f"Unknown subtask ref: {dependency.target_ref}")
+                if subtask.ref is not None:
+                    ref_graph.check_edge(subtask.ref, dependency.target_ref)
+                    ref_graph.add(subtask.ref, dependency.target_ref)
+                db_subtask.outgoing_dependencies.append(TaskDependency(**values, target_task=target))
+            elif dependency.target_task_id is not None:
+                db_subtask.outgoing_dependencies.append(
+                    TaskDependency(**values, target_task_id=dependency.target_task_id)
+                )
+            else:
+                raise ValueError("A dependency needs a target_task_id or target_ref")
+
+def _changed_task_ids(pending: List[Tuple[Subtask, SubtaskCreate]]) -> List[Any]:
+    # New subtasks plus the existing subtasks their dependencies point at
+    task_ids = []
+    for db_subtask, _ in pending:
+        task_ids.append(db_subtask.id)
+        task_ids.extend(dependency.target_task_id for dependency in db_subtask.outgoing_dependencies)
+    return task_ids
+
+def _commit_tree(
+    db: Session,
+    root: Any,
+    release_plan_id: Optional[Any] = None,
+    pending: List[Tuple[Subtask, SubtaskCreate]] = ()
+) -> None:
+    db.add(root)
+    try:
+        if release_plan_id is not None:
+            db.flush()
+            plan_changed(db, release_plan_id, _changed_task_ids(pending))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def _kit_plan_id(db: Session, kit_id: Any) -> Optional[Any]:
+    return db.query(Kit.release_plan_id).filter(Kit.id == kit_id).scalar()
+
+def _subtask_plan(db: Session, subtask_id: Any) -> Optional[Tuple[int, Any]]:
+    # (subtask id, release plan id), or None for an unknown subtask
+    return db.query(Subtask.id, Kit.release_plan_id).join(Kit, Kit.id == Subtask.kit_id).filter(
+        Subtask.id == subtask_id
+    ).first()
+
+# Release Plan operations
+def create_release_plan_sheet(db: Session, release_plan_id: str) -> ReleasePlanSheet:
+    dates = db.query(ReleasePlan.start_date, ReleasePlan.end_date).filter(ReleasePlan.id == release_plan_id).first()
+    db_sheet = _build_release_plan_sheet(release_plan_id, *(dates or ()))
     db.add(db_sheet)
     db.commit()
     db.refresh(db_sheet)
     return db_sheet
 
 def create_release_plan(db: Session, release_plan: ReleasePlanCreate) -> ReleasePlan:
-    # Create the release plan
-    db_release_plan = ReleasePlan(**release_plan.dict(exclude={"kits"}))
-    db.add(db_release_plan)
-    db.commit()
-    db.refresh(db_release_plan)
-    
-    # Auto-create the sheet for this release plan
-    create_release_plan_sheet(db, db_release_plan.id)
-    
-    # Create kits if provided
-    if release_plan.kits:
-        for kit_data in release_plan.kits:
-            create_kit(db, kit_data, db_release_plan.id)
-    
-    return db_release_plan
+    """Create a release plan with its sheet and the nested kits, subtasks,
+    dependencies and allocations in a single transaction.
 
-def get_release_plan(db: Session, release_plan_id: str) -> Optional[ReleasePlan]:
-    return db.query(ReleasePlan).filter(ReleasePlan.id == release_plan_id).first()
+    The tree is built in memory and written by one flush, which batches the
+    inserts per table. Dependencies may target sibling subtasks of the payload
+    through target_ref; invalid refs raise ValueError before anything is written.
+    """
+    db_release_plan = ReleasePlan(id=uuid.uuid4(), **_column_values(ReleasePlan, release_plan.dict(exclude={"kits"})))
+    db_release_plan.sheet = _build_release_plan_sheet(
+        db_release_plan.id, db_release_plan.start_date, db_release_plan.end_date
+    )
+    pending: List[Tuple[Subtask, SubtaskCreate]] = []
+    db_release_plan.kits = [_build_kit(kit, pending) for kit in release_plan.kits or []]
+    _link_dependencies(db, pending)
+    _commit_tree(db, db_release_plan)
+    return get_release_plan(db, db_release_plan.id, options=release_plan_loading_profile().options)
+
+def get_release_plan(
+    db: Session,
+    release_plan_id: str,
+    options: Optional[List[Any]] = None
+) -> Optional[ReleasePlan]:
+    return db.query(ReleasePlan).options(*(options or [])).filter(ReleasePlan.id == release_plan_id).first()
 
 def get_release_plans(
     db: Session,
-    company_id: int,
-    skip: int = 0,
+    company_id: Optional[int] = None,
+    after: Optional[str] = None,
     limit: int = 100,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    options: Optional[List[Any]] = None
 ) -> List[ReleasePlan]:
-    query = db.query(ReleasePlan).filter(ReleasePlan.company_id == company_id)
+    query = db.query(ReleasePlan).options(*(options or []))
+    if company_id:
+        query = query.filter(ReleasePlan.company_id == company_id)
     if status:
         query = query.filter(ReleasePlan.status == status)
-    return query.offset(skip).limit(limit).all()
+    if after is not None:
+        query = query.filter(ReleasePlan.id > after)
+    return query.order_by(ReleasePlan.id).limit(limit).all()
+
+def iter_release_plan_batches(
+    db: Session,
+    company_id: Optional[int] = None,
+    status: Optional[str] = None,
+    options: Optional[List[Any]] = None,
+    batch_size: int = 100
+) -> Iterator[List[ReleasePlan]]:
+    """Every matching plan, one keyset page at a time.
+
+    Each page costs the same fixed number of queries. Pages already handed
+    out are expunged, so an export of any size holds one page in memory.
+    """
+    after = None
+    while True:
+        batch = get_release_plans(db, company_id=company_id, after=after, limit=batch_size, status=status, options=options)
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1].id
+        db.expunge_all()
 
 def update_release_plan(
     db: Session,
@@ -79,10 +292,11 @@ def update_release_plan(
 ) -> Optional[ReleasePlan]:
     db_release_plan = get_release_plan(db, release_plan_id)
     if db_release_plan:
-        update_data = release_plan.dict(exclude_unset=True)
+        update_data = _column_values(ReleasePlan, release_plan.dict(exclude_unset=True))
         for key, value in update_data.items():
             setattr(db_release_plan, key, value)
         db.commit()
+        analysis_cache.invalidate(str(release_plan_id))
         db.refresh(db_release_plan)
     return db_release_plan
 
@@ -91,20 +305,18 @@ def delete_release_plan(db: Session, release_plan_id: str) -> bool:
     if db_release_plan:
         db.delete(db_release_plan)
         db.commit()
+        analysis_cache.invalidate(str(release_plan_id))
         return True
     return False
 
 # Kit operations
 def create_kit(db: Session, kit: KitCreate, release_plan_id: str) -> Kit:
-    db_kit = Kit(**kit.dict(exclude={"subtasks"}), release_plan_id=release_plan_id)
-    db.add(db_kit)
-    db.commit()
+    pending: List[Tuple[Subtask, SubtaskCreate]] = []
+    db_kit = _build_kit(kit, pending)
+    db_kit.release_plan_id = release_plan_id
+    _link_dependencies(db, pending, release_plan_id)
+    _commit_tree(db, db_kit, release_plan_id, pending)
     db.refresh(db_kit)
-    
-    if kit.subtasks:
-        for subtask_data in kit.subtasks:
-            create_subtask(db, subtask_data, db_kit.id)
-    
     return db_kit
 
 def get_kit(db: Session, kit_id: str) -> Optional[Kit]:
@@ -113,11 +325,18 @@ def get_kit(db: Session, kit_id: str) -> Optional[Kit]:
 def get_kits(
     db: Session,
     release_plan_id: str,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None
 ) -> List[Kit]:
     query = db.query(Kit).filter(Kit.release_plan_id == release_plan_id)
     if status:
         query = query.filter(Kit.status == status)
+    if after is not None:
+        query = query.filter(Kit.id > after)
+    query = query.order_by(Kit.id)
+    if limit is not None:
+        query = query.limit(limit)
     return query.all()
 
 def update_kit(
@@ -127,9 +346,10 @@ def update_kit(
 ) -> Optional[Kit]:
     db_kit = get_kit(db, kit_id)
     if db_kit:
-        update_data = kit.dict(exclude_unset=True)
+        update_data = _column_values(Kit, kit.dict(exclude_unset=True))
         for key, value in update_data.items():
             setattr(db_kit, key, value)
+        plan_changed(db, db_kit.release_plan_id)
         db.commit()
         db.refresh(db_kit)
     return db_kit
@@ -137,6 +357,7 @@ def update_kit(
 def delete_kit(db: Session, kit_id: str) -> bool:
     db_kit = get_kit(db, kit_id)
     if db_kit:
+        plan_changed(db, db_kit.release_plan_id, [subtask.id for subtask in db_kit.subtasks])
         db.delete(db_kit)
         db.commit()
         return True
@@ -144,22 +365,13 @@ def delete_kit(db: Session, kit_id: str) -> bool:
 
 # Subtask operations
 def create_subtask(db: Session, subtask: SubtaskCreate, kit_id: str) -> Subtask:
-    # Create the subtask
-    db_subtask = Subtask(**subtask.dict(exclude={"dependencies", "resource_allocations"}), kit_id=kit_id)
-    db.add(db_subtask)
-    db.commit()
+    pending: List[Tuple[Subtask, SubtaskCreate]] = []
+    db_subtask = _build_subtask(subtask, pending)
+    db_subtask.kit_id = kit_id
+    release_plan_id = _kit_plan_id(db, kit_id)
+    _link_dependencies(db, pending, release_plan_id)
+    _commit_tree(db, db_subtask, release_plan_id, pending)
     db.refresh(db_subtask)
-    
-    # Create dependencies if provided
-    if subtask.dependencies:
-        for dependency in subtask.dependencies:
-            create_task_dependency(db, dependency, db_subtask.id)
-    
-    # Create resource allocations if provided
-    if subtask.resource_allocations:
-        for allocation in subtask.resource_allocations:
-            create_resource_allocation(db, allocation, db_subtask.id)
-    
     return db_subtask
 
 def get_subtask(db: Session, subtask_id: str) -> Optional[Subtask]:
@@ -182,9 +394,10 @@ def update_subtask(
 ) -> Optional[Subtask]:
     db_subtask = get_subtask(db, subtask_id)
     if db_subtask:
-        update_data = subtask.dict(exclude_unset=True)
+        update_data = _column_values(Subtask, subtask.dict(exclude_unset=True))
         for key, value in update_data.items():
             setattr(db_subtask, key, value)
+        plan_changed(db, _kit_plan_id(db, db_subtask.kit_id), [db_subtask.id])
         db.commit()
         db.refresh(db_subtask)
     return db_subtask
@@ -192,61 +405,133 @@ def update_subtask(
 def delete_subtask(db: Session, subtask_id: str) -> bool:
     db_subtask = get_subtask(db, subtask_id)
     if db_subtask:
+        plan_changed(db, _kit_plan_id(db, db_subtask.kit_id), [db_subtask.id])
         db.delete(db_subtask)
         db.commit()
         return True
     return False
 
 # Progress calculation
-def calculate_release_progress(db: Session, release_plan_id: str) -> Dict[str, Any]:
-    release_plan = get_release_plan(db, release_plan_id)
-    if not release_plan:
-        return {"progress_percentage": 0, "details": {}}
-    
-    kits = get_kits(db, release_plan_id)
-    if not kits:
+def _plan_analysis(db: Session, release_plan_id: str, for_update: bool = False) -> Optional[PlanAnalysis]:
+    query = db.query(ReleasePlan.updated_at).filter(ReleasePlan.id == release_plan_id)
+    # Writers lock the plan row so their reads of the cache cannot interleave
+    row = (query.with_for_update() if for_update else query).first()
+    if row is None:
+        return None
+    return analysis_cache.get(str(release_plan_id), plan_version(row[0]))
+
+def _dependency_graph(db: Session, release_plan_id: str, analysis: PlanAnalysis) -> DependencyGraph:
+    # Call with analysis.lock held
+    if analysis.graph is None:
+        analysis.graph = load_dependency_graph(db, release_plan_id)
+    elif analysis.graph_dirty:
+        edges = load_dependency_edges(db, release_plan_id, analysis.graph_dirty)
+        analysis.graph.replace_tasks(analysis.graph_dirty, edges)
+    analysis.graph_dirty.clear()
+    return analysis.graph
+
+# Weighting -> (unit, key of the per-status breakdown)
+PROGRESS_WEIGHTINGS = {"kits": ("kits", "status_counts"), "hours": ("hours", "status_hours")}
+
+def calculate_release_progress(db: Session, release_plan_id: str, weighting: str = "kits") -> Dict[str, Any]:
+    """Progress of a plan by done kits, or by estimated hours of done subtasks; cached until the plan changes"""
+    if weighting not in PROGRESS_WEIGHTINGS:
+        raise ValueError(f"Unknown weighting: {weighting}")
+    analysis = _plan_analysis(db, release_plan_id)
+    if analysis is None:
         return {"progress_percentage": 0, "details": {}}
-    
-    total_kits = len(kits)
-    completed_kits = sum(1 for kit in kits if kit.status == "Done")
-    progress_percentage = int((completed_kits / total_kits) * 100) if total_kits > 0 else 0
-    
-    # Calculate progress by status
-    status_counts = {}
-    for kit in kits:
-        status_counts[kit.status] = status_counts.get(kit.status, 0) + 1
-    
-    # Calculate progress by owner
-    owner_progress = {}
-    for kit in kits:
-        if kit.owner not in owner_progress:
-            owner_progress[kit.owner] = {"total": 0, "completed": 0}
-        owner_progress[kit.owner]["total"] += 1
-        if kit.status == "Done":
-            owner_progress[kit.owner]["completed"] += 1
-    
+    with analysis.lock:
+        if weighting not in analysis.progress:
+            plans = _progress_by_plan(_progress_query(db, weighting).filter(ReleasePlan.id == release_plan_id), weighting)
+            analysis.progress[weighting] = plans[0]["progress"] if plans else {"progress_percentage": 0, "details": {}}
+        return analysis.progress[weighting]
+
+def calculate_portfolio_progress(db: Session, company_id: int, weighting: str = "kits") -> Dict[str, Any]:
+    """Progress of every release plan of a company with a single aggregate query"""
+    if weighting not in PROGRESS_WEIGHTINGS:
+        raise ValueError(f"Unknown weighting: {weighting}")
+    query = _progress_query(db, weighting).filter(ReleasePlan.company_id == company_id)
+    plans = _progress_by_plan(query.order_by(ReleasePlan.name), weighting)
     return {
-        "progress_percentage": progress_percentage,
-        "details": {
-            "total_kits": total_kits,
-            "completed_kits": completed_kits,
-            "status_counts": status_counts,
-            "owner_progress": owner_progress
-        }
+        "company_id": company_id,
+        "weighting": weighting,
+        "release_plans": [
+            {"release_plan_id": plan["id"], "name": plan["name"], **plan["progress"]}
+            for plan in plans
+        ],
     }
 
+def _progress_query(db: Session, weighting: str):
+    # One row per (plan, status, owner) with its kit count or subtask hours;
+    # plans without kits or subtasks still get a row with a NULL status
+    if weighting == "hours":
+        return db.query(
+            ReleasePlan.id, ReleasePlan.name, Subtask.status, Subtask.owner,
+            func.coalesce(func.sum(Subtask.estimated_hours), 0)
+        ).outerjoin(Kit, Kit.release_plan_id == ReleasePlan.id).outerjoin(Subtask, Subtask.kit_id == Kit.id).group_by(
+            ReleasePlan.id, ReleasePlan.name, Subtask.status, Subtask.owner
+        )
+    return db.query(
+        ReleasePlan.id, ReleasePlan.name, Kit.status, Kit.owner, func.count(Kit.id)
+    ).outerjoin(Kit, Kit.release_plan_id == ReleasePlan.id).group_by(
+        ReleasePlan.id, ReleasePlan.name, Kit.status, Kit.owner
+    )
+
+def _progress_by_plan(rows, weighting: str) -> List[Dict[str, Any]]:
+    unit, status_key = PROGRESS_WEIGHTINGS[weighting]
+    done = SubtaskStatus.DONE.value if weighting == "hours" else KitStatus.DONE
+    plans: Dict[Any, Dict[str, Any]] = {}
+    for plan_id, name, status, owner, weight in rows:
+        plan = plans.setdefault(plan_id, {"id": plan_id, "name": name, "total": 0, "completed": 0, "status": {}, "owner": {}})
+        if weight is None or (status is None and owner is None and not weight):
+            continue
+        completed = weight if status == done else 0
+        status = status.value if isinstance(status, enum.Enum) else status
+        plan["total"] += weight
+        plan["completed"] += completed
+        plan["status"][status] = plan["status"].get(status, 0) + weight
+        owner_progress = plan["owner"].setdefault(owner, {"total": 0, "completed": 0})
+        owner_progress["total"] += weight
+        owner_progress["completed"] += completed
+
+    results = []
+    for plan in plans.values():
+        if not plan["total"]:
+            progress = {"progress_percentage": 0, "details": {}}
+        else:
+            progress = {
+                "progress_percentage": int(plan["completed"] / plan["total"] * 100),
+                "details": {
+                    f"total_{unit}": plan["total"],
+                    f"completed_{unit}": plan["completed"],
+                    status_key: plan["status"],
+                    "owner_progress": plan["owner"],
+                },
+            }
+        results.append({"id": plan["id"], "name": plan["name"], "progress": progress})
+    return results
+
+def _sheet_plan_id(db: Session, sheet_id: Any) -> Any:
+    return db.query(ReleasePlanSheet.release_plan_id).filter(ReleasePlanSheet.id == sheet_id).scalar()
+
 def update_sheet_config(
     db: Session,
     sheet_id: str,
     gantt_config: Optional[GanttConfig] = None,
-    timeline_config: Optional[TimelineConfig] = None
+    timeline_config: Optional[TimelineConfig] = None,
+    visualization_settings: Optional[VisualizationSettings] = None
 ) -> Optional[ReleasePlanSheet]:
     db_sheet = db.query(ReleasePlanSheet).filter(ReleasePlanSheet.id == sheet_id).first()
     if db_sheet:
+        # JSON columns need plain values, so datetimes go in as ISO strings
         if gantt_config:
-            db_sheet.gantt_config = gantt_config.dict()
+            db_sheet.gantt_config = gantt_config.model_dump(mode="json")
         if timeline_config:
-            db_sheet.timeline_config = timeline_config.dict()
+            db_sheet.timeline_config = timeline_config.model_dump(mode="json")
+        if visualization_settings:
+            db_sheet.visualization_settings = visualization_settings.model_dump(mode="json")
+        if db_sheet.release_plan_id is not None:
+            plan_changed(db, db_sheet.release_plan_id)
         db.commit()
         db.refresh(db_sheet)
     return db_sheet
@@ -258,6 +543,9 @@ def create_milestone(
 ) -> ReleasePlanMilestone:
     db_milestone = ReleasePlanMilestone(**milestone.dict(), sheet_id=sheet_id)
     db.add(db_milestone)
+    release_plan_id = _sheet_plan_id(db, sheet_id)
+    if release_plan_id is not None:
+        plan_changed(db, release_plan_id)
     db.commit()
     db.refresh(db_milestone)
     return db_milestone
@@ -282,6 +570,9 @@ def update_milestone(
         update_data = milestone.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_milestone, key, value)
+        release_plan_id = _sheet_plan_id(db, db_milestone.sheet_id)
+        if release_plan_id is not None:
+            plan_changed(db, release_plan_id)
         db.commit()
         db.refresh(db_milestone)
     return db_milestone
@@ -289,7 +580,10 @@ def update_milestone(
 def delete_milestone(db: Session, milestone_id: str) -> bool:
     db_milestone = db.query(ReleasePlanMilestone).filter(ReleasePlanMilestone.id == milestone_id).first()
     if db_milestone:
+        release_plan_id = _sheet_plan_id(db, db_milestone.sheet_id)
         db.delete(db_milestone)
+        if release_plan_id is not None:
+            plan_changed(db, release_plan_id)
         db.commit()
         return True
     return False
@@ -299,8 +593,35 @@ def create_task_dependency(
     dependency: TaskDependencyCreate,
     source_task_id: str
 ) -> TaskDependency:
-    db_dependency = TaskDependency(**dependency.dict(), source_task_id=source_task_id)
+    """Add a dependency between two subtasks of the same plan, rejecting cycles.
+
+    Returns None if the source subtask does not exist.
+    """
+    if dependency.target_task_id is None:
+        raise ValueError("target_task_id is required")
+    source = _subtask_plan(db, source_task_id)
+    if source is None:
+        return None
+    target = _subtask_plan(db, dependency.target_task_id)
+    if target is None:
+        raise ValueError(f"Unknown target subtask: {dependency.target_task_id}")
+    if target[1] != source[1]:
+        raise ValueError("A dependency must stay within one release plan")
+
+    analysis = _plan_analysis(db, source[1], for_update=True)
+    try:
+        with analysis.lock:
+            _dependency_graph(db, source[1], analysis).check_edge(source[0], target[0])
+    except ValueError:
+        db.rollback()
+        raise
+
+    db_dependency = TaskDependency(
+        **_column_values(TaskDependency, dependency.dict(include={"target_task_id", "dependency_type", "lag_days"})),
+        source_task_id=source[0]
+    )
     db.add(db_dependency)
+    plan_changed(db, source[1], [source[0], target[0]])
     db.commit()
     db.refresh(db_dependency)
     return db_dependency
@@ -333,6 +654,24 @@ def get_task_dependencies(
         )
     return query.all()
 
+def get_dependency_closure(db: Session, task_id: str, direction: str = "both") -> Optional[Dict[str, Any]]:
+    """Subtasks a subtask transitively depends on (upstream) and that depend on it (downstream).
+
+    Answered from the plan's cached dependency graph rather than recursive SQL.
+    """
+    task = _subtask_plan(db, task_id)
+    if task is None:
+        return None
+    analysis = _plan_analysis(db, task[1])
+    with analysis.lock:
+        graph = _dependency_graph(db, task[1], analysis)
+        closure: Dict[str, Any] = {"subtask_id": task[0]}
+        if direction in ("upstream", "both"):
+            closure["upstream"] = sorted(graph.upstream(task[0]))
+        if direction in ("downstream", "both"):
+            closure["downstream"] = sorted(graph.downstream(task[0]))
+    return closure
+
 def get_resource_allocations(
     db: Session,
     subtask_id: Optional[str] = None,
@@ -346,97 +685,367 @@ def get_resource_allocations(
     if user_id:
         query = query.filter(ResourceAllocation.user_id == user_id)
     if date_range:
+        # Every allocation overlapping the range, not only those inside it
         if "start" in date_range:
-            query = query.filter(ResourceAllocation.start_date >= date_range["start"])
+            query = query.filter(ResourceAllocation.end_date >= date_range["start"])
         if "end" in date_range:
-            query = query.filter(ResourceAllocation.end_date <= date_range["end"])
+            query = query.filter(ResourceAllocation.start_date <= date_range["end"])
     
     return query.all()
 
 def calculate_critical_path(db: Session, release_plan_id: str) -> Dict[str, Any]:
-    # Get all subtasks in the release plan
-    subtasks = []
-    for kit in get_kits(db, release_plan_id):
-        subtasks.extend(get_subtasks(db, kit.id))
-    
-    if not subtasks:
+    """Critical path, schedule and float per subtask (hours) for a release plan.
+
+    The schedule is cached per plan version. After changes made through this
+    module only the subtasks around the change are rescheduled.
+    """
+    analysis = _plan_analysis(db, release_plan_id)
+    if analysis is None:
         return {"critical_path": [], "total_duration": 0}
-    
-    # Calculate earliest start and finish times
-    for subtask in subtasks:
-        incoming_deps = get_task_dependencies(db, str(subtask.id), "incoming")
-        if not incoming_deps:
-            subtask.earliest_start = subtask.start_date
-        else:
-            latest_finish = max(
-                dep.source_task.earliest_finish + timedelta(days=dep.lag_days)
-                for dep in incoming_deps
-            )
-            subtask.earliest_start = latest_finish
-        
-        subtask.earliest_finish = subtask.earliest_start + timedelta(hours=subtask.estimated_hours or 0)
-    
-    # Calculate latest start and finish times
-    for subtask in reversed(subtasks):
-        outgoing_deps = get_task_dependencies(db, str(subtask.id), "outgoing")
-        if not outgoing_deps:
-            subtask.latest_finish = subtask.end_date or subtask.earliest_finish
-        else:
-            earliest_start = min(
-                dep.target_task.latest_start - timedelta(days=dep.lag_days)
-                for dep in outgoing_deps
-            )
-            subtask.latest_finish = earliest_start
-        
-        subtask.latest_start = subtask.latest_finish - timedelta(hours=subtask.estimated_hours or 0)
-    
-    # Identify critical path
-    critical_path = []
-    for subtask in subtasks:
-        if subtask.earliest_start == subtask.latest_start and subtask.earliest_finish == subtask.latest_finish:
-            critical_path.append({
-                "subtask_id": str(subtask.id),
-                "title": subtask.title,
-                "start_date": subtask.earliest_start,
-                "end_date": subtask.earliest_finish,
-                "duration_hours": subtask.estimated_hours
-            })
-    
-    total_duration = sum(task["duration_hours"] for task in critical_path) if critical_path else 0
-    
+    with analysis.lock:
+        if analysis.critical_path is None:
+            try:
+                _schedule(db, release_plan_id, analysis)
+            except ValueError:
+                analysis_cache.invalidate(str(release_plan_id))
+                raise
+        return analysis.critical_path
+
+def get_gantt(db: Session, release_plan_id: str) -> Optional[Dict[str, Any]]:
+    """Gantt bars of a plan positioned for its GanttConfig, cached per plan version"""
+    analysis = _plan_analysis(db, release_plan_id)
+    if analysis is None:
+        return None
+    with analysis.lock:
+        if analysis.gantt is None:
+            try:
+                if analysis.critical_path is None:
+                    _schedule(db, release_plan_id, analysis)
+            except ValueError:
+                analysis_cache.invalidate(str(release_plan_id))
+                raise
+            analysis.gantt = build_gantt(load_gantt_data(db, release_plan_id), analysis.critical_path)
+        return analysis.gantt
+
+def forecast_release(
+    db: Session,
+    release_plan_id: str,
+    trials: int = settings.FORECAST_TRIALS,
+    seed: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Monte Carlo P50/P80/P95 completion dates of a plan, its kits and milestones.
+
+    Subtask durations are drawn around estimated_hours from the company's
+    historical actual / estimated ratios and pushed through the cached
+    dependency network; finished subtasks keep their actual hours.
+    """
+    analysis = _plan_analysis(db, release_plan_id)
+    if analysis is None:
+        return None
+    with analysis.lock:
+        try:
+            if analysis.critical_path is None:
+                _schedule(db, release_plan_id, analysis)
+        except ValueError:
+            analysis_cache.invalidate(str(release_plan_id))
+            raise
+        inputs = load_forecast_inputs(db, release_plan_id, analysis.network)
+        deterministic = analysis.critical_path.get("project_finish")
+    calibration = calibrate(
+        load_duration_ratios(db, inputs.company_id, settings.FORECAST_HISTORY_SIZE),
+        settings.FORECAST_MIN_HISTORY, settings.FORECAST_DEFAULT_SIGMA
+    )
     return {
-        "critical_path": critical_path,
-        "total_duration": total_duration
+        "release_plan_id": release_plan_id,
+        "scheduled_finish": deterministic,
+        **forecast(inputs, calibration, trials, seed),
     }
 
+def get_timeline(
+    db: Session,
+    release_plan_id: str,
+    level: str = "subtasks",
+    after: Any = None,
+    limit: int = 100
+) -> Optional[Dict[str, Any]]:
+    """Kits or subtasks of a plan grouped and sorted by the sheet's TimelineConfig.
+
+    Without a cursor every group comes with its first limit items; a group's
+    next_cursor fetches the items after them, in that group only.
+    """
+    row = db.query(ReleasePlan.id, ReleasePlanSheet.timeline_config).outerjoin(
+        ReleasePlanSheet, ReleasePlanSheet.release_plan_id == ReleasePlan.id
+    ).filter(ReleasePlan.id == release_plan_id).first()
+    if row is None:
+        return None
+    config = TimelineConfig(**(row[1] or {}))
+    timeline = Timeline(db, release_plan_id, level, config)
+    return {
+        "release_plan_id": row[0],
+        "level": level,
+        "view_mode": config.view_mode,
+        "group_by": config.group_by,
+        "sort_by": config.sort_by,
+        "groups": timeline.first_pages(limit) if after is None else [timeline.next_page(after, limit)],
+    }
+
+def _schedule(db: Session, release_plan_id: str, analysis: PlanAnalysis) -> None:
+    if analysis.network is None:
+        analysis.network = load_plan_network(db, release_plan_id)
+        analysis.network.compute()
+    elif analysis.dirty:
+        tasks, dependencies = load_task_changes(
+            db, release_plan_id, analysis.dirty, analysis.network.origin, analysis.network.calendar
+        )
+        analysis.network.apply_changes(analysis.dirty, tasks, dependencies)
+    analysis.dirty.clear()
+    if not analysis.network.tasks:
+        analysis.critical_path = {"critical_path": [], "total_duration": 0}
+    else:
+        analysis.critical_path = analysis.network.report()
+
 def calculate_resource_load(
     db: Session,
     user_id: str,
     start_date: datetime,
-    end_date: datetime
+    end_date: datetime,
+    granularity: str = "daily"
 ) -> Dict[str, Any]:
-    allocations = get_resource_allocations(
-        db,
-        user_id=user_id,
-        date_range={"start": start_date, "end": end_date}
-    )
-    
-    daily_load = {}
-    for allocation in allocations:
-        current_date = allocation.start_date
-        while current_date <= allocation.end_date:
-            if current_date not in daily_load:
-                daily_load[current_date] = 0
-            daily_load[current_date] += allocation.allocation_percentage
-            current_date += timedelta(days=1)
-    
+    """Allocated percentage per day, week or month between two dates (inclusive).
+
+    Allocations are clipped to the window; runs of days above
+    RESOURCE_CAPACITY_PERCENTAGE are reported as over_allocations. Only
+    working days of the company calendar count.
+    """
+    start, end = utc_day(start_date), utc_day(end_date)
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    since, until = window_bounds(start, end)
+    rows = db.query(
+        ResourceAllocation.start_date, ResourceAllocation.end_date, ResourceAllocation.allocation_percentage,
+        ReleasePlan.company_id
+    ).outerjoin(Subtask, Subtask.id == ResourceAllocation.subtask_id).outerjoin(
+        Kit, Kit.id == Subtask.kit_id
+    ).outerjoin(ReleasePlan, ReleasePlan.id == Kit.release_plan_id).filter(
+        ResourceAllocation.user_id == user_id,
+        ResourceAllocation.start_date < until,
+        ResourceAllocation.end_date >= since
+    ).all()
+
+    intervals = [
+        (utc_day(allocation_start), utc_day(allocation_end), percentage or 0)
+        for allocation_start, allocation_end, percentage, _ in rows
+    ]
+    # A person works to the calendar of the company whose plans they are allocated to
+    company_id = next((row[3] for row in rows if row[3] is not None), None)
+    calendar = load_company_calendar(db, company_id)
     return {
         "user_id": user_id,
         "period": {
-            "start": start_date,
-            "end": end_date
+            "start": start,
+            "end": end
         },
-        "daily_load": daily_load,
-        "average_load": sum(daily_load.values()) / len(daily_load) if daily_load else 0,
-        "max_load": max(daily_load.values()) if daily_load else 0
-    } 
\ No newline at end of file
+        **resource_load(intervals, start, end, granularity, settings.RESOURCE_CAPACITY_PERCENTAGE, calendar)
+    }
+
+def calculate_resource_heatmap(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    company_id: Optional[int] = None,
+    release_plan_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Users x days load matrix for a company or one release plan.
+
+    All overlapping allocations are read with one query; "load" is a numpy
+    array with one row per entry of "users" and one column per day.
+    Over-allocated days count working days of the company calendar only.
+    """
+    start, end = utc_day(start_date), utc_day(end_date)
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    days = end.toordinal() - start.toordinal() + 1
+    if days > settings.RESOURCE_HEATMAP_MAX_DAYS:
+        raise ValueError(f"A heatmap covers at most {settings.RESOURCE_HEATMAP_MAX_DAYS} days")
+    since, until = window_bounds(start, end)
+
+    query = db.query(
+        ResourceAllocation.user_id, ResourceAllocation.start_date,
+        ResourceAllocation.end_date, ResourceAllocation.allocation_percentage
+    ).join(Subtask, Subtask.id == ResourceAllocation.subtask_id).join(Kit, Kit.id == Subtask.kit_id).filter(
+        ResourceAllocation.start_date < until,
+        ResourceAllocation.end_date >= since
+    )
+    if release_plan_id is not None:
+        query = query.filter(Kit.release_plan_id == release_plan_id)
+    if company_id is not None:
+        query = query.join(ReleasePlan, ReleasePlan.id == Kit.release_plan_id).filter(ReleasePlan.company_id == company_id)
+
+    users, load = load_matrix(
+        (
+            (user_id, utc_day(allocation_start), utc_day(allocation_end), percentage)
+            for user_id, allocation_start, allocation_end, percentage in query.order_by(ResourceAllocation.user_id)
+        ),
+        start, end
+    )
+    if company_id is None and release_plan_id is not None:
+        calendar = load_plan_calendar(db, release_plan_id)
+    else:
+        calendar = load_company_calendar(db, company_id)
+    working = calendar.working_mask(start, end)
+    return {
+        "start": start,
+        "end": end,
+        "users": users,
+        "dates": [date.fromordinal(day) for day in range(start.toordinal(), end.toordinal() + 1)],
+        "working_days": working.tolist(),
+        "load": load,
+        "over_allocated_days": ((load > settings.RESOURCE_CAPACITY_PERCENTAGE) & working).sum(axis=1).tolist(),
+    }
+
+def level_resources(db: Session, release_plan_id: str, apply: bool = False) -> Optional[Dict[str, Any]]:
+    """Propose later start dates that keep every allocated user within capacity.
+
+    Returns the proposed shifts, in working days of the company calendar. With apply=True the subtasks and their
+    allocations are moved in one transaction. Returns None for an unknown
+    plan.
+    """
+    # Applying locks the plan row so the plan cannot change between planning and writing
+    if _plan_analysis(db, release_plan_id, for_update=apply) is None:
+        return None
+    calendar = load_plan_calendar(db, release_plan_id)
+    tasks, dependencies, background, unscheduled = load_leveling_problem(db, release_plan_id, calendar)
+    over_before, over_after = level(tasks, dependencies, background, settings.RESOURCE_CAPACITY_PERCENTAGE)
+    shifts = {task_id: task.new_start - task.start for task_id, task in tasks.items() if task.new_start != task.start}
+
+    def shifted(value: Optional[datetime], task_id: Any) -> Optional[datetime]:
+        return calendar.add_working_days(value, shifts[task_id]) if value is not None else None
+
+    subtasks = db.query(Subtask).filter(Subtask.id.in_(shifts)).order_by(Subtask.id).all() if shifts else []
+    changes = []
+    for subtask in subtasks:
+        changes.append({
+            "subtask_id": subtask.id,
+            "title": subtask.title,
+            "shift_days": shifts[subtask.id],
+            "start_date": subtask.start_date,
+            "end_date": subtask.end_date,
+            "new_start_date": shifted(subtask.start_date, subtask.id),
+            "new_end_date": shifted(subtask.end_date, subtask.id),
+        })
+
+    if apply and shifts:
+        try:
+            for subtask in subtasks:
+                subtask.start_date = shifted(subtask.start_date, subtask.id)
+                subtask.end_date = shifted(subtask.end_date, subtask.id)
+            for allocation in db.query(ResourceAllocation).filter(ResourceAllocation.subtask_id.in_(shifts)):
+                allocation.start_date = shifted(allocation.start_date, allocation.subtask_id)
+                allocation.end_date = shifted(allocation.end_date, allocation.subtask_id)
+            plan_changed(db, release_plan_id, shifts)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    elif apply:
+        db.rollback()
+
+    return {
+        "release_plan_id": release_plan_id,
+        "applied": apply and bool(shifts),
+        "changes": changes,
+        "over_allocated_days": {"before": over_before, "after": over_after},
+        "unscheduled": unscheduled,
+    }
+
+# Company working calendars
+def _calendar_view(company_id: int, calendar: Any) -> Dict[str, Any]:
+    return {
+        "company_id": company_id,
+        "weekend_days": sorted(calendar.weekend),
+        "holidays": sorted(date.fromordinal(day) for day in calendar.holidays),
+        "hours_per_day": calendar.hours_per_day,
+    }
+
+def get_company_calendar(db: Session, company_id: int) -> Optional[Dict[str, Any]]:
+    """The working calendar a company's schedules use, with defaults filled in"""
+    if db.query(Company.id).filter(Company.id == company_id).first() is None:
+        return None
+    return _calendar_view(company_id, load_company_calendar(db, company_id))
+
+def update_company_calendar(db: Session, company_id: int, calendar: schemas.CalendarConfig) -> Optional[Dict[str, Any]]:
+    """Replace a company's working calendar; every plan of the company is rescheduled on its next read"""
+    company = db.query(Company).filter(Company.id == company_id).first()
+    if company is None:
+        return None
+    config = calendar.model_dump(mode="json")
+    compiled = compile_calendar(config)
+    company.working_calendar = config
+    plan_ids = [row[0] for row in db.query(ReleasePlan.id).filter(ReleasePlan.company_id == company_id)]
+    for release_plan_id in plan_ids:
+        plan_changed(db, release_plan_id)
+    db.commit()
+    # Durations and lags of every task change, so patching cached networks is not enough
+    for release_plan_id in plan_ids:
+        analysis_cache.invalidate(str(release_plan_id))
+    return _calendar_view(company_id, compiled)
+
+# What-if sandboxes
+sandboxes = SandboxStore(settings.SANDBOX_TTL_SECONDS, settings.SANDBOX_MAX_COUNT)
+
+def _sandbox_view(sandbox_id: str, snapshot: Any) -> Dict[str, Any]:
+    return {"sandbox_id": sandbox_id, **snapshot.analysis()}
+
+def create_sandbox(db: Session, release_plan_id: str) -> Optional[Dict[str, Any]]:
+    """Snapshot a plan into a new sandbox; None for an unknown plan"""
+    snapshot = load_snapshot(db, release_plan_id, settings.RESOURCE_CAPACITY_PERCENTAGE)
+    if snapshot is None:
+        return None
+    sandbox_id = sandboxes.add(snapshot)
+    with snapshot.lock:
+        return _sandbox_view(sandbox_id, snapshot)
+
+def get_sandbox(sandbox_id: str) -> Optional[Dict[str, Any]]:
+    snapshot = sandboxes.get(sandbox_id)
+    if snapshot is None:
+        return None
+    with snapshot.lock:
+        return _sandbox_view(sandbox_id, snapshot)
+
+def edit_sandbox(sandbox_id: str, edits: List[schemas.SandboxEdit]) -> Optional[Dict[str, Any]]:
+    """Apply a batch of edits to a sandbox; an invalid edit raises ValueError and leaves it unchanged"""
+    snapshot = sandboxes.get(sandbox_id)
+    if snapshot is None:
+        return None
+    with snapshot.lock:
+        snapshot.apply(edits)
+        return _sandbox_view(sandbox_id, snapshot)
+
+def delete_sandbox(sandbox_id: str) -> bool:
+    return sandboxes.discard(sandbox_id)
+
+def commit_sandbox(db: Session, sandbox_id: str) -> Optional[Dict[str, Any]]:
+    """Write a sandbox's changes to its plan in one transaction and drop it.
+
+    Raises SandboxConflict if the plan has changed since the sandbox was
+    taken; the sandbox is kept so it can be inspected or discarded.
+    """
+    snapshot = sandboxes.get(sandbox_id)
+    if snapshot is None:
+        return None
+    with snapshot.lock:
+        # Locking the plan row keeps other writers out between the check and the commit
+        analysis = _plan_analysis(db, snapshot.release_plan_id, for_update=True)
+        if analysis is None or analysis.version != snapshot.version:
+            db.rollback()
+            raise SandboxConflict("The release plan has changed since the sandbox was created")
+        try:
+            counts, task_ids = snapshot.write(db)
+            if any(counts.values()):
+                plan_changed(db, snapshot.release_plan_id, task_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    sandboxes.discard(sandbox_id)
+    return {"sandbox_id": sandbox_id, "release_plan_id": snapshot.release_plan_id, "changes": counts}
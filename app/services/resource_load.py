@@ -0,0 +1,213 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+import msgpack
+import numpy as np
+from app.services.working_calendar import CONTINUOUS, WorkingCalendar
+
+HEATMAP_MEDIA_TYPE = "application/msgpack"
+
+GRANULARITIES = ("daily", "weekly", "monthly", "quarterly", "yearly")
+
+# (first day, last day, allocation percentage); both days inclusive
+Interval = Tuple[date, date, int]
+# (first day ordinal, day ordinal after the last, load)
+Segment = Tuple[int, int, int]
+
+def utc_day(value: datetime) -> date:
+    """Calendar day of a timestamp in UTC; naive timestamps are taken as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+def window_bounds(start: date, end: date) -> Tuple[datetime, datetime]:
+    """UTC timestamps [from, until) covering the days start..end"""
+    since = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+    until = datetime(end.year, end.month, end.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return since, until
+
+def load_segments(intervals: Iterable[Interval], start: date, end: date) -> List[Segment]:
+    """Sweep over interval boundaries, clipped to start..end.
+
+    Returns consecutive segments of constant load covering the whole window,
+    in O(n log n) for n intervals regardless of how long they are.
+    """
+    first, last = start.toordinal(), end.toordinal() + 1
+    deltas: Dict[int, int] = {}
+    for interval_start, interval_end, percentage in intervals:
+        since = max(interval_start.toordinal(), first)
+        until = min(interval_end.toordinal() + 1, last)
+        if since >= until or not percentage:
+            continue
+        deltas[since] = deltas.get(since, 0) + percentage
+        deltas[until] = deltas.get(until, 0) - percentage
+
+    segments = []
+    load, cursor = 0, first
+    for boundary in sorted(deltas):
+        if boundary > cursor:
+            segments.append((cursor, boundary, load))
+            cursor = boundary
+        load += deltas[boundary]
+    if cursor < last:
+        segments.append((cursor, last, load))
+    return segments
+
+def _next_period(day: date, granularity: str) -> date:
+    if granularity == "weekly":
+        return day + timedelta(days=7 - day.weekday())
+    if granularity == "monthly":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    if granularity == "quarterly":
+        month = (day.month - 1) // 3 * 3 + 4
+        return date(day.year + (month > 12), (month - 1) % 12 + 1, 1)
+    if granularity == "yearly":
+        return date(day.year + 1, 1, 1)
+    return day + timedelta(days=1)
+
+def period_bounds(start: date, end: date, granularity: str) -> List[Tuple[int, int]]:
+    """Day ordinals [from, until) of each period in start..end.
+
+    Weeks start on Monday, months, quarters and years on their 1st day;
+    the first and last periods are clipped to the window.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    periods = []
+    day = start
+    while day <= end:
+        following = min(_next_period(day, granularity), end + timedelta(days=1))
+        periods.append((day.toordinal(), following.toordinal()))
+        day = following
+    return periods
+
+def bucket_load(
+    segments: List[Segment],
+    periods: List[Tuple[int, int]],
+    calendar: WorkingCalendar = CONTINUOUS
+) -> List[Dict[str, Any]]:
+    """Average and peak load per period over its working days, merging the two sorted lists in one pass"""
+    buckets = []
+    index = 0
+    for since, until in periods:
+        while segments[index][1] <= since:
+            index += 1
+        total = peak = 0
+        position = index
+        while position < len(segments) and segments[position][0] < until:
+            segment_start, segment_end, load = segments[position]
+            days = calendar.count(max(segment_start, since), min(segment_end, until))
+            total += load * days
+            if days:
+                peak = max(peak, load)
+            position += 1
+        days = calendar.count(since, until)
+        buckets.append({
+            "start": date.fromordinal(since),
+            "end": date.fromordinal(until - 1),
+            "working_days": days,
+            "average_load": total / days if days else 0,
+            "max_load": peak,
+        })
+    return buckets
+
+def over_allocations(
+    segments: List[Segment],
+    capacity: int,
+    calendar: WorkingCalendar = CONTINUOUS
+) -> List[Dict[str, Any]]:
+    """Maximal runs of days loaded above capacity, with their peak and working days.
+
+    Load on days off does not count; a run may span a weekend between
+    over-allocated working days.
+    """
+    runs: List[List[int]] = []
+    for since, until, load in segments:
+        days = calendar.count(since, until)
+        if load <= capacity or not days:
+            continue
+        if runs and calendar.count(runs[-1][1], since) == 0:
+            runs[-1][1] = until
+            runs[-1][2] = max(runs[-1][2], load)
+            runs[-1][3] += days
+        else:
+            runs.append([since, until, load, days])
+    return [
+        {"start": date.fromordinal(since), "end": date.fromordinal(until - 1), "peak_load": peak, "working_days": days}
+        for since, until, peak, days in runs
+    ]
+
+def resource_load(
+    intervals: Iterable[Interval],
+    start: date,
+    end: date,
+    granularity: str = "daily",
+    capacity: int = 100,
+    calendar: WorkingCalendar = CONTINUOUS
+) -> Dict[str, Any]:
+    """Load per period plus over-allocated intervals for one person's allocations.
+
+    Averages and over-allocated days count working days of calendar only.
+    """
+    periods = period_bounds(start, end, granularity)
+    segments = load_segments(intervals, start, end)
+    days = calendar.count(start.toordinal(), end.toordinal() + 1)
+    return {
+        "granularity": granularity,
+        "working_days": days,
+        "load": bucket_load(segments, periods, calendar),
+        "average_load": sum(load * calendar.count(since, until) for since, until, load in segments) / days if days > 0 else 0,
+        "max_load": max((load for since, until, load in segments if calendar.count(since, until)), default=0),
+        "over_allocations": over_allocations(segments, capacity, calendar),
+    }
+
+def load_matrix(
+    allocations: Iterable[Tuple[str, date, date, int]],
+    start: date,
+    end: date
+) -> Tuple[List[str], np.ndarray]:
+    """Dense users x days load for start..end from (user, first day, last day, percentage).
+
+    Users are numbered in the order they first appear.
+
+    Every allocation adds +percentage at its clipped first day and
+    -percentage after its last in a difference matrix; one cumulative sum
+    along the day axis then gives the load of every user on every day.
+    """
+    users: Dict[str, int] = {}
+    user_index, since, until, percentage = [], [], [], []
+    for user_id, first_day, last_day, value in allocations:
+        user_index.append(users.setdefault(user_id, len(users)))
+        since.append(first_day.toordinal())
+        until.append(last_day.toordinal() + 1)
+        percentage.append(value or 0)
+
+    first, days = start.toordinal(), end.toordinal() - start.toordinal() + 1
+    since = np.clip(np.array(since, dtype=np.int64) - first, 0, days)
+    until = np.clip(np.array(until, dtype=np.int64) - first, 0, days)
+    rows = np.array(user_index, dtype=np.int64)
+    values = np.array(percentage, dtype=np.int32)
+    overlapping = since < until
+
+    deltas = np.zeros((len(users), days + 1), dtype=np.int32)
+    np.add.at(deltas, (rows[overlapping], since[overlapping]), values[overlapping])
+    np.add.at(deltas, (rows[overlapping], until[overlapping]), -values[overlapping])
+    return sorted(users, key=users.get), np.cumsum(deltas[:, :days], axis=1, dtype=np.int32)
+
+def heatmap_document(heatmap: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON form of a heatmap: the matrix as one list of daily loads per user"""
+    return {**heatmap, "load": heatmap["load"].tolist()}
+
+def encode_heatmap(heatmap: Dict[str, Any]) -> bytes:
+    """MessagePack form of a heatmap: the matrix as little-endian row-major bytes.
+
+    Loads fit in uint16 unless someone is booked above 65535%, so the
+    browser can usually view the bytes as a Uint16Array.
+    """
+    load = heatmap["load"]
+    dtype = "<u2" if load.size == 0 or (load.min() >= 0 and load.max() <= 0xFFFF) else "<i4"
+    return msgpack.packb({
+        **heatmap,
+        "load": np.ascontiguousarray(load, dtype=dtype).tobytes(),
+        "shape": list(load.shape),
+        "dtype": dtype,
+    }, default=str, use_bin_type=True)
@@ -0,0 +1,107 @@
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import case, cast, event, func, inspect, Integer, select, update
+from sqlalchemy.orm import Session
+from app.models.database import Kit, ReleasePlan, Subtask, SubtaskStatus
+
+# (estimated, actual, completed) hours
+Totals = Tuple[float, float, float]
+
+def _is_done(status: Any) -> bool:
+    return status in (SubtaskStatus.DONE, SubtaskStatus.DONE.value)
+
+def _totals(estimated: Any, actual: Any, status: Any) -> Totals:
+    estimated = float(estimated or 0)
+    return estimated, float(actual or 0), estimated if _is_done(status) else 0.0
+
+def _before(obj: Any, key: str) -> Any:
+    # Value as of the last load or flush, before this flush's change
+    history = inspect(obj).attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(obj, key)
+
+def _kit_id(value: Any) -> Any:
+    # Services may assign kit ids as strings straight from the URL
+    return value if value is None or isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+def _add(deltas: Dict[Any, List[float]], key: Any, totals: Totals, sign: int) -> None:
+    if key is None:
+        return
+    delta = deltas[key]
+    for index, value in enumerate(totals):
+        delta[index] += sign * value
+
+def _subtask_deltas(session: Session) -> Dict[Any, List[float]]:
+    """Change of each kit's totals caused by the subtasks in this flush"""
+    deltas: Dict[Any, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+    for obj in session.new:
+        if isinstance(obj, Subtask):
+            _add(deltas, _kit_id(obj.kit_id), _totals(obj.estimated_hours, obj.actual_hours, obj.status), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Subtask):
+            _add(deltas, _kit_id(_before(obj, "kit_id")), _totals(
+                _before(obj, "estimated_hours"), _before(obj, "actual_hours"), _before(obj, "status")
+            ), -1)
+    for obj in session.dirty:
+        if isinstance(obj, Subtask) and session.is_modified(obj):
+            _add(deltas, _kit_id(_before(obj, "kit_id")), _totals(
+                _before(obj, "estimated_hours"), _before(obj, "actual_hours"), _before(obj, "status")
+            ), -1)
+            _add(deltas, _kit_id(obj.kit_id), _totals(obj.estimated_hours, obj.actual_hours, obj.status), 1)
+    return {kit_id: delta for kit_id, delta in deltas.items() if any(delta)}
+
+def _plan_ids(session: Session, kit_ids: List[Any]) -> Dict[Any, Any]:
+    # Kits deleted in this flush are gone from the table but still in the session
+    plans = {
+        obj.id: _before(obj, "release_plan_id")
+        for obj in session.deleted if isinstance(obj, Kit) and obj.id in kit_ids
+    }
+    missing = [kit_id for kit_id in kit_ids if kit_id not in plans]
+    if missing:
+        rows = session.connection().execute(select(Kit.id, Kit.release_plan_id).where(Kit.id.in_(missing)))
+        plans.update({kit_id: plan_id for kit_id, plan_id in rows})
+    return plans
+
+def _apply(session: Session, model: Any, key: Any, delta: List[float]) -> None:
+    """Add delta to a kit's or plan's totals and recompute its percentage in the same UPDATE"""
+    estimated = model.estimated_hours + delta[0]
+    completed = model.completed_hours + delta[2]
+    session.connection().execute(
+        update(model).where(model.id == key).values(
+            estimated_hours=estimated,
+            actual_hours=model.actual_hours + delta[1],
+            completed_hours=completed,
+            progress_percentage=case((estimated > 0, cast(func.floor(completed * 100 / estimated), Integer)), else_=0),
+            # A rollup is not an edit of the kit or plan itself
+            updated_at=model.updated_at,
+        )
+    )
+
+@event.listens_for(Session, "after_flush")
+def _roll_up(session: Session, flush_context: Any) -> None:
+    """Keep kit and plan hours and progress_percentage in step with their subtasks.
+
+    Only the difference each flushed subtask makes is applied, with
+    column + delta updates, so concurrent writers never overwrite each
+    other's totals and reads need no aggregation. Progress is the share
+    of estimated hours on done subtasks.
+    """
+    kit_deltas = _subtask_deltas(session)
+    plan_deltas: Dict[Any, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+    for kit_id, plan_id in _plan_ids(session, list(kit_deltas)).items():
+        _add(plan_deltas, plan_id, tuple(kit_deltas[kit_id]), 1)
+
+    # A kit moved to another plan takes its totals along
+    for obj in session.dirty:
+        if isinstance(obj, Kit) and inspect(obj).attrs.release_plan_id.history.has_changes():
+            totals = (obj.estimated_hours or 0, obj.actual_hours or 0, obj.completed_hours or 0)
+            _add(plan_deltas, _before(obj, "release_plan_id"), totals, -1)
+            _add(plan_deltas, obj.release_plan_id, totals, 1)
+
+    for kit_id, delta in kit_deltas.items():
+        _apply(session, Kit, kit_id, delta)
+    for plan_id, delta in plan_deltas.items():
+        if any(delta):
+            _apply(session, ReleasePlan, plan_id, delta)
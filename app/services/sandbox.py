@@ -0,0 +1,447 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models.database import Kit, ReleasePlan, ResourceAllocation, Subtask, TaskDependency
+from app.schemas.release import SandboxEdit, SandboxOperation
+from app.services.critical_path import ScheduleNetwork, ScheduleTask, dependency_from_row, dependency_query, plan_origin, schedule_task_from_row
+from app.services.dependency_graph import DependencyGraph
+from app.services.plan_analysis import plan_version
+from app.services.resource_load import Interval, load_segments, over_allocations, utc_day
+from app.services.working_calendar import WorkingCalendar, load_plan_calendar
+
+class SandboxConflict(ValueError):
+    """The plan was changed by someone else after the sandbox was taken"""
+
+class SandboxKit:
+    __slots__ = ("id", "start_date", "end_date")
+
+    def __init__(self, id: Any, start_date: Optional[datetime], end_date: Optional[datetime]):
+        self.id = id
+        self.start_date = start_date
+        self.end_date = end_date
+
+class SandboxTask:
+    """A subtask as far as scheduling and writing it back are concerned"""
+
+    __slots__ = ("id", "kit_id", "title", "estimated_hours", "start_date", "end_date")
+
+    def __init__(self, id: int, kit_id: Any, title: Optional[str], estimated_hours: Optional[float],
+                 start_date: Optional[datetime], end_date: Optional[datetime]):
+        self.id = id
+        self.kit_id = kit_id
+        self.title = title
+        self.estimated_hours = estimated_hours
+        self.start_date = start_date
+        self.end_date = end_date
+
+class SandboxAllocation:
+    __slots__ = ("id", "subtask_id", "user_id", "percentage", "start_date", "end_date")
+
+    def __init__(self, id: Any, subtask_id: int, user_id: str, percentage: Optional[int],
+                 start_date: Optional[datetime], end_date: Optional[datetime]):
+        self.id = id
+        self.subtask_id = subtask_id
+        self.user_id = user_id
+        self.percentage = percentage
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def interval(self) -> Optional[Interval]:
+        if self.start_date is None or self.end_date is None:
+            return None
+        return utc_day(self.start_date), utc_day(self.end_date), self.percentage or 0
+
+# (source, target) -> (dependency_type, lag_days) as stored
+Dependencies = Dict[Tuple[int, int], Tuple[Optional[str], Optional[int]]]
+
+def _dates(record: Any) -> Tuple[Optional[datetime], Optional[datetime]]:
+    return record.start_date, record.end_date
+
+def _shifted(value: Optional[datetime], shift: timedelta) -> Optional[datetime]:
+    return value + shift if value is not None else None
+
+class PlanSnapshot:
+    """An in-memory copy of a plan's schedule that what-if edits are made to.
+
+    Each batch of edits reschedules only the subtasks it touched (and what
+    they reach) on a private CPM network and recomputes the load of only
+    the users whose allocations moved. A batch applies completely or, on
+    the first invalid edit, not at all.
+    """
+
+    def __init__(
+        self,
+        release_plan_id: Any,
+        version: Optional[float],
+        origin: datetime,
+        kits: Dict[Any, SandboxKit],
+        tasks: Dict[int, SandboxTask],
+        dependencies: Dependencies,
+        allocations: Dict[Any, SandboxAllocation],
+        background: Dict[str, List[Interval]],
+        capacity: int,
+        calendar: WorkingCalendar
+    ):
+        self.release_plan_id = release_plan_id
+        self.version = version
+        self.origin = origin
+        self.kits = kits
+        self.tasks = tasks
+        self.dependencies = dependencies
+        self.allocations = allocations
+        self.background = background
+        self.capacity = capacity
+        self.calendar = calendar
+        self.lock = threading.Lock()
+        self.edits = 0
+        self.rescheduled = 0
+
+        self.graph = DependencyGraph(dependencies)
+        self.task_allocations: Dict[int, Set[Any]] = defaultdict(set)
+        self.user_allocations: Dict[str, Set[Any]] = defaultdict(set)
+        for allocation in allocations.values():
+            self.task_allocations[allocation.subtask_id].add(allocation.id)
+            self.user_allocations[allocation.user_id].add(allocation.id)
+
+        # What the database holds, diffed against on commit
+        self.baseline_kits = {kit_id: _dates(kit) for kit_id, kit in kits.items()}
+        self.baseline_tasks = {task_id: (task.estimated_hours, *_dates(task)) for task_id, task in tasks.items()}
+        self.baseline_dependencies = dict(dependencies)
+        self.baseline_allocations = {allocation_id: _dates(allocation) for allocation_id, allocation in allocations.items()}
+
+        self.network = ScheduleNetwork(
+            origin,
+            {task_id: self._schedule_task(task) for task_id, task in tasks.items()},
+            [dependency_from_row(source, target, *rest, calendar) for (source, target), rest in dependencies.items()],
+            calendar
+        )
+        self.network.compute()
+        self.baseline_finish = self.network.project_finish
+        self.user_load: Dict[str, Dict[str, Any]] = {}
+        for user_id in self.user_allocations:
+            self._load_user(user_id)
+        self.baseline_over_allocated = sum(load["over_allocated_days"] for load in self.user_load.values())
+
+    def _schedule_task(self, task: SandboxTask) -> ScheduleTask:
+        return schedule_task_from_row(task.id, task.title, task.estimated_hours, task.start_date, self.origin, self.calendar)
+
+    def _load_user(self, user_id: str) -> None:
+        intervals = list(self.background.get(user_id, ()))
+        for allocation_id in self.user_allocations.get(user_id, ()):
+            interval = self.allocations[allocation_id].interval()
+            if interval is not None:
+                intervals.append(interval)
+        if not intervals:
+            self.user_load.pop(user_id, None)
+            return
+        segments = load_segments(intervals, min(first for first, _, _ in intervals), max(last for _, last, _ in intervals))
+        runs = over_allocations(segments, self.capacity, self.calendar)
+        self.user_load[user_id] = {
+            "user_id": user_id,
+            "peak_load": max((load for since, until, load in segments if self.calendar.count(since, until)), default=0),
+            "over_allocated_days": sum(run["working_days"] for run in runs),
+            "over_allocations": runs,
+        }
+
+    # Edits; each records how to undo itself so a failed batch can be rolled back
+    def _task(self, task_id: Optional[int]) -> SandboxTask:
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise ValueError(f"Unknown subtask: {task_id}")
+        return task
+
+    def _move(self, record: Any, shift: timedelta, undo: List[Callable[[], None]]) -> None:
+        start_date, end_date = _dates(record)
+        undo.append(lambda: (setattr(record, "start_date", start_date), setattr(record, "end_date", end_date)))
+        record.start_date, record.end_date = _shifted(start_date, shift), _shifted(end_date, shift)
+
+    def _shift_task(self, task: SandboxTask, shift: timedelta, undo: List[Callable[[], None]], users: Set[str]) -> None:
+        self._move(task, shift, undo)
+        for allocation_id in self.task_allocations.get(task.id, ()):
+            allocation = self.allocations[allocation_id]
+            self._move(allocation, shift, undo)
+            users.add(allocation.user_id)
+
+    def _remove_task(self, task: SandboxTask, undo: List[Callable[[], None]], dirty: Set[Any], users: Set[str]) -> None:
+        edges = [(source, task.id) for source in self.graph.predecessors.get(task.id, ())]
+        edges += [(task.id, target) for target in self.graph.successors.get(task.id, ())]
+        for edge in edges:
+            self._remove_dependency(edge, undo)
+            dirty.update(edge)
+        allocations = [self.allocations.pop(allocation_id) for allocation_id in self.task_allocations.pop(task.id, ())]
+        for allocation in allocations:
+            self.user_allocations[allocation.user_id].discard(allocation.id)
+            users.add(allocation.user_id)
+        del self.tasks[task.id]
+
+        def restore() -> None:
+            self.tasks[task.id] = task
+            for allocation in allocations:
+                self.allocations[allocation.id] = allocation
+                self.task_allocations[task.id].add(allocation.id)
+                self.user_allocations[allocation.user_id].add(allocation.id)
+        undo.append(restore)
+
+    def _add_dependency(self, edge: Tuple[int, int], value: Tuple[str, int], undo: List[Callable[[], None]]) -> None:
+        previous = self.dependencies.get(edge)
+        if previous is None:
+            self.graph.check_edge(*edge)
+        self.dependencies[edge] = value
+        self.graph.add(*edge)
+        undo.append(lambda: self._restore_dependency(edge, previous))
+
+    def _remove_dependency(self, edge: Tuple[int, int], undo: List[Callable[[], None]]) -> None:
+        previous = self.dependencies.pop(edge, None)
+        if previous is None:
+            raise ValueError(f"Unknown dependency: {edge[0]} -> {edge[1]}")
+        self.graph.remove(*edge)
+        undo.append(lambda: self._restore_dependency(edge, previous))
+
+    def _restore_dependency(self, edge: Tuple[int, int], value: Optional[Tuple[Optional[str], Optional[int]]]) -> None:
+        if value is None:
+            self.dependencies.pop(edge, None)
+            self.graph.remove(*edge)
+        else:
+            self.dependencies[edge] = value
+            self.graph.add(*edge)
+
+    def _edit(self, edit: SandboxEdit, undo: List[Callable[[], None]], dirty: Set[Any], users: Set[str]) -> None:
+        if edit.op == SandboxOperation.SHIFT_KIT:
+            kit = self.kits.get(edit.kit_id)
+            if kit is None:
+                raise ValueError(f"Unknown kit: {edit.kit_id}")
+            if not edit.days:
+                raise ValueError("shift_kit needs days")
+            shift = timedelta(days=edit.days)
+            self._move(kit, shift, undo)
+            for task in self.tasks.values():
+                if task.kit_id == kit.id:
+                    self._shift_task(task, shift, undo, users)
+                    dirty.add(task.id)
+        elif edit.op == SandboxOperation.SHIFT_SUBTASK:
+            task = self._task(edit.subtask_id)
+            if not edit.days:
+                raise ValueError("shift_subtask needs days")
+            self._shift_task(task, timedelta(days=edit.days), undo, users)
+            dirty.add(task.id)
+        elif edit.op == SandboxOperation.UPDATE_SUBTASK:
+            task = self._task(edit.subtask_id)
+            values = {key: getattr(edit, key) for key in ("estimated_hours", "start_date", "end_date") if key in edit.model_fields_set}
+            if not values:
+                raise ValueError("update_subtask needs estimated_hours, start_date or end_date")
+            previous = {key: getattr(task, key) for key in values}
+
+            def restore() -> None:
+                for key, value in previous.items():
+                    setattr(task, key, value)
+            undo.append(restore)
+            for key, value in values.items():
+                setattr(task, key, value)
+            dirty.add(task.id)
+        elif edit.op == SandboxOperation.REMOVE_SUBTASK:
+            task = self._task(edit.subtask_id)
+            self._remove_task(task, undo, dirty, users)
+            dirty.add(task.id)
+        else:
+            edge = (self._task(edit.subtask_id).id, self._task(edit.target_task_id).id)
+            if edit.op == SandboxOperation.ADD_DEPENDENCY:
+                self._add_dependency(edge, (edit.dependency_type.value, edit.lag_days), undo)
+            else:
+                self._remove_dependency(edge, undo)
+            dirty.update(edge)
+
+    def apply(self, edits: Iterable[SandboxEdit]) -> None:
+        """Apply a batch of edits and reschedule around them; raises ValueError and changes nothing if any is invalid"""
+        undo: List[Callable[[], None]] = []
+        dirty: Set[Any] = set()
+        users: Set[str] = set()
+        count = 0
+        try:
+            for edit in edits:
+                self._edit(edit, undo, dirty, users)
+                count += 1
+        except ValueError:
+            for step in reversed(undo):
+                step()
+            raise
+
+        tasks = {task_id: self._schedule_task(self.tasks[task_id]) for task_id in dirty if task_id in self.tasks}
+        edges = set()
+        for task_id in tasks:
+            edges.update((source, task_id) for source in self.graph.predecessors.get(task_id, ()))
+            edges.update((task_id, target) for target in self.graph.successors.get(task_id, ()))
+        dependencies = [dependency_from_row(source, target, *self.dependencies[source, target], self.calendar) for source, target in edges]
+        self.rescheduled = self.network.apply_changes(dirty, tasks, dependencies) if dirty else 0
+        for user_id in users:
+            self._load_user(user_id)
+        self.edits += count
+
+    def analysis(self) -> Dict[str, Any]:
+        """Critical path and resource load of the snapshot as it stands, next to the plan's"""
+        report = self.network.report() if self.network.tasks else {"critical_path": [], "total_duration": 0}
+        resources = sorted(self.user_load.values(), key=lambda load: load["user_id"])
+        return {
+            "release_plan_id": self.release_plan_id,
+            "edits": self.edits,
+            "rescheduled_tasks": self.rescheduled,
+            "critical_path": report["critical_path"],
+            "total_duration": report["total_duration"],
+            "project_start": report.get("project_start"),
+            "project_finish": report.get("project_finish"),
+            "baseline_finish": self.network.at(self.baseline_finish, finish=True) if self.baseline_tasks else None,
+            "finish_delta_hours": self.network.project_finish - self.baseline_finish,
+            "resources": resources,
+            "over_allocated_days": {
+                "baseline": self.baseline_over_allocated,
+                "current": sum(load["over_allocated_days"] for load in resources),
+            },
+        }
+
+    def write(self, db: Session) -> Tuple[Dict[str, int], Set[Any]]:
+        """Write the snapshot's changes to the session without committing.
+
+        Returns the number of changed rows per kind and the ids of the
+        subtasks whose schedule changed.
+        """
+        changed_tasks = {
+            task_id: task for task_id, task in self.tasks.items()
+            if self.baseline_tasks[task_id] != (task.estimated_hours, *_dates(task))
+        }
+        removed_tasks = set(self.baseline_tasks) - set(self.tasks)
+        changed_kits = {kit_id: kit for kit_id, kit in self.kits.items() if self.baseline_kits[kit_id] != _dates(kit)}
+        changed_allocations = {
+            allocation_id: allocation for allocation_id, allocation in self.allocations.items()
+            if self.baseline_allocations[allocation_id] != _dates(allocation)
+        }
+        added = {edge: value for edge, value in self.dependencies.items() if self.baseline_dependencies.get(edge) != value}
+        removed = [edge for edge in self.baseline_dependencies if edge not in self.dependencies or edge in added]
+
+        if changed_tasks:
+            for subtask in db.query(Subtask).filter(Subtask.id.in_(changed_tasks)):
+                task = changed_tasks[subtask.id]
+                subtask.estimated_hours, subtask.start_date, subtask.end_date = task.estimated_hours, task.start_date, task.end_date
+        if changed_kits:
+            for kit in db.query(Kit).filter(Kit.id.in_(changed_kits)):
+                kit.start_date, kit.end_date = _dates(changed_kits[kit.id])
+        if changed_allocations:
+            for allocation in db.query(ResourceAllocation).filter(ResourceAllocation.id.in_(changed_allocations)):
+                allocation.start_date, allocation.end_date = _dates(changed_allocations[allocation.id])
+        for source, target in removed:
+            db.query(TaskDependency).filter(
+                TaskDependency.source_task_id == source, TaskDependency.target_task_id == target
+            ).delete(synchronize_session=False)
+        if removed_tasks:
+            # Allocations do not cascade with their subtask
+            db.query(ResourceAllocation).filter(ResourceAllocation.subtask_id.in_(removed_tasks)).delete(synchronize_session=False)
+            for subtask in db.query(Subtask).filter(Subtask.id.in_(removed_tasks)):
+                db.delete(subtask)
+        for (source, target), (dependency_type, lag_days) in added.items():
+            db.add(TaskDependency(source_task_id=source, target_task_id=target, dependency_type=dependency_type, lag_days=lag_days))
+
+        touched = set(changed_tasks) | removed_tasks
+        for edge in removed + list(added):
+            touched.update(edge)
+        counts = {
+            "subtasks": len(changed_tasks),
+            "removed_subtasks": len(removed_tasks),
+            "kits": len(changed_kits),
+            "allocations": len(changed_allocations),
+            "added_dependencies": len(added),
+            "removed_dependencies": len(removed),
+        }
+        return counts, touched
+
+def load_snapshot(db: Session, release_plan_id: str, capacity: int) -> Optional[PlanSnapshot]:
+    """Snapshot a plan's kits, subtasks, dependencies and allocations, plus the
+    load its users carry in other plans, with one query per table"""
+    plan = db.query(ReleasePlan.start_date, ReleasePlan.updated_at).filter(ReleasePlan.id == release_plan_id).first()
+    if plan is None:
+        return None
+    kits = {
+        kit_id: SandboxKit(kit_id, start_date, end_date)
+        for kit_id, start_date, end_date in db.query(Kit.id, Kit.start_date, Kit.end_date).filter(Kit.release_plan_id == release_plan_id)
+    }
+    tasks = {
+        row[0]: SandboxTask(*row)
+        for row in db.query(
+            Subtask.id, Subtask.kit_id, Subtask.title, Subtask.estimated_hours, Subtask.start_date, Subtask.end_date
+        ).join(Kit, Kit.id == Subtask.kit_id).filter(Kit.release_plan_id == release_plan_id)
+    }
+    dependencies = {(source, target): (dependency_type, lag_days) for source, target, dependency_type, lag_days in dependency_query(db, release_plan_id)}
+    allocations = {
+        row[0]: SandboxAllocation(*row)
+        for row in db.query(
+            ResourceAllocation.id, ResourceAllocation.subtask_id, ResourceAllocation.user_id,
+            ResourceAllocation.allocation_percentage, ResourceAllocation.start_date, ResourceAllocation.end_date
+        ).join(Subtask, Subtask.id == ResourceAllocation.subtask_id).join(Kit, Kit.id == Subtask.kit_id).filter(
+            Kit.release_plan_id == release_plan_id
+        )
+    }
+
+    background: Dict[str, List[Interval]] = defaultdict(list)
+    users = {allocation.user_id for allocation in allocations.values()}
+    if users:
+        rows = db.query(
+            ResourceAllocation.user_id, ResourceAllocation.allocation_percentage,
+            ResourceAllocation.start_date, ResourceAllocation.end_date
+        ).outerjoin(Subtask, Subtask.id == ResourceAllocation.subtask_id).outerjoin(Kit, Kit.id == Subtask.kit_id).filter(
+            ResourceAllocation.user_id.in_(users),
+            ResourceAllocation.start_date.isnot(None),
+            ResourceAllocation.end_date.isnot(None),
+            or_(Kit.release_plan_id != release_plan_id, Kit.release_plan_id.is_(None))
+        )
+        for user_id, percentage, start_date, end_date in rows:
+            background[user_id].append((utc_day(start_date), utc_day(end_date), percentage or 0))
+
+    origin = plan_origin(plan[0], (task.start_date for task in tasks.values()))
+    return PlanSnapshot(
+        release_plan_id, plan_version(plan[1]), origin, kits, tasks, dependencies, allocations, background, capacity,
+        load_plan_calendar(db, release_plan_id)
+    )
+
+class SandboxStore:
+    """Sandboxes by id, dropped after ttl_seconds without use; past max_count
+    the least recently used one goes first"""
+
+    def __init__(self, ttl_seconds: int, max_count: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_count = max_count
+        self._entries: "OrderedDict[str, Tuple[PlanSnapshot, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            sandbox_id, (_, used) = next(iter(self._entries.items()))
+            if now - used < self.ttl_seconds:
+                break
+            del self._entries[sandbox_id]
+
+    def add(self, snapshot: PlanSnapshot) -> str:
+        sandbox_id = str(uuid.uuid4())
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._entries[sandbox_id] = (snapshot, now)
+            while len(self._entries) > self.max_count:
+                self._entries.popitem(last=False)
+        return sandbox_id
+
+    def get(self, sandbox_id: str) -> Optional[PlanSnapshot]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(sandbox_id)
+            if entry is None:
+                return None
+            self._entries[sandbox_id] = (entry[0], now)
+            self._entries.move_to_end(sandbox_id)
+            return entry[0]
+
+    def discard(self, sandbox_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(sandbox_id, None) is not None
@@ -1,11 +1,30 @@
-from sqlalchemy.orm import Session
-from app.models.database import Company, Platform, Sheet, Row
+from sqlalchemy import String, Integer, false, insert, literal, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql import func
+from app.models.database import Company, Platform, Sheet, Row, SheetColumn
 from app.schemas.sheet import (
     CompanyCreate, PlatformCreate, SheetCreate, SheetUpdate,
-    RowCreate, RowUpdate
+    RowCreate, RowUpdate, SheetInstantiate
 )
+from app.schemas import sheet as schemas
+from app.utils.loading import LoadingProfile, Relation, build_loading_profile
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import uuid
+
+# Relationships of a sheet that clients can request with ?include=
+SHEET_RELATIONS = {
+    "company": Relation(schemas.Company, [joinedload(Sheet.company)]),
+    "platform": Relation(schemas.Platform, [joinedload(Sheet.platform)]),
+    "rows": Relation(List[schemas.Row], [selectinload(Sheet.rows)]),
+}
+
+def sheet_loading_profile(include: Optional[str] = None, fields: Optional[str] = None) -> LoadingProfile:
+    return build_loading_profile(
+        Sheet, schemas.Sheet, SHEET_RELATIONS, include, fields,
+        default_include=("company", "platform", "rows")
+    )
 
 # Company operations
 def create_company(db: Session, company: CompanyCreate) -> Company:
@@ -18,8 +37,11 @@ def create_company(db: Session, company: CompanyCreate) -> Company:
 def get_company(db: Session, company_id: int) -> Optional[Company]:
     return db.query(Company).filter(Company.id == company_id).first()
 
-def get_companies(db: Session, skip: int = 0, limit: int = 100) -> List[Company]:
-    return db.query(Company).offset(skip).limit(limit).all()
+def get_companies(db: Session, after: Optional[int] = None, limit: int = 100) -> List[Company]:
+    query = db.query(Company)
+    if after is not None:
+        query = query.filter(Company.id > after)
+    return query.order_by(Company.id).limit(limit).all()
 
 # Platform operations
 def create_platform(db: Session, platform: PlatformCreate) -> Platform:
@@ -32,8 +54,11 @@ def create_platform(db: Session, platform: PlatformCreate) -> Platform:
 def get_platform(db: Session, platform_id: int) -> Optional[Platform]:
     return db.query(Platform).filter(Platform.id == platform_id).first()
 
-def get_platforms(db: Session, skip: int = 0, limit: int = 100) -> List[Platform]:
-    return db.query(Platform).offset(skip).limit(limit).all()
+def get_platforms(db: Session, after: Optional[int] = None, limit: int = 100) -> List[Platform]:
+    query = db.query(Platform)
+    if after is not None:
+        query = query.filter(Platform.id > after)
+    return query.order_by(Platform.id).limit(limit).all()
 
 # Sheet operations
 def create_sheet(db: Session, sheet: SheetCreate) -> Sheet:
@@ -43,22 +68,25 @@ def create_sheet(db: Session, sheet: SheetCreate) -> Sheet:
     db.refresh(db_sheet)
     return db_sheet
 
-def get_sheet(db: Session, sheet_id: int) -> Optional[Sheet]:
-    return db.query(Sheet).filter(Sheet.id == sheet_id).first()
+def get_sheet(db: Session, sheet_id: int, options: Optional[List[Any]] = None) -> Optional[Sheet]:
+    return db.query(Sheet).options(*(options or [])).filter(Sheet.id == sheet_id).first()
 
 def get_sheets(
     db: Session,
     company_id: Optional[int] = None,
     platform_id: Optional[int] = None,
-    skip: int = 0,
-    limit: int = 100
+    after: Optional[str] = None,
+    limit: int = 100,
+    options: Optional[List[Any]] = None
 ) -> List[Sheet]:
-    query = db.query(Sheet)
+    query = db.query(Sheet).options(*(options or []))
     if company_id:
         query = query.filter(Sheet.company_id == company_id)
     if platform_id:
         query = query.filter(Sheet.platform_id == platform_id)
-    return query.offset(skip).limit(limit).all()
+    if after is not None:
+        query = query.filter(Sheet.id > after)
+    return query.order_by(Sheet.id).limit(limit).all()
 
 def update_sheet(db: Session, sheet_id: int, sheet: SheetUpdate) -> Optional[Sheet]:
     db_sheet = get_sheet(db, sheet_id)
@@ -70,6 +98,59 @@ def update_sheet(db: Session, sheet_id: int, sheet: SheetUpdate) -> Optional[She
         db.refresh(db_sheet)
     return db_sheet
 
+def instantiate_template(db: Session, template_id: str, params: SheetInstantiate) -> Optional[uuid.UUID]:
+    """Create a sheet from a template, copying its rows and column catalog.
+
+    Everything is copied with INSERT ... SELECT in one transaction, so the
+    template's rows never leave the database. Returns the new sheet id, or
+    None when template_id is not a template.
+    """
+    new_id = uuid.uuid4()
+    sheet_id = literal(new_id, UUID(as_uuid=True))
+
+    def override(value: Any, column: Any, type_: Any) -> Any:
+        return column if value is None else literal(value, type_)
+
+    created = db.execute(
+        insert(Sheet).from_select(
+            ["id", "name", "company_id", "platform_id", "sheet_type", "description", "is_template"],
+            select(
+                sheet_id,
+                override(params.name, Sheet.name, String),
+                override(params.company_id, Sheet.company_id, Integer),
+                override(params.platform_id, Sheet.platform_id, Integer),
+                Sheet.sheet_type,
+                Sheet.description,
+                false()
+            ).where(Sheet.id == template_id, Sheet.is_template.is_(True))
+        )
+    )
+    if created.rowcount == 0:
+        db.rollback()
+        return None
+
+    db.execute(
+        insert(Row).from_select(
+            ["sheet_id", "row_number", "data"],
+            select(sheet_id, Row.row_number, Row.data).where(Row.sheet_id == template_id)
+        )
+    )
+    # A template with rows but no catalog yet gets one built before the copy,
+    # once; row writes keep it up to date from then on
+    _lock_column_catalog(db, template_id)
+    db.flush()
+    db.execute(
+        insert(SheetColumn).from_select(
+            ["sheet_id", "name", "position", "type_hint", "non_null_count"],
+            select(
+                sheet_id, SheetColumn.name, SheetColumn.position,
+                SheetColumn.type_hint, SheetColumn.non_null_count
+            ).where(SheetColumn.sheet_id == template_id)
+        )
+    )
+    db.commit()
+    return new_id
+
 def delete_sheet(db: Session, sheet_id: int) -> bool:
     db_sheet = get_sheet(db, sheet_id)
     if db_sheet:
@@ -78,10 +159,127 @@ def delete_sheet(db: Session, sheet_id: int) -> bool:
         return True
     return False
 
+# Column catalog operations
+def infer_type(value: Any) -> Optional[str]:
+    """Catalog type hint of a cell value, or None for an empty cell"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    return "string"
+
+def _lock_column_catalog(db: Session, sheet_id: int) -> None:
+    """Lock the sheet row so catalog writes for the sheet run one at a time.
+
+    Call before changing any of the sheet's rows. A sheet that has rows but
+    no catalog yet (created before the catalog existed) gets one built from
+    its rows first, so deltas are applied to complete counts.
+    """
+    db.query(Sheet.id).filter(Sheet.id == sheet_id).with_for_update().first()
+    if not db.query(db.query(SheetColumn.id).filter(SheetColumn.sheet_id == sheet_id).exists()).scalar():
+        _build_column_catalog(db, sheet_id)
+
+def _apply_column_delta(
+    db: Session,
+    sheet_id: int,
+    old_data: Optional[Dict[str, Any]],
+    new_data: Optional[Dict[str, Any]]
+) -> None:
+    """Update the sheet's column catalog for a single row changing from old_data to new_data.
+
+    Call with the catalog locked by _lock_column_catalog, and with old_data
+    read after taking the lock. A column whose count drops to 0 is kept, so
+    a sheet's headers do not come and go as values are cleared; it is only
+    dropped by rebuild_column_catalog once no row has the key any more.
+    """
+    old_data = old_data or {}
+    new_data = new_data or {}
+    names = [name for name in new_data if name not in old_data] + list(old_data)
+    if not names:
+        return
+
+    catalog = {
+        column.name: column
+        for column in db.query(SheetColumn).filter(
+            SheetColumn.sheet_id == sheet_id,
+            SheetColumn.name.in_(names)
+        )
+    }
+    next_position = None
+
+    for name in names:
+        old_type = infer_type(old_data.get(name))
+        new_type = infer_type(new_data.get(name))
+        column = catalog.get(name)
+        if column is None:
+            if next_position is None:
+                last = db.query(SheetColumn.position).filter(
+                    SheetColumn.sheet_id == sheet_id
+                ).order_by(SheetColumn.position.desc()).first()
+                next_position = last[0] + 1 if last else 0
+            column = SheetColumn(sheet_id=sheet_id, name=name, position=next_position, non_null_count=0)
+            db.add(column)
+            next_position += 1
+
+        column.non_null_count = (column.non_null_count or 0) + (new_type is not None) - (old_type is not None)
+        if new_type is not None and column.type_hint != new_type:
+            column.type_hint = new_type if column.type_hint is None else "mixed"
+
+def _build_column_catalog(db: Session, sheet_id: int) -> List[SheetColumn]:
+    # Replaces the catalog in the current transaction
+    db.query(SheetColumn).filter(SheetColumn.sheet_id == sheet_id).delete(synchronize_session=False)
+    catalog: Dict[str, SheetColumn] = {}
+    for (data,) in db.query(Row.data).filter(Row.sheet_id == sheet_id).order_by(Row.row_number):
+        for name, value in (data or {}).items():
+            column = catalog.get(name)
+            if column is None:
+                column = SheetColumn(sheet_id=sheet_id, name=name, position=len(catalog), non_null_count=0)
+                catalog[name] = column
+            value_type = infer_type(value)
+            if value_type is not None:
+                column.non_null_count += 1
+                if column.type_hint != value_type:
+                    column.type_hint = value_type if column.type_hint is None else "mixed"
+    db.add_all(catalog.values())
+    return list(catalog.values())
+
+def rebuild_column_catalog(db: Session, sheet_id: int) -> List[SheetColumn]:
+    """Recompute a sheet's column catalog from its rows, e.g. for sheets created before the catalog existed"""
+    db.query(Sheet.id).filter(Sheet.id == sheet_id).with_for_update().first()
+    columns = _build_column_catalog(db, sheet_id)
+    db.commit()
+    return columns
+
+def get_sheet_columns(db: Session, sheet_id: int) -> List[SheetColumn]:
+    """The sheet's catalog in column order, including columns whose values are all empty"""
+    columns = db.query(SheetColumn).filter(
+        SheetColumn.sheet_id == sheet_id
+    ).order_by(SheetColumn.position).all()
+    if not columns and db.query(db.query(Row.id).filter(Row.sheet_id == sheet_id).exists()).scalar():
+        columns = rebuild_column_catalog(db, sheet_id)
+    return columns
+
+def _touch_sheet(db: Session, sheet_id: int) -> None:
+    """Bump the sheet's updated_at so row writes change its version (and ETag)"""
+    db.query(Sheet).filter(Sheet.id == sheet_id).update(
+        {Sheet.updated_at: func.now()}, synchronize_session=False
+    )
+
 # Row operations
 def create_row(db: Session, sheet_id: int, row: RowCreate) -> Row:
+    _lock_column_catalog(db, sheet_id)
     db_row = Row(**row.dict(), sheet_id=sheet_id)
     db.add(db_row)
+    _apply_column_delta(db, sheet_id, None, db_row.data)
+    _touch_sheet(db, sheet_id)
     db.commit()
     db.refresh(db_row)
     return db_row
@@ -89,15 +287,39 @@ def create_row(db: Session, sheet_id: int, row: RowCreate) -> Row:
 def get_row(db: Session, row_id: int) -> Optional[Row]:
     return db.query(Row).filter(Row.id == row_id).first()
 
-def get_rows(db: Session, sheet_id: int) -> List[Row]:
-    return db.query(Row).filter(Row.sheet_id == sheet_id).order_by(Row.row_number).all()
+def get_rows(
+    db: Session,
+    sheet_id: int,
+    after: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Row]:
+    query = db.query(Row).filter(Row.sheet_id == sheet_id)
+    if after is not None:
+        query = query.filter(Row.row_number > after)
+    query = query.order_by(Row.row_number)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def get_row_data(db: Session, sheet_id: int) -> List[Dict[str, Any]]:
+    """Row numbers and data of a whole sheet as plain dicts, skipping ORM object construction"""
+    rows = db.query(Row.row_number, Row.data).filter(Row.sheet_id == sheet_id).order_by(Row.row_number)
+    return [{"row_number": row_number, "data": data} for row_number, data in rows]
 
 def update_row(db: Session, row_id: int, row: RowUpdate) -> Optional[Row]:
     db_row = get_row(db, row_id)
     if db_row:
         update_data = row.dict(exclude_unset=True)
+        if "data" in update_data:
+            _lock_column_catalog(db, db_row.sheet_id)
+            # Re-read under the lock; another writer may have changed the row since it was loaded
+            db.refresh(db_row)
+        old_data = db_row.data
         for key, value in update_data.items():
             setattr(db_row, key, value)
+        if "data" in update_data:
+            _apply_column_delta(db, db_row.sheet_id, old_data, db_row.data)
+        _touch_sheet(db, db_row.sheet_id)
         db.commit()
         db.refresh(db_row)
     return db_row
@@ -105,6 +327,10 @@ def update_row(db: Session, row_id: int, row: RowUpdate) -> Optional[Row]:
 def delete_row(db: Session, row_id: int) -> bool:
     db_row = get_row(db, row_id)
     if db_row:
+        _lock_column_catalog(db, db_row.sheet_id)
+        db.refresh(db_row)
+        _apply_column_delta(db, db_row.sheet_id, db_row.data, None)
+        _touch_sheet(db, db_row.sheet_id)
         db.delete(db_row)
         db.commit()
         return True
@@ -113,9 +339,14 @@ def delete_row(db: Session, row_id: int) -> bool:
 def get_company_sheets(
     db: Session,
     company_id: int,
-    platform_id: Optional[int] = None
+    platform_id: Optional[int] = None,
+    after: Optional[str] = None,
+    limit: int = 100,
+    options: Optional[List[Any]] = None
 ) -> List[Sheet]:
-    query = db.query(Sheet).filter(Sheet.company_id == company_id)
+    query = db.query(Sheet).options(*(options or [])).filter(Sheet.company_id == company_id)
     if platform_id:
         query = query.filter(Sheet.platform_id == platform_id)
-    return query.all() 
\ No newline at end of file
+    if after is not None:
+        query = query.filter(Sheet.id > after)
+    return query.order_by(Sheet.id).limit(limit).all() 
\ No newline at end of file
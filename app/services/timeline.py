@@ -0,0 +1,175 @@
+import enum
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, exists, func, null, or_
+from sqlalchemy.orm import Query, Session, aliased
+from app.models.database import Kit, KitStatus, Subtask, SubtaskStatus, TaskDependency
+from app.schemas.release import TimelineConfig
+from app.services.leveling import PRIORITY_RANKS
+from app.utils.pagination import cursor_value, encode_cursor
+
+LEVELS = ("kits", "subtasks")
+GROUP_BY = ("status", "owner", "type")
+SORT_BY = ("start_date", "end_date", "priority")
+
+def _subtask_blocked():
+    # A subtask waits while any of its predecessors is not done
+    predecessor = aliased(Subtask)
+    return exists().where(
+        TaskDependency.target_task_id == Subtask.id,
+        TaskDependency.source_task_id == predecessor.id,
+        or_(predecessor.status.is_(None), predecessor.status != SubtaskStatus.DONE.value)
+    )
+
+def _columns(level: str) -> Dict[str, Any]:
+    """Output columns of a timeline item, by name"""
+    if level == "kits":
+        return {
+            "id": Kit.id, "name": Kit.name, "owner": Kit.owner, "status": Kit.status,
+            "start_date": Kit.start_date, "end_date": Kit.end_date,
+            "progress_percentage": Kit.progress_percentage,
+        }
+    return {
+        "id": Subtask.id, "kit_id": Subtask.kit_id, "title": Subtask.title, "owner": Subtask.owner,
+        "type": Subtask.type, "status": Subtask.status, "priority": Subtask.priority,
+        "start_date": Subtask.start_date, "end_date": Subtask.end_date,
+        "estimated_hours": Subtask.estimated_hours, "actual_hours": Subtask.actual_hours,
+        "blocked": _subtask_blocked(),
+    }
+
+def _group_column(level: str, group_by: Optional[str]) -> Any:
+    # Kits have no type; grouping kits by type leaves them in one group
+    model = Kit if level == "kits" else Subtask
+    if group_by is None or not hasattr(model, group_by):
+        return None
+    return getattr(model, group_by)
+
+def _sort_column(level: str, sort_by: str) -> Any:
+    if sort_by == "priority":
+        if level == "kits":
+            # Kits have no priority of their own
+            return Kit.start_date
+        return case(PRIORITY_RANKS, value=func.lower(Subtask.priority), else_=PRIORITY_RANKS["medium"])
+    return getattr(Kit if level == "kits" else Subtask, sort_by)
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+class Timeline:
+    """A plan's kits or subtasks grouped and sorted as a TimelineConfig says, in SQL.
+
+    Items are ordered by (sort key, id) with missing sort keys last, so the
+    last item of a page is a keyset cursor for the rest of its group. The
+    composite (plan or kit, group column, start_date) indexes let every
+    group be read in order.
+    """
+
+    def __init__(self, db: Session, release_plan_id: str, level: str, config: TimelineConfig):
+        if level not in LEVELS:
+            raise ValueError(f"Unknown timeline level: {level}")
+        if config.group_by is not None and config.group_by not in GROUP_BY:
+            raise ValueError(f"Cannot group a timeline by {config.group_by}")
+        if config.sort_by not in SORT_BY:
+            raise ValueError(f"Cannot sort a timeline by {config.sort_by}")
+        self.db = db
+        self.release_plan_id = release_plan_id
+        self.level = level
+        self.config = config
+        self.columns = _columns(level)
+        self.group = _group_column(level, config.group_by)
+        self.sort = _sort_column(level, config.sort_by)
+        # Dates go into cursors as ISO strings, priority ranks as numbers
+        self.sort_is_date = level == "kits" or config.sort_by != "priority"
+
+    def _query(self, *extra: Any) -> Query:
+        group = (self.group if self.group is not None else null()).label("timeline_group")
+        query = self.db.query(
+            *(column.label(name) for name, column in self.columns.items()),
+            group, self.sort.label("timeline_sort"), *extra
+        )
+        if self.level == "kits":
+            query = query.filter(Kit.release_plan_id == self.release_plan_id)
+            if not self.config.show_completed:
+                query = query.filter(or_(Kit.status.is_(None), Kit.status != KitStatus.DONE))
+            if not self.config.show_blocked:
+                query = query.filter(or_(Kit.status.is_(None), Kit.status != KitStatus.BLOCKED))
+        else:
+            query = query.join(Kit, Kit.id == Subtask.kit_id).filter(Kit.release_plan_id == self.release_plan_id)
+            if not self.config.show_completed:
+                query = query.filter(or_(Subtask.status.is_(None), Subtask.status != SubtaskStatus.DONE.value))
+            if not self.config.show_blocked:
+                query = query.filter(~_subtask_blocked())
+        return query
+
+    def _order(self) -> List[Any]:
+        item_id = self.columns["id"]
+        return [case((self.sort.is_(None), 1), else_=0), self.sort, item_id]
+
+    def _in_group(self, query: Query, key: Any) -> Query:
+        if self.group is None:
+            return query
+        if key is None:
+            return query.filter(self.group.is_(None))
+        enum_class = getattr(self.group.type, "enum_class", None)
+        return query.filter(self.group == (enum_class(key) if enum_class else key))
+
+    def _group(self, key: Any, count: int, rows: List[Any], more: bool) -> Dict[str, Any]:
+        last = rows[-1] if rows else None
+        return {
+            "key": _plain(key),
+            "count": count,
+            "items": [{name: getattr(row, name) for name in self.columns} for row in rows],
+            # Cursor: the group and the (sort key, id) of its last item
+            "next_cursor": encode_cursor([_plain(key), _plain(last.timeline_sort), _plain(last.id)]) if more and last else None,
+        }
+
+    def first_pages(self, limit: int) -> List[Dict[str, Any]]:
+        """Every group with its size and first limit items, in one query"""
+        position = func.row_number().over(partition_by=self.group, order_by=self._order()).label("position")
+        size = func.count().over(partition_by=self.group).label("group_size")
+        ranked = self._query(position, size).subquery()
+        rows = self.db.query(ranked).filter(ranked.c.position <= limit).order_by(
+            ranked.c.timeline_group.is_(None), ranked.c.timeline_group, ranked.c.position
+        ).all()
+
+        groups: List[Dict[str, Any]] = []
+        start = 0
+        for index, row in enumerate(rows):
+            if index + 1 == len(rows) or rows[index + 1].timeline_group != row.timeline_group:
+                page = rows[start:index + 1]
+                groups.append(self._group(row.timeline_group, row.group_size, page, row.group_size > len(page)))
+                start = index + 1
+        return groups
+
+    def next_page(self, after: Any, limit: int) -> Dict[str, Any]:
+        """The limit items of a group after a cursor from an earlier page"""
+        if not isinstance(after, list) or len(after) != 3:
+            raise ValueError("Invalid cursor")
+        key, sort_value, item_id = after
+        if key is not None and not isinstance(key, str):
+            raise ValueError("Invalid cursor")
+        if sort_value is not None:
+            if self.sort_is_date:
+                try:
+                    sort_value = datetime.fromisoformat(sort_value)
+                except (TypeError, ValueError):
+                    raise ValueError("Invalid cursor")
+            else:
+                sort_value = cursor_value(sort_value, int)
+        item_id = cursor_value(item_id, uuid.UUID if self.level == "kits" else int)
+
+        item = self.columns["id"]
+        if sort_value is None:
+            keyset = [self.sort.is_(None), item > item_id]
+        else:
+            keyset = [or_(self.sort.is_(None), self.sort > sort_value, (self.sort == sort_value) & (item > item_id))]
+        query = self._in_group(self._query(), key)
+        rows = query.filter(*keyset).order_by(*self._order()).limit(limit).all()
+        return self._group(key, query.count(), rows, len(rows) == limit)
@@ -0,0 +1,183 @@
+import math
+import threading
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.database import Company, ReleasePlan
+
+# Days compiled on each side of the first date asked about, and the least a grown index adds
+INDEX_MARGIN_DAYS = 3 * 366
+
+class WorkingCalendar:
+    """Weekends, holidays and hours per day compiled into a business-day index.
+
+    For every day of the indexed range the index holds the number of
+    working days before it (counted from a fixed anchor day, so the count
+    never changes when the range grows), and for every working day its
+    date. Counting working days between two dates, moving a date by N
+    working days and converting between timestamps and working-hour
+    offsets are then a few array lookups. The range grows on demand.
+
+    A working day's hours run from midnight UTC for hours_per_day hours.
+    """
+
+    def __init__(self, weekend: Iterable[int] = (5, 6), holidays: Iterable[date] = (), hours_per_day: float = 8):
+        if not 0 < hours_per_day <= 24:
+            raise ValueError("hours_per_day must be more than 0 and at most 24")
+        self.weekend = frozenset(weekend)
+        if len(self.weekend) >= 7:
+            raise ValueError("A working calendar needs at least one working weekday")
+        self.holidays = frozenset(day.toordinal() for day in holidays)
+        self.hours_per_day = float(hours_per_day)
+        self.every_day = not self.weekend and not self.holidays
+        self.anchor = date.today().toordinal()
+        self._lock = threading.Lock()
+        self._compile(self.anchor - INDEX_MARGIN_DAYS, self.anchor + INDEX_MARGIN_DAYS)
+
+    def _compile(self, first: int, last: int) -> None:
+        ordinals = np.arange(first, last + 1, dtype=np.int64)
+        # date.fromordinal(1) is a Monday
+        working = ~np.isin((ordinals - 1) % 7, list(self.weekend))
+        if self.holidays:
+            working &= ~np.isin(ordinals, list(self.holidays))
+        counts = np.zeros(len(ordinals) + 1, dtype=np.int64)
+        np.cumsum(working, out=counts[1:])
+        counts -= counts[self.anchor - first]
+        # Swapped in one assignment so readers never see a half-grown index
+        self._index = (first, counts, ordinals[working])
+
+    def _ensure(self, ordinal: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        index = self._index
+        first, counts, _ = index
+        if first <= ordinal < first + len(counts) - 1:
+            return index
+        with self._lock:
+            first, counts, _ = self._index
+            last = first + len(counts) - 2
+            if ordinal < first:
+                first = min(ordinal, first - INDEX_MARGIN_DAYS)
+            elif ordinal > last:
+                last = max(ordinal, last + INDEX_MARGIN_DAYS)
+            self._compile(first, last)
+            return self._index
+
+    def is_working_day(self, day: date) -> bool:
+        ordinal = day.toordinal()
+        return (ordinal - 1) % 7 not in self.weekend and ordinal not in self.holidays
+
+    def day_index(self, day: date) -> int:
+        """Working days from the anchor to day: day's position if it is a working day, else the next one's"""
+        ordinal = day.toordinal()
+        first, counts, _ = self._ensure(ordinal)
+        return int(counts[ordinal - first])
+
+    def day_at(self, index: int) -> date:
+        """The working day at a position returned by day_index"""
+        first, counts, days = self._index
+        while not counts[0] <= index < counts[0] + len(days):
+            # Walk the range outwards; every step adds at least one working week
+            first, counts, days = self._ensure(first - 1 if index < counts[0] else first + len(counts) - 1)
+        return date.fromordinal(int(days[index - counts[0]]))
+
+    def count(self, since: int, until: int) -> int:
+        """Working days among the day ordinals [since, until)"""
+        if until <= since:
+            return 0
+        if self.every_day:
+            return until - since
+        self._ensure(since)
+        first, counts, _ = self._ensure(until - 1)
+        return int(counts[until - first] - counts[since - first])
+
+    def working_days(self, start: date, end: date) -> int:
+        """Working days in start..end, both inclusive"""
+        if end < start:
+            return 0
+        return self.day_index(end + timedelta(days=1)) - self.day_index(start)
+
+    def add_working_days(self, value: datetime, days: int) -> datetime:
+        """Move a timestamp by a number of working days, keeping its time of day.
+
+        A timestamp on a day off counts from the next working day.
+        """
+        day = _utc(value).date()
+        return value + timedelta(days=(self.day_at(self.day_index(day) + days) - day).days)
+
+    def offset(self, value: datetime) -> float:
+        """Working hours from the anchor to a timestamp (naive timestamps are UTC)"""
+        value = _utc(value)
+        day = value.date()
+        hours = self.day_index(day) * self.hours_per_day
+        if self.is_working_day(day):
+            elapsed = (value - datetime(day.year, day.month, day.day)).total_seconds() / 3600
+            hours += min(elapsed, self.hours_per_day)
+        return hours
+
+    def moment(self, offset: float, finish: bool = False) -> datetime:
+        """Naive UTC timestamp of a working-hour offset.
+
+        An offset at the boundary between two working days is the start of
+        the later one, or with finish=True the end of the earlier one.
+        """
+        index = math.floor(offset / self.hours_per_day)
+        hours = offset - index * self.hours_per_day
+        if finish and hours <= 0:
+            index -= 1
+            hours = self.hours_per_day
+        day = self.day_at(index)
+        return datetime(day.year, day.month, day.day) + timedelta(hours=hours)
+
+    def working_hours(self, start: datetime, end: datetime) -> float:
+        return self.offset(end) - self.offset(start)
+
+    def add_working_hours(self, start: datetime, hours: float, finish: bool = False) -> datetime:
+        return self.moment(self.offset(start) + hours, finish)
+
+    def working_mask(self, start: date, end: date) -> np.ndarray:
+        """One bool per day of start..end, True on working days"""
+        first_ordinal, last_ordinal = start.toordinal(), end.toordinal()
+        self._ensure(last_ordinal)
+        first, counts, _ = self._ensure(first_ordinal)
+        window = counts[first_ordinal - first:last_ordinal - first + 2]
+        return np.diff(window) > 0
+
+# Every day, around the clock: wall-clock time
+CONTINUOUS = WorkingCalendar(weekend=(), hours_per_day=24)
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+@lru_cache(maxsize=128)
+def _compiled(weekend: Tuple[int, ...], holidays: Tuple[date, ...], hours_per_day: float) -> WorkingCalendar:
+    return WorkingCalendar(weekend, holidays, hours_per_day)
+
+def compile_calendar(config: Optional[Dict[str, Any]] = None) -> WorkingCalendar:
+    """The compiled calendar for a company's stored CalendarConfig, or the default one.
+
+    Compiled calendars are shared between requests, so a company's index
+    is built once per process.
+    """
+    config = config or {}
+    weekend = config.get("weekend_days")
+    holidays = sorted({date.fromisoformat(str(day)) for day in config.get("holidays") or ()})
+    return _compiled(
+        tuple(sorted(settings.WEEKEND_DAYS if weekend is None else weekend)),
+        tuple(holidays),
+        float(config.get("hours_per_day") or settings.WORKING_HOURS_PER_DAY)
+    )
+
+def load_company_calendar(db: Session, company_id: Optional[int]) -> WorkingCalendar:
+    config = db.query(Company.working_calendar).filter(Company.id == company_id).scalar() if company_id is not None else None
+    return compile_calendar(config)
+
+def load_plan_calendar(db: Session, release_plan_id: Any) -> WorkingCalendar:
+    """The working calendar of the company a release plan belongs to"""
+    config = db.query(Company.working_calendar).join(
+        ReleasePlan, ReleasePlan.company_id == Company.id
+    ).filter(ReleasePlan.id == release_plan_id).scalar()
+    return compile_calendar(config)
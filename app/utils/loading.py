@@ -0,0 +1,105 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy.orm import load_only, noload
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+class Relation:
+    """A relationship a client can ask for with ?include=, and how to eager-load it"""
+
+    def __init__(self, schema: Any, options: Sequence[Any]):
+        self.schema = schema
+        self.options = list(options)
+
+def parse_list_param(value: Optional[str]) -> List[str]:
+    """Split a comma separated query parameter such as ?include=rows,company"""
+    if value is None:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+@lru_cache(maxsize=256)
+def _slim_model(
+    schema: Type[BaseModel],
+    fields: Tuple[str, ...],
+    relations: Tuple[Tuple[str, Any], ...]
+) -> Type[BaseModel]:
+    definitions: Dict[str, Any] = {
+        name: (schema.model_fields[name].annotation, schema.model_fields[name])
+        for name in fields
+    }
+    for name, annotation in relations:
+        definitions[name] = (Optional[annotation], None)
+    return create_model(
+        f"{schema.__name__}Slim",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions
+    )
+
+class LoadingProfile:
+    """Loader options plus the slimmed response model for one ?include=&fields= combination"""
+
+    def __init__(self, options: List[Any], model: Type[BaseModel]):
+        self.options = options
+        self.model = model
+
+    def dump(self, obj: Any) -> Dict[str, Any]:
+        return self.model.model_validate(obj).model_dump(mode="json")
+
+    def dump_all(self, objs: Sequence[Any]) -> List[Dict[str, Any]]:
+        return [self.dump(obj) for obj in objs]
+
+    def ndjson(self, batches: Iterable[Sequence[Any]]) -> Iterator[str]:
+        """One JSON document per line, sent as one chunk per batch"""
+        for batch in batches:
+            yield "".join(self.model.model_validate(obj).model_dump_json() + "\n" for obj in batch)
+
+def build_loading_profile(
+    orm_model: Any,
+    schema: Type[BaseModel],
+    relations: Dict[str, Relation],
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    default_include: Sequence[str] = ()
+) -> LoadingProfile:
+    """Resolve ?include= and ?fields= into loader options and a matching response model.
+
+    Relationships that are not included are never loaded (noload), and a
+    dotted name such as "kits.subtasks" implies its parent "kits". Only the
+    deepest included path contributes loader options so the two never conflict.
+    """
+    included = set(parse_list_param(include)) if include is not None else set(default_include)
+    unknown = included - set(relations)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(sorted(unknown))}")
+    for name in list(included):
+        parts = name.split(".")
+        included.update(".".join(parts[:i]) for i in range(1, len(parts)))
+
+    relation_roots = {name.split(".")[0] for name in relations}
+    scalar_fields = [name for name in schema.model_fields if name not in relation_roots]
+    selected = parse_list_param(fields) or scalar_fields
+    unknown = set(selected) - set(scalar_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    options: List[Any] = []
+    for name in sorted(included):
+        if not any(other.startswith(name + ".") for other in included):
+            options.extend(relations[name].options)
+    columns = [getattr(orm_model, name) for name in selected if name in orm_model.__table__.columns]
+    if fields and columns:
+        options.append(load_only(*columns))
+    options.append(noload("*"))
+
+    # The deepest included path for each top-level relation decides its response schema
+    nested: Dict[str, Relation] = {}
+    for name in sorted(included, key=lambda item: item.count(".")):
+        nested[name.split(".")[0]] = relations[name]
+    model = _slim_model(
+        schema,
+        tuple(name for name in scalar_fields if name in selected),
+        tuple(sorted((name, relation.schema) for name, relation in nested.items()))
+    )
+    return LoadingProfile(options, model)
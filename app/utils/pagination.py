@@ -0,0 +1,48 @@
+import base64
+import json
+import uuid
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(value: Any) -> str:
+    """Encode the last seen key of a page into an opaque cursor string"""
+    raw = json.dumps(value if isinstance(value, (int, float, list)) else str(value))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def cursor_value(value: Any, key_type: type) -> Any:
+    """A decoded cursor value as the type of the key it pages by; raises ValueError if it is not one"""
+    if key_type is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif key_type is uuid.UUID:
+        if isinstance(value, str):
+            return uuid.UUID(value)
+    elif isinstance(value, key_type):
+        return value
+    raise ValueError("Invalid cursor")
+
+def decode_cursor(cursor: Optional[str], key_type: Optional[type] = None) -> Any:
+    """Decode a cursor produced by encode_cursor, or None if no cursor was given.
+
+    With key_type the value must be a key of that type (int, uuid.UUID, str),
+    so a cursor for another endpoint is a 400 rather than a database error.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return value if key_type is None else cursor_value(value, key_type)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int, key: str) -> List[Any]:
+    """Expose the cursor for the page after items via the X-Next-Cursor header.
+
+    A full page means there may be more rows; a short page is the last one.
+    """
+    if items and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(items[-1], key))
+    return list(items)
@@ -0,0 +1,39 @@
+"""Time the CPM engine (forward/backward passes plus topological sort) on
+synthetic release plans of increasing size.
+
+Run from the repository root:
+
+    python -m benchmarks.critical_path [max_tasks]
+"""
+import random
+import sys
+import timeit
+
+from app.services.critical_path import Dependency, ScheduleTask, compute_schedule
+
+TYPES = ["FS"] * 7 + ["SS", "FF", "SF"]
+
+def build_plan(tasks: int, dependencies_per_task: int = 3, seed: int = 7):
+    rng = random.Random(seed)
+    network = {i: ScheduleTask(i, f"Task {i}", float(rng.randint(1, 40))) for i in range(tasks)}
+    dependencies = []
+    # Predecessors always have a lower id, so the network is acyclic; ids are
+    # shuffled afterwards so insertion order is not already topological
+    for target in range(1, tasks):
+        for source in {rng.randrange(max(0, target - 200), target) for _ in range(dependencies_per_task)}:
+            dependencies.append(Dependency(source, target, rng.choice(TYPES), float(rng.choice([0, 0, 0, 24, 48]))))
+    order = list(network)
+    rng.shuffle(order)
+    return {i: network[i] for i in order}, dependencies
+
+def main(max_tasks: int = 20_000) -> None:
+    sizes = [size for size in (1_000, 2_500, 5_000, 10_000, 20_000, 50_000) if size <= max_tasks]
+    print(f"{'tasks':>8} {'deps':>8} {'time':>10} {'per task':>10} {'critical':>9}")
+    for size in sizes:
+        tasks, dependencies = build_plan(size)
+        seconds = min(timeit.repeat(lambda: compute_schedule(tasks, dependencies), number=1, repeat=5))
+        critical = sum(task.is_critical for task in tasks.values())
+        print(f"{size:>8,} {len(dependencies):>8,} {seconds * 1000:>8.1f}ms {seconds / size * 1e6:>8.2f}us {critical:>9,}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,40 @@
+"""Time the Monte Carlo release forecast on synthetic release plans.
+
+Run from the repository root:
+
+    python -m benchmarks.forecast [max_tasks] [trials]
+"""
+import sys
+import timeit
+from datetime import datetime
+
+import numpy as np
+
+from app.services.critical_path import ScheduleNetwork
+from app.services.forecast import Calibration, ForecastNetwork, simulate
+from benchmarks.critical_path import build_plan
+
+def main(max_tasks: int = 5_000, trials: int = 10_000) -> None:
+    sizes = [size for size in (1_000, 2_500, 5_000, 10_000) if size <= max_tasks]
+    calibration = Calibration(0.1, 0.35, 0)
+    print(f"{'tasks':>8} {'deps':>8} {'levels':>7} {'trials':>7} {'compile':>9} {'simulate':>10} {'P50 / P95 finish (h)':>22}")
+    for size in sizes:
+        tasks, dependencies = build_plan(size)
+        network = ScheduleNetwork(datetime(2024, 1, 1), tasks, dependencies)
+        network.compute()
+        compile_seconds = min(timeit.repeat(lambda: ForecastNetwork(network, {}), number=1, repeat=3))
+        compiled = ForecastNetwork(network, {})
+        groups = {"plan": np.arange(len(compiled))}
+        seconds = min(timeit.repeat(lambda: simulate(compiled, groups, calibration, trials, seed=1), number=1, repeat=3))
+        finish = simulate(compiled, groups, calibration, trials, seed=1)["plan"]
+        p50, p95 = np.percentile(finish, [50, 95])
+        print(
+            f"{size:>8,} {len(dependencies):>8,} {len(compiled.level_bounds) - 1:>7,} {trials:>7,} "
+            f"{compile_seconds * 1000:>7.1f}ms {seconds * 1000:>8.1f}ms {p50:>10.0f} / {p95:>9.0f}"
+        )
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10_000,
+    )
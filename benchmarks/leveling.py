@@ -0,0 +1,89 @@
+"""Time the resource-leveling list scheduler on synthetic, over-allocated plans.
+
+Run from the repository root:
+
+    python -m benchmarks.leveling [max_tasks]
+"""
+import random
+import sys
+import timeit
+from collections import defaultdict
+
+from app.services.leveling import LevelAllocation, LevelDependency, LevelTask, level
+
+def build_plan(tasks: int, users: int, seed: int = 7):
+    rng = random.Random(seed)
+    plan = {}
+    for i in range(tasks):
+        task = LevelTask(i, f"Task {i}", rng.randint(0, 180), rng.randint(1, 15), rng.randint(0, 2))
+        task.allocations = [
+            LevelAllocation(f"user{rng.randrange(users)}", 0, task.duration, rng.choice([25, 50, 100]))
+            for _ in range(rng.randint(1, 2))
+        ]
+        plan[i] = task
+    # Predecessors always have a lower id, so the network is acyclic
+    dependencies = [
+        LevelDependency(source, target, rng.choice(["FS"] * 8 + ["SS", "FF"]), rng.choice([0, 0, 1, 2]))
+        for target in range(1, tasks)
+        for source in {rng.randrange(max(0, target - 100), target) for _ in range(rng.randint(0, 2))}
+    ]
+    return plan, dependencies
+
+def scan_starts(tasks) -> dict:
+    """Leveled starts of independent tasks, trying every start one by one"""
+    booked = defaultdict(int)
+    starts = {}
+    for task in sorted(tasks.values(), key=lambda task: (task.start, task.rank, task.id)):
+        demand = defaultdict(int)
+        for allocation in task.allocations:
+            for day in range(allocation.offset, allocation.offset + allocation.length):
+                demand[allocation.user_id, day] += allocation.percentage
+        start = task.start
+        while any(
+            booked[user_id, start + day] and booked[user_id, start + day] + load > 100
+            for (user_id, day), load in demand.items()
+        ):
+            start += 1
+        for (user_id, day), load in demand.items():
+            booked[user_id, start + day] += load
+        starts[task.id] = start
+    return starts
+
+def check_first_fit(plans: int = 200, seed: int = 11) -> None:
+    """Compare level() with scan_starts on small plans with allocations offset from their task start"""
+    for offset in (3, -2):
+        # Two full-time tasks on one user, booked away from their starts
+        tasks = {i: LevelTask(i, f"Task {i}", 0, 3) for i in range(2)}
+        for task in tasks.values():
+            task.allocations = [LevelAllocation("user0", offset, 3, 100)]
+        assert level(tasks, [])[1] == 0 and tasks[1].new_start == 3
+    rng = random.Random(seed)
+    for _ in range(plans):
+        tasks = {}
+        for i in range(rng.randint(2, 12)):
+            task = LevelTask(i, f"Task {i}", rng.randint(0, 20), rng.randint(1, 6), rng.randint(0, 2))
+            task.allocations = [
+                LevelAllocation(f"user{rng.randrange(3)}", rng.randint(-3, 4), rng.randint(1, 4), rng.choice([25, 50, 70, 100]))
+                for _ in range(rng.randint(1, 3))
+            ]
+            tasks[i] = task
+        level(tasks, [])
+        expected = scan_starts(tasks)
+        assert all(task.new_start == expected[task.id] for task in tasks.values()), (expected, tasks)
+
+def main(max_tasks: int = 10_000) -> None:
+    check_first_fit()
+    sizes = [size for size in (1_000, 2_500, 5_000, 10_000) if size <= max_tasks]
+    print(f"{'tasks':>8} {'users':>6} {'time':>10} {'over before':>12} {'over after':>11}")
+    for size in sizes:
+        users = size // 10
+        timings = []
+        for _ in range(3):
+            tasks, dependencies = build_plan(size, users)
+            timings.append(timeit.timeit(lambda: level(tasks, dependencies), number=1))
+        tasks, dependencies = build_plan(size, users)
+        before, after = level(tasks, dependencies)
+        print(f"{size:>8,} {users:>6,} {min(timings) * 1000:>8.1f}ms {before:>12,} {after:>11,}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,38 @@
+"""Time the sweep-line resource-load engine on a year-long window.
+
+Run from the repository root:
+
+    python -m benchmarks.resource_load [max_allocations]
+"""
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+
+from app.services.resource_load import resource_load
+
+START = date(2024, 1, 1)
+END = date(2024, 12, 31)
+
+def build_allocations(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    allocations = []
+    # Some allocations start before or end after the window to exercise clipping
+    for _ in range(count):
+        start = START + timedelta(days=rng.randint(-60, 390))
+        allocations.append((start, start + timedelta(days=rng.randint(0, 90)), rng.choice([10, 25, 50, 100])))
+    return allocations
+
+def main(max_allocations: int = 50_000) -> None:
+    sizes = [size for size in (1_000, 5_000, 10_000, 50_000) if size <= max_allocations]
+    print(f"{'allocations':>12} {'daily':>10} {'weekly':>10} {'monthly':>10}")
+    for size in sizes:
+        allocations = build_allocations(size)
+        timings = [
+            min(timeit.repeat(lambda: resource_load(allocations, START, END, granularity), number=1, repeat=5))
+            for granularity in ("daily", "weekly", "monthly")
+        ]
+        print(f"{size:>12,} " + " ".join(f"{seconds * 1000:>8.1f}ms" for seconds in timings))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,77 @@
+"""Compare the default and fast (?fast=true) serialization paths for large sheets.
+
+Run from the repository root:
+
+    python -m benchmarks.serialization [rows]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.api.v1.endpoints.sheets import CompleteSheet
+
+HEADERS = [
+    "Test Case ID", "Module", "Test Case", "Expected Outcome",
+    "Actual Outcome", "Priority", "Assigned To", "Status",
+    "Execution Date", "Test Result", "Comments"
+]
+
+def build_complete_sheet(rows: int) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "id": "5f0c6b3e-8a44-4a53-9d8c-7b1f0f6f2d10",
+        "name": "Regression",
+        "company_id": 1,
+        "platform_id": 1,
+        "sheet_type": "android",
+        "description": None,
+        "is_template": False,
+        "created_at": now,
+        "updated_at": now,
+        "columns": HEADERS,
+        "headers": HEADERS,
+        "rows": [
+            {"row_number": i, "data": {name: f"{name} {i}" if i % 3 else "" for name in HEADERS}}
+            for i in range(rows)
+        ]
+    }
+
+def build_grid(rows: int) -> dict:
+    return {"data": [HEADERS] + [[f"{name} {i}" if i % 3 else "" for name in HEADERS] for i in range(rows)]}
+
+def default_complete(adapter: TypeAdapter, payload: dict) -> bytes:
+    # What FastAPI does with response_model=CompleteSheet and a JSONResponse
+    content = adapter.dump_python(adapter.validate_python(payload), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+def default_grid(payload: dict) -> bytes:
+    # What FastAPI does for an endpoint without a response_model
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode()
+
+def fast(payload: dict) -> bytes:
+    return ORJSONResponse(payload).body
+
+def report(name: str, fn, rows: int, number: int = 5) -> float:
+    seconds = min(timeit.repeat(fn, number=1, repeat=number))
+    print(f"{name:<28} {seconds * 1000:9.1f} ms  {rows / seconds:12,.0f} rows/s")
+    return seconds
+
+def main(rows: int = 10_000) -> None:
+    adapter = TypeAdapter(CompleteSheet)
+    complete = build_complete_sheet(rows)
+    grid = build_grid(rows)
+    print(f"{rows:,} rows x {len(HEADERS)} columns")
+    default = report("/complete default", lambda: default_complete(adapter, complete), rows)
+    fast_seconds = report("/complete ?fast=true", lambda: fast(complete), rows)
+    print(f"{'speedup':<28} {default / fast_seconds:9.1f}x")
+    default = report("/data default", lambda: default_grid(grid), rows)
+    fast_seconds = report("/data ?fast=true", lambda: fast(grid), rows)
+    print(f"{'speedup':<28} {default / fast_seconds:9.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,40 @@
+"""Time working-calendar lookups against walking the days one by one.
+
+Run from the repository root:
+
+    python -m benchmarks.working_calendar [lookups]
+"""
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+from app.services.working_calendar import WorkingCalendar
+
+HOLIDAYS = [date(year, month, day) for year in range(2020, 2031) for month, day in ((1, 1), (5, 1), (12, 25), (12, 26))]
+
+def walk_working_days(calendar: WorkingCalendar, start: date, end: date) -> int:
+    return sum(calendar.is_working_day(start + timedelta(days=i)) for i in range((end - start).days + 1))
+
+def main(lookups: int = 10_000) -> None:
+    calendar = WorkingCalendar((5, 6), HOLIDAYS, 8)
+    rng = random.Random(7)
+    starts = [date(2024, 1, 1) + timedelta(days=rng.randint(0, 365)) for _ in range(lookups)]
+    spans = [(start, start + timedelta(days=rng.randint(0, 365))) for start in starts]
+    moments = [datetime(start.year, start.month, start.day, rng.randint(0, 23)) for start in starts]
+    hours = [rng.uniform(0, 2000) for _ in range(lookups)]
+    assert all(calendar.working_days(*span) == walk_working_days(calendar, *span) for span in spans[:200])
+
+    timings = {
+        "working_days (index)": lambda: [calendar.working_days(*span) for span in spans],
+        "working_days (walk)": lambda: [walk_working_days(calendar, *span) for span in spans],
+        "add_working_hours": lambda: [calendar.add_working_hours(moment, hour) for moment, hour in zip(moments, hours)],
+        "add_working_days": lambda: [calendar.add_working_days(moment, 20) for moment in moments],
+    }
+    print(f"{'operation':>22} {'per lookup':>12}")
+    for name, run in timings.items():
+        seconds = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{name:>22} {seconds / lookups * 1e6:>10.2f}us")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
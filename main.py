@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import sheets, auth
+from app.api.v1.endpoints import sheets, auth, exports, release
+from app.core.assets import ImmutableStaticFiles, load_manifest
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -16,11 +19,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Compress responses (gzip/zstd, negotiated per request)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Hashed static assets, built once at startup
+app.mount(settings.STATIC_URL, ImmutableStaticFiles(directory=settings.STATIC_BUILD_DIR, check_dir=False), name="static")
+
+@app.on_event("startup")
+def build_static_assets():
+    load_manifest()
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(sheets.router, prefix=settings.API_V1_STR, tags=["sheets"])
+app.include_router(exports.router, prefix=settings.API_V1_STR, tags=["exports"])
+app.include_router(release.router, prefix=settings.API_V1_STR, tags=["release"])
 
 @app.get("/")
 def read_root():
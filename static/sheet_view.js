@@ -0,0 +1,1090 @@
+const sheetId = window.location.pathname.split('/').pop();
+let currentSheetData = {};
+let currentSheet = sheetConfig.currentSheet;
+
+async function editCell(cell) {
+    if (cell.classList.contains('editing')) return;
+
+    // Store original content and styles
+    const originalContent = cell.textContent;
+    const originalStyles = window.getComputedStyle(cell);
+
+    // Create input with exact same styling as the cell
+    const input = document.createElement('input');
+    input.value = originalContent;
+    input.style.cssText = `
+        position: absolute;
+        top: 0;
+        left: 0;
+        width: 100%;
+        height: 100%;
+        padding: ${originalStyles.padding};
+        font: ${originalStyles.font};
+        color: ${originalStyles.color};
+        background: white;
+        border: none;
+        outline: none;
+        box-sizing: border-box;
+        z-index: 1;
+    `;
+
+    // Add editing class but keep original text visible
+    cell.classList.add('editing');
+    cell.appendChild(input);
+
+    // Focus input
+    input.focus();
+    input.select();
+
+    const finishEditing = async (newValue, moveTo = null) => {
+        // Remove input first
+        input.remove();
+        
+        // Update content
+        cell.textContent = newValue;
+        cell.classList.remove('editing');
+
+        // Send update to server
+        const rowIndex = cell.parentElement.rowIndex;
+        const colIndex = cell.cellIndex - 1;
+        const range = `${String.fromCharCode(65 + colIndex)}${rowIndex}`;
+
+        try {
+            const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/cell`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ range, value: newValue })
+            });
+
+            if (!response.ok) {
+                cell.textContent = originalContent;
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            cell.textContent = originalContent;
+        }
+
+        // Move to next cell if specified
+        if (moveTo) {
+            editCell(moveTo);
+        }
+    };
+
+    // Handle blur event
+    input.addEventListener('blur', () => {
+        finishEditing(input.value);
+    });
+
+    // Handle keyboard navigation
+    input.addEventListener('keydown', (e) => {
+        if (e.key === 'Tab' || e.key === 'Enter') {
+            e.preventDefault();
+            
+            const currentRow = cell.parentElement;
+            let nextCell = null;
+
+            if (e.key === 'Enter') {
+                // Move down
+                const nextRow = currentRow.nextElementSibling;
+                if (nextRow) {
+                    nextCell = nextRow.cells[cell.cellIndex];
+                }
+            } else {
+                // Tab navigation
+                nextCell = e.shiftKey 
+                    ? cell.previousElementSibling 
+                    : cell.nextElementSibling;
+
+                if (!nextCell && !e.shiftKey && currentRow.nextElementSibling) {
+                    const nextRow = currentRow.nextElementSibling;
+                    nextCell = nextRow.querySelector('.editable');
+                } else if (!nextCell && e.shiftKey && currentRow.previousElementSibling) {
+                    const prevRow = currentRow.previousElementSibling;
+                    const editableCells = prevRow.querySelectorAll('.editable');
+                    nextCell = editableCells[editableCells.length - 1];
+                }
+            }
+
+            if (nextCell && nextCell.classList.contains('editable')) {
+                finishEditing(input.value, nextCell);
+            } else {
+                finishEditing(input.value);
+            }
+        }
+    });
+}
+
+function updateTableContent(data) {
+    const tbody = document.querySelector('tbody');
+    tbody.innerHTML = '';
+
+    // If no data, show empty state with no headers
+    if (!data || data.length === 0) {
+        addEmptyRows();
+        return;
+    }
+
+    // Skip the header row if it exists
+    const startIndex = data[0]["Test Case ID"] === "Test Case ID" ? 1 : 0;
+
+    data.slice(startIndex).forEach((row, index) => {
+        tbody.appendChild(createRowElement(row, index + 1));
+    });
+
+    addEmptyRows();
+}
+
+function createRowElement(row, rowNumber) {
+    const tr = document.createElement('tr');
+
+    // Add row number
+    const rowNum = document.createElement('td');
+    rowNum.className = 'row-number';
+    rowNum.textContent = rowNumber;
+    tr.appendChild(rowNum);
+
+    // Add data cells
+    [
+        "Test Case ID", "Module", "Test Case", "Expected Outcome",
+        "Actual Outcome", "Priority", "Assigned To", "Status",
+        "Execution Date", "Test Result", "Comments"
+    ].forEach(key => {
+        const td = document.createElement('td');
+        td.className = 'editable';
+        td.onclick = function() { editCell(this); };
+        td.textContent = row[key] || '';
+        tr.appendChild(td);
+    });
+
+    // Add delete button
+    const actionTd = document.createElement('td');
+    const deleteBtn = document.createElement('button');
+    deleteBtn.className = 'delete-button';
+    deleteBtn.onclick = function() { deleteRow(this); };
+    deleteBtn.textContent = 'Delete';
+    actionTd.appendChild(deleteBtn);
+    tr.appendChild(actionTd);
+
+    return tr;
+}
+
+// Minimal MessagePack decoder for the binary sheet grid
+function decodeMsgpack(buffer) {
+    const bytes = new Uint8Array(buffer);
+    const view = new DataView(buffer);
+    const text = new TextDecoder();
+    let pos = 0;
+
+    function str(length) {
+        const value = text.decode(bytes.subarray(pos, pos + length));
+        pos += length;
+        return value;
+    }
+
+    function bin(length) {
+        const value = bytes.slice(pos, pos + length);
+        pos += length;
+        return value;
+    }
+
+    function array(length) {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) value[i] = read();
+        return value;
+    }
+
+    function map(length) {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    }
+
+    function next(size, getter) {
+        const value = view[getter](pos);
+        pos += size;
+        return value;
+    }
+
+    function read() {
+        const type = bytes[pos++];
+        if (type <= 0x7f) return type;
+        if (type <= 0x8f) return map(type & 0x0f);
+        if (type <= 0x9f) return array(type & 0x0f);
+        if (type <= 0xbf) return str(type & 0x1f);
+        if (type >= 0xe0) return type - 0x100;
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return bin(next(1, 'getUint8'));
+            case 0xc5: return bin(next(2, 'getUint16'));
+            case 0xc6: return bin(next(4, 'getUint32'));
+            case 0xca: return next(4, 'getFloat32');
+            case 0xcb: return next(8, 'getFloat64');
+            case 0xcc: return next(1, 'getUint8');
+            case 0xcd: return next(2, 'getUint16');
+            case 0xce: return next(4, 'getUint32');
+            case 0xcf: return Number(next(8, 'getBigUint64'));
+            case 0xd0: return next(1, 'getInt8');
+            case 0xd1: return next(2, 'getInt16');
+            case 0xd2: return next(4, 'getInt32');
+            case 0xd3: return Number(next(8, 'getBigInt64'));
+            case 0xd9: return str(next(1, 'getUint8'));
+            case 0xda: return str(next(2, 'getUint16'));
+            case 0xdb: return str(next(4, 'getUint32'));
+            case 0xdc: return array(next(2, 'getUint16'));
+            case 0xdd: return array(next(4, 'getUint32'));
+            case 0xde: return map(next(2, 'getUint16'));
+            case 0xdf: return map(next(4, 'getUint32'));
+        }
+        throw new Error('Unsupported MessagePack type 0x' + type.toString(16));
+    }
+
+    return read();
+}
+
+// Expand a columnar grid window into row objects keyed by header
+function decodeGrid(grid) {
+    const columns = grid.columns.map(column => {
+        if (!column.dictionary) return column.values;
+        const codes = column.width === 1
+            ? column.codes
+            : new Uint16Array(column.codes.buffer, column.codes.byteOffset, column.codes.length / 2);
+        return Array.from(codes, code => column.dictionary[code]);
+    });
+    return Array.from({ length: grid.count }, (_, row) => {
+        const record = {};
+        grid.headers.forEach((header, index) => { record[header] = columns[index][row]; });
+        return record;
+    });
+}
+
+// Only the first screen of rows is rendered by the server; the rest
+// is fetched in windows from the data endpoint while scrolling.
+let totalRows = sheetConfig.totalRows;
+let loadedRows = sheetConfig.loadedRows;
+const windowRows = sheetConfig.windowRows;
+let loadingWindow = false;
+
+async function fetchGridWindow(start, limit) {
+    const sheetParam = currentSheet ? `&sheet_name=${currentSheet}` : '';
+    const response = await fetch(
+        `/api/v1/sheets/${sheetConfig.platform}/data/${sheetId}?start=${start}&limit=${limit}${sheetParam}`,
+        { headers: { 'Accept': 'application/msgpack, application/json' } }
+    );
+    if (!response.ok) throw new Error('Failed to fetch sheet rows');
+
+    const contentType = response.headers.get('Content-Type') || '';
+    if (contentType.startsWith('application/msgpack')) {
+        return decodeGrid(decodeMsgpack(await response.arrayBuffer()));
+    }
+    const [headers, ...rows] = (await response.json()).data;
+    return rows.map(row => Object.fromEntries(headers.map((header, index) => [header, row[index]])));
+}
+
+async function loadNextWindow() {
+    if (loadingWindow || loadedRows >= totalRows) return;
+    loadingWindow = true;
+    try {
+        const rows = await fetchGridWindow(loadedRows, windowRows);
+        const tbody = document.querySelector('tbody');
+        tbody.querySelectorAll('tr.empty-row').forEach(tr => tr.remove());
+        tbody.querySelectorAll('.end-of-table').forEach(cell => cell.closest('tr').remove());
+
+        const fragment = document.createDocumentFragment();
+        rows.forEach((row, index) => {
+            fragment.appendChild(createRowElement(row, loadedRows + index + 1));
+        });
+        tbody.appendChild(fragment);
+        loadedRows += rows.length;
+        if (rows.length === 0) totalRows = loadedRows;
+        addEmptyRows();
+    } catch (error) {
+        console.error('Error loading rows:', error);
+    } finally {
+        loadingWindow = false;
+    }
+}
+
+let activeSheetName = '';
+
+async function changeSheet(sheetName) {
+    if (sheetName === currentSheet) return;
+
+    try {
+        const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/data/${sheetId}?sheet_name=${sheetName}`, {
+            headers: { 'Accept': 'application/msgpack, application/json' }
+        });
+        
+        if (!response.ok) throw new Error('Failed to fetch sheet data');
+        
+        const contentType = response.headers.get('Content-Type') || '';
+        const data = contentType.startsWith('application/msgpack')
+            ? decodeGrid(decodeMsgpack(await response.arrayBuffer()))
+            : (await response.json()).data;
+        currentSheetData = data;
+        currentSheet = sheetName;
+        loadedRows = totalRows = data.length;
+
+        // Update URL without reload
+        const url = new URL(window.location);
+        url.searchParams.set('sheet_name', sheetName);
+        window.history.pushState({}, '', url);
+
+        // Update table content and sheet tabs
+        updateTableContent(data);
+        updateSheetTabs(sheetName);
+    } catch (error) {
+        console.error('Error changing sheet:', error);
+        alert('Failed to switch to sheet: ' + sheetName);
+    }
+}
+
+function showSheetMenu(event, sheetName) {
+    closeSheetMenu();
+    
+    const menu = document.getElementById('sheetMenu');
+    const rect = event.target.getBoundingClientRect();
+    
+    menu.style.display = 'block';
+    
+    let left = rect.left;
+    let top = rect.bottom + 5;  // Show menu below the tab instead of above
+    
+    // Adjust if menu would go off screen
+    if (left + menu.offsetWidth > window.innerWidth) {
+        left = window.innerWidth - menu.offsetWidth - 10;
+    }
+    if (top + menu.offsetHeight > window.innerHeight - 50) {
+        top = rect.top - menu.offsetHeight - 5;  // Show above if no space below
+    }
+    
+    menu.style.left = `${left}px`;
+    menu.style.top = `${top}px`;
+    
+    activeSheetName = sheetName;
+    event.preventDefault();
+    
+    // Add click listener with delay
+    setTimeout(() => {
+        document.addEventListener('click', closeSheetMenu);
+    }, 0);
+    
+    return false;
+}
+
+function closeSheetMenu() {
+    document.getElementById('sheetMenu').style.display = 'none';
+    document.removeEventListener('click', closeSheetMenu);
+}
+
+async function renameSheet() {
+    const tab = document.querySelector(`.sheet-tab[data-sheet="${activeSheetName}"]`);
+    const input = document.createElement('input');
+    input.className = 'rename-input';
+    input.value = activeSheetName;
+    
+    // Save original content in case of cancel
+    const originalName = activeSheetName;
+    
+    // Replace tab content with input
+    tab.textContent = '';
+    tab.appendChild(input);
+    input.focus();
+    input.select();
+    
+    const handleRename = async () => {
+        const newName = input.value.trim();
+        if (newName && newName !== originalName) {
+            try {
+                const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/rename`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({
+                        old_name: originalName,
+                        new_name: newName
+                    })
+                });
+
+                if (response.ok) {
+                    tab.textContent = newName;
+                    tab.setAttribute('data-sheet', newName);
+                    
+                    if (originalName === currentSheet) {
+                        currentSheet = newName;
+                        const url = new URL(window.location);
+                        url.searchParams.set('sheet_name', newName);
+                        window.history.pushState({}, '', url);
+                    }
+                } else {
+                    tab.textContent = originalName;
+                    alert('Failed to rename sheet');
+                }
+            } catch (error) {
+                console.error('Error:', error);
+                tab.textContent = originalName;
+            }
+        } else {
+            tab.textContent = originalName;
+        }
+    };
+
+    // Handle Enter key and blur
+    input.addEventListener('keydown', (e) => {
+        if (e.key === 'Enter') {
+            e.preventDefault();
+            input.blur();
+        } else if (e.key === 'Escape') {
+            tab.textContent = originalName;
+            closeSheetMenu();
+        }
+    });
+
+    input.addEventListener('blur', handleRename);
+    closeSheetMenu();
+}
+
+async function duplicateSheet() {
+    const newName = prompt('Enter name for the duplicate sheet:', `${activeSheetName} (Copy)`);
+    if (newName) {
+        try {
+            const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/duplicate`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    source_name: activeSheetName,
+                    new_name: newName
+                })
+            });
+
+            if (response.ok) {
+                // Add new tab without reload
+                const sheetsContainer = document.querySelector('.sheets-container');
+                const newTab = document.createElement('div');
+                newTab.className = 'sheet-tab';
+                newTab.setAttribute('data-sheet', newName);
+                newTab.onclick = () => changeSheet(newName);
+                newTab.oncontextmenu = (e) => showSheetMenu(e, newName);
+                newTab.textContent = newName;
+                sheetsContainer.appendChild(newTab);
+                
+                // Switch to new sheet
+                changeSheet(newName);
+            } else {
+                alert('Failed to duplicate sheet');
+            }
+        } catch (error) {
+            console.error('Error:', error);
+        }
+    }
+    closeSheetMenu();
+}
+
+async function deleteSheet() {
+    try {
+        const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/sheet/${activeSheetName}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            const tab = document.querySelector(`.sheet-tab[data-sheet="${activeSheetName}"]`);
+            
+            // Animate removal
+            tab.style.transition = 'all 0.2s';
+            tab.style.opacity = '0';
+            tab.style.transform = 'translateY(10px)';
+            
+            setTimeout(() => {
+                tab.remove();
+                
+                // Switch to first available sheet if current sheet was deleted
+                if (activeSheetName === currentSheet) {
+                    const firstSheet = document.querySelector('.sheet-tab');
+                    if (firstSheet) {
+                        changeSheet(firstSheet.getAttribute('data-sheet'));
+                    }
+                }
+            }, 200);
+        } else {
+            alert('Failed to delete sheet');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+    }
+    closeSheetMenu();
+}
+
+function showNewSheetDialog() {
+    createNewSheet();
+}
+
+async function createNewSheet() {
+    // Get all existing sheet names
+    const existingSheets = sheetConfig.sheets;
+    
+    // Extract numbers from existing sheet names
+    const usedNumbers = existingSheets
+        .map(name => {
+            const match = name.match(/Sheet(\d+)/);
+            return match ? parseInt(match[1]) : 0;
+        })
+        .filter(num => !isNaN(num));
+    
+    // Find the lowest available number
+    let counter = 1;
+    while (usedNumbers.includes(counter)) {
+        counter++;
+    }
+    
+    const sheetName = `Sheet${counter}`;
+
+    try {
+        const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/new-sheet`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ title: sheetName })
+        });
+
+        if (response.ok) {
+            // Add new tab without reload
+            const sheetsContainer = document.querySelector('.sheets-container');
+            
+            // Find the correct position to insert the new tab
+            const newNumber = counter;
+            let insertBefore = null;
+            
+            for (const tab of sheetsContainer.children) {
+                const match = tab.textContent.match(/Sheet(\d+)/);
+                if (match && parseInt(match[1]) > newNumber) {
+                    insertBefore = tab;
+                    break;
+                }
+            }
+
+            const newTab = document.createElement('div');
+            newTab.className = 'sheet-tab active';
+            newTab.setAttribute('data-sheet', sheetName);
+            newTab.onclick = () => changeSheet(sheetName);
+            newTab.oncontextmenu = (e) => showSheetMenu(e, sheetName);
+            newTab.textContent = sheetName;
+            
+            // Remove active class from other tabs
+            document.querySelectorAll('.sheet-tab.active').forEach(tab => {
+                tab.classList.remove('active');
+            });
+            
+            if (insertBefore) {
+                sheetsContainer.insertBefore(newTab, insertBefore);
+            } else {
+                sheetsContainer.appendChild(newTab);
+            }
+
+            // Initialize empty sheet data
+            currentSheet = sheetName;
+            currentSheetData = { data: [] };
+            updateTableContent([]);
+            
+            // Update URL
+            const url = new URL(window.location);
+            url.searchParams.set('sheet_name', sheetName);
+            window.history.pushState({}, '', url);
+        } else {
+            const error = await response.json();
+            console.error('Error:', error);
+            
+            if (error.detail && error.detail.includes('already exists')) {
+                counter++;
+                createNewSheet();
+                return;
+            }
+            
+            alert(error.detail || 'Failed to create sheet');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to create sheet');
+    }
+}
+
+async function deleteRow(button) {
+    const row = button.closest('tr');
+    const rowIndex = row.rowIndex;
+    
+    if (!confirm('Are you sure you want to delete this row?')) return;
+
+    try {
+        const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/row/${rowIndex}`, {
+            method: 'DELETE'
+        });
+
+        if (response.ok) {
+            row.remove();  // Remove the row from the table immediately
+        } else {
+            alert('Failed to delete row');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to delete row');
+    }
+}
+
+let activeCell = null;
+
+// Add context menu for color options
+document.addEventListener('contextmenu', (e) => {
+    const cell = e.target.closest('.editable');
+    if (!cell) return;
+
+    e.preventDefault();
+    const menu = document.getElementById('colorMenu');
+    
+    // Calculate position to keep menu in viewport
+    let left = e.pageX;
+    let top = e.pageY;
+    
+    const menuWidth = 150;  // Approximate menu width
+    const menuHeight = 120; // Approximate menu height
+    
+    if (left + menuWidth > window.innerWidth) {
+        left = window.innerWidth - menuWidth - 10;
+    }
+    
+    if (top + menuHeight > window.innerHeight) {
+        top = window.innerHeight - menuHeight - 10;
+    }
+    
+    menu.style.left = `${left}px`;
+    menu.style.top = `${top}px`;
+    menu.style.display = 'block';
+    
+    activeCell = cell;
+});
+
+// Close color menu when clicking outside
+document.addEventListener('click', (e) => {
+    if (!e.target.closest('.color-menu')) {
+        document.getElementById('colorMenu').style.display = 'none';
+    }
+});
+
+async function setCellColor(color) {
+    if (!activeCell) return;
+    
+    // Remove existing color classes
+    activeCell.classList.remove('bg-red', 'bg-green', 'bg-yellow', 'bg-blue');
+    
+    // Add new color class if color is specified
+    if (color) {
+        activeCell.classList.add(`bg-${color}`);
+    }
+
+    // Get cell position
+    const rowIndex = activeCell.parentElement.rowIndex;
+    const colIndex = activeCell.cellIndex;
+    const range = `${String.fromCharCode(65 + colIndex)}${rowIndex + 1}`;
+
+    try {
+        // Update cell format in local database
+        const response = await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/format`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                range: range,
+                format: { backgroundColor: color }
+            })
+        });
+
+        if (!response.ok) {
+            throw new Error('Failed to update cell format');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Failed to update cell color');
+    }
+
+    document.getElementById('colorMenu').style.display = 'none';
+}
+
+// Prevent scroll position changes when clicking
+document.addEventListener('click', (e) => {
+    if (e.target.closest('.editable')) {
+        e.preventDefault();
+    }
+}, { capture: true });
+
+// Update table container styles
+document.querySelector('.table-container').style.scrollBehavior = 'smooth';
+
+// Add empty rows dynamically
+function addEmptyRows() {
+    const tbody = document.querySelector('tbody');
+    const currentRows = tbody.children.length;
+    const targetRows = 300;  // Show all 300 rows
+    
+    // Calculate how many actual data rows we have
+    const dataRows = document.querySelectorAll('tbody tr:not(.empty-row):not(.end-of-table)').length;
+    
+    // Remove existing end indicator if any
+    const existingIndicator = document.querySelector('.end-of-table');
+    if (existingIndicator) {
+        existingIndicator.remove();
+    }
+
+    if (dataRows < targetRows) {
+        const fragment = document.createDocumentFragment();
+        for (let i = dataRows; i < targetRows; i++) {
+            const tr = document.createElement('tr');
+            tr.className = 'empty-row';
+            
+            // Add row number
+            const rowNum = document.createElement('td');
+            rowNum.className = 'row-number';
+            rowNum.textContent = i + 1;
+            tr.appendChild(rowNum);
+            
+            // Add empty cells
+            for (let j = 0; j < 12; j++) {
+                const td = document.createElement('td');
+                td.className = 'editable';
+                td.onclick = function() { editCell(this); };
+                td.textContent = '';
+                tr.appendChild(td);
+            }
+            fragment.appendChild(tr);
+        }
+        tbody.appendChild(fragment);
+
+        // Add end of table indicator
+        const endRow = document.createElement('tr');
+        const endCell = document.createElement('td');
+        endCell.colSpan = 13;
+        endCell.className = 'end-of-table';
+        endCell.textContent = 'End of table - Maximum 300 rows';
+        endRow.appendChild(endCell);
+        tbody.appendChild(endRow);
+    }
+}
+
+// Call addEmptyRows on page load
+document.addEventListener('DOMContentLoaded', () => {
+    addEmptyRows();
+    // Prefetch the next window so the first scroll does not wait on the network
+    loadNextWindow();
+});
+
+// Update scroll handler
+document.querySelector('.table-container').addEventListener('scroll', function(e) {
+    const { scrollTop, scrollHeight, clientHeight } = e.target;
+    
+    clearTimeout(scrollTimeout);
+    
+    scrollTimeout = setTimeout(() => {
+        const tbody = document.querySelector('tbody');
+        const dataRows = document.querySelectorAll('tbody tr:not(.empty-row):not(.end-of-table)').length;
+        if (scrollHeight - scrollTop - clientHeight < 200) {
+            if (loadedRows < totalRows) {
+                loadNextWindow();
+            } else if (dataRows < 300) {
+                addEmptyRows();
+            }
+        }
+    }, 100);
+});
+
+// Update sheet tabs to show active state correctly
+function updateSheetTabs(activeName) {
+    document.querySelectorAll('.sheet-tab').forEach(tab => {
+        if (tab.getAttribute('data-sheet') === activeName) {
+            tab.classList.add('active');
+        } else {
+            tab.classList.remove('active');
+        }
+    });
+}
+
+function showWorksheetMenu(event) {
+    const menu = document.getElementById('worksheetMenu');
+    const rect = event.target.closest('.sheet-hamburger').getBoundingClientRect();
+    
+    // Close any other open menus
+    closeSheetMenu();
+    
+    menu.style.display = 'block';
+    menu.style.left = '20px';  // Fixed left position
+    menu.style.top = `${rect.bottom + 4}px`;
+    
+    // Adjust position if menu would go off screen
+    const menuRect = menu.getBoundingClientRect();
+    if (menuRect.bottom > window.innerHeight) {
+        menu.style.top = `${rect.top - menuRect.height - 4}px`;
+    }
+    
+    event.stopPropagation();
+    
+    setTimeout(() => {
+        document.addEventListener('click', closeWorksheetMenu);
+    }, 0);
+}
+
+function closeWorksheetMenu() {
+    document.getElementById('worksheetMenu').style.display = 'none';
+    document.removeEventListener('click', closeWorksheetMenu);
+}
+
+let isDragging = false;
+let startCell = null;
+let currentCell = null;
+let selection = null;
+
+function initDragToExtend() {
+    const table = document.querySelector('table');
+    
+    // Create selection element
+    selection = document.createElement('div');
+    selection.className = 'cell-selection';
+    selection.style.display = 'none';
+    document.querySelector('.table-container').appendChild(selection);
+
+    // Add drag handle to each editable cell
+    document.querySelectorAll('.editable').forEach(cell => {
+        const handle = document.createElement('div');
+        handle.className = 'drag-handle';
+        cell.appendChild(handle);
+
+        handle.addEventListener('mousedown', (e) => {
+            e.stopPropagation();
+            isDragging = true;
+            startCell = cell;
+            currentCell = cell;
+            updateSelection();
+        });
+    });
+
+    // Handle mouse move for selection
+    document.addEventListener('mousemove', (e) => {
+        if (!isDragging) return;
+
+        const cell = document.elementFromPoint(e.clientX, e.clientY);
+        if (cell && cell.classList.contains('editable')) {
+            currentCell = cell;
+            updateSelection();
+        }
+    });
+
+    // Handle mouse up to end selection
+    document.addEventListener('mouseup', () => {
+        if (isDragging) {
+            isDragging = false;
+            if (startCell && currentCell) {
+                extendValues();
+            }
+            selection.style.display = 'none';
+        }
+    });
+}
+
+function updateSelection() {
+    if (!startCell || !currentCell) return;
+
+    const startRect = startCell.getBoundingClientRect();
+    const currentRect = currentCell.getBoundingClientRect();
+    const containerRect = document.querySelector('.table-container').getBoundingClientRect();
+
+    const left = Math.min(startRect.left, currentRect.left) - containerRect.left;
+    const top = Math.min(startRect.top, currentRect.top) - containerRect.top;
+    const width = Math.abs(currentRect.left - startRect.left) + currentRect.width;
+    const height = Math.abs(currentRect.top - startRect.top) + currentRect.height;
+
+    selection.style.display = 'block';
+    selection.style.left = `${left}px`;
+    selection.style.top = `${top}px`;
+    selection.style.width = `${width}px`;
+    selection.style.height = `${height}px`;
+}
+
+function extendValues() {
+    const startIndex = startCell.cellIndex;
+    const startRow = startCell.parentElement.rowIndex;
+    const endIndex = currentCell.cellIndex;
+    const endRow = currentCell.parentElement.rowIndex;
+
+    const startValue = startCell.textContent;
+
+    // Get all cells in selection
+    const cells = [];
+    for (let i = Math.min(startRow, endRow); i <= Math.max(startRow, endRow); i++) {
+        for (let j = Math.min(startIndex, endIndex); j <= Math.max(startIndex, endIndex); j++) {
+            const cell = document.querySelector(`tr:nth-child(${i + 1}) td:nth-child(${j + 1})`);
+            if (cell && cell !== startCell) {
+                cells.push(cell);
+            }
+        }
+    }
+
+    // Update all cells with the start value
+    cells.forEach(cell => {
+        cell.textContent = startValue;
+        // Trigger cell update to backend
+        const range = `${String.fromCharCode(65 + cell.cellIndex - 1)}${cell.parentElement.rowIndex}`;
+        updateCellValue(range, startValue);
+    });
+}
+
+async function updateCellValue(range, value) {
+    try {
+        await fetch(`/api/v1/sheets/${sheetConfig.platform}/${sheetId}/cell`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ range, value })
+        });
+    } catch (error) {
+        console.error('Error updating cell:', error);
+    }
+}
+
+// Initialize drag to extend functionality
+document.addEventListener('DOMContentLoaded', initDragToExtend);
+
+function initColumnResize() {
+    const table = document.querySelector('table');
+    const headers = table.querySelectorAll('th');
+    let isResizing = false;
+    let currentHeader = null;
+    let startX;
+    let startWidth;
+
+    // Add resize handles to all headers except the last one
+    headers.forEach((header, index) => {
+        if (index < headers.length - 1) {  // Skip last column
+            const handle = document.createElement('div');
+            handle.className = 'resize-handle';
+            header.appendChild(handle);
+
+            handle.addEventListener('mousedown', startResize);
+        }
+    });
+
+    function startResize(e) {
+        isResizing = true;
+        currentHeader = e.target.parentElement;
+        startX = e.pageX;
+        startWidth = currentHeader.offsetWidth;
+
+        // Add resizing class for visual feedback
+        document.querySelector('.table-container').classList.add('resizing');
+        e.target.classList.add('active');
+
+        document.addEventListener('mousemove', resize);
+        document.addEventListener('mouseup', stopResize);
+
+        e.preventDefault(); // Prevent text selection
+    }
+
+    function resize(e) {
+        if (!isResizing) return;
+
+        const diff = e.pageX - startX;
+        const newWidth = Math.max(50, startWidth + diff); // Minimum width of 50px
+        
+        // Update column width
+        currentHeader.style.width = `${newWidth}px`;
+        
+        // Update all cells in this column
+        const colIndex = Array.from(currentHeader.parentElement.children).indexOf(currentHeader);
+        const cells = table.querySelectorAll(`td:nth-child(${colIndex + 1})`);
+        cells.forEach(cell => {
+            cell.style.width = `${newWidth}px`;
+        });
+    }
+
+    function stopResize() {
+        if (!isResizing) return;
+
+        isResizing = false;
+        document.querySelector('.table-container').classList.remove('resizing');
+        document.querySelectorAll('.resize-handle.active').forEach(handle => {
+            handle.classList.remove('active');
+        });
+
+        document.removeEventListener('mousemove', resize);
+        document.removeEventListener('mouseup', stopResize);
+    }
+}
+
+// Initialize column resize on page load
+document.addEventListener('DOMContentLoaded', () => {
+    initColumnResize();
+});
+
+function openBottomSheet() {
+    document.getElementById('menuBottomSheet').classList.add('open');
+}
+
+function closeBottomSheet() {
+    document.getElementById('menuBottomSheet').classList.remove('open');
+}
+
+function handleMenuAction(action) {
+    const sheetId = sheetConfig.sheetId;
+    switch(action) {
+        case 'new':
+            // Call your API endpoint for creating new sheet
+            break;
+        case 'rename':
+            // Call your API endpoint for renaming
+            break;
+        case 'duplicate':
+            // Call your API endpoint for duplicating
+            break;
+        case 'delete':
+            if (confirm('Are you sure you want to delete this sheet?')) {
+                // Call your API endpoint for deleting
+            }
+            break;
+    }
+    closeBottomSheet();
+}
+
+// Close sheet when clicking outside
+document.addEventListener('click', (e) => {
+    const sheet = document.getElementById('menuBottomSheet');
+    if (!sheet.contains(e.target)) {
+        closeBottomSheet();
+    }
+});
+
+// Add drag to dismiss functionality
+let startY;
+let currentY;
+const sheet = document.getElementById('menuBottomSheet');
+
+sheet.addEventListener('touchstart', (e) => {
+    startY = e.touches[0].clientY;
+});
+
+sheet.addEventListener('touchmove', (e) => {
+    currentY = e.touches[0].clientY;
+    const diff = currentY - startY;
+    if (diff > 0) { // Only allow dragging down
+        sheet.style.transform = `translateY(${diff}px)`;
+    }
+});
+
+sheet.addEventListener('touchend', () => {
+    if (currentY - startY > 100) { // If dragged down more than 100px
+        closeBottomSheet();
+    } else {
+        sheet.style.transform = '';
+    }
+});